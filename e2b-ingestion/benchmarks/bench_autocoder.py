@@ -0,0 +1,75 @@
+"""
+Throughput and accuracy of verbatim-to-MedDRA autocoding (e2b_autocoder.MedDRAAutocoder).
+
+Writes a release-sized synthetic MedDRA distribution
+(synthetic.write_synthetic_meddra), builds the autocoder's indexes and
+codes batches of verbatim variants of its LLTs (synthetic.synthetic_verbatim_terms):
+re-cased, punctuated, reordered and misspelt terms plus made-up noise.
+Reports terms per second for all-distinct terms and for a stream drawing
+the same number of terms from --distinct-share as many variants (verbatim
+text repeats across reports), coding accuracy against the source PT, the
+share left for manual coding and the share of noise terms coded anyway.
+
+Usage:
+    python benchmarks/bench_autocoder.py [--terms 10000 100000] [--distinct-share 0.2] [--n-pt 25000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from e2b_autocoder import MedDRAAutocoder
+from e2b_meddra import load_meddra
+from synthetic import synthetic_verbatim_terms, write_synthetic_meddra
+
+DEFAULT_TERMS = [10_000, 100_000]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--terms', type=int, nargs='+', default=DEFAULT_TERMS)
+    ap.add_argument('--distinct-share', type=float, default=0.2)
+    ap.add_argument('--n-pt', type=int, default=25_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        meddra = load_meddra(write_synthetic_meddra(os.path.join(tmp, 'MedAscii'), n_pt=args.n_pt))
+    start = time.perf_counter()
+    autocoder = MedDRAAutocoder(meddra)
+    print(f"index: {len(autocoder.keys):,} LLT names, {len(autocoder.postings):,} n-grams, "
+          f"{time.perf_counter() - start:.2f}s")
+
+    print(f"{'terms':>9} {'distinct/s':>11} {'stream/s':>9} {'coded':>7} {'correct':>8} {'review':>7} "
+          f"{'noise coded':>12}  matches")
+    for n in args.terms:
+        terms = synthetic_verbatim_terms(meddra, n, seed=n)
+        autocoder = MedDRAAutocoder(meddra)
+        start = time.perf_counter()
+        results = autocoder.code_terms(text for text, _ in terms)
+        distinct_rate = n / (time.perf_counter() - start)
+
+        stream = random.Random(n).choices(terms[:max(1, int(n * args.distinct_share))], k=n)
+        autocoder = MedDRAAutocoder(meddra)
+        start = time.perf_counter()
+        autocoder.code_terms(text for text, _ in stream)
+        stream_rate = n / (time.perf_counter() - start)
+
+        known = [(r, pt) for r, (_, pt) in zip(results, terms) if pt is not None]
+        coded = [(r, pt) for r, pt in known if r is not None]
+        correct = sum(r.pt == pt for r, pt in coded)
+        review = sum(r is None or r.needs_review for r, _ in known)
+        noise = [r for r, (_, pt) in zip(results, terms) if pt is None]
+        matches = Counter(r.match if r is not None else 'uncoded' for r in results)
+        print(f"{n:>9,} {distinct_rate:>11,.0f} {stream_rate:>9,.0f} "
+              f"{len(coded) / len(known):>7.1%} {correct / len(known):>8.1%} {review / len(known):>7.1%} "
+              f"{sum(r is not None for r in noise) / max(len(noise), 1):>12.1%}  "
+              + ' '.join(f'{k}={v:,}' for k, v in matches.most_common()))
+
+if __name__ == '__main__':
+    main()
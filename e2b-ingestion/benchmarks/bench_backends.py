@@ -0,0 +1,106 @@
+"""
+Conformance check and throughput comparison of the etree and lxml backends.
+
+Both backends must produce identical SafetyReports: this runs parse() and
+iter_reports() with each backend on sample_e2b_r2.xml, on synthetic messages,
+and on an edge-case message (comments, processing instructions, empty and
+repeated elements, missing patient), exiting non-zero on any difference.
+It then times both modes per backend.
+
+Usage:
+    python benchmarks/bench_backends.py [--reports N] [--repeat K]
+"""
+
+import argparse
+import dataclasses
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from e2b_parser import E2BR2Parser, LET
+from synthetic import SAMPLE_PATH, synthetic_message
+
+EDGE_CASES = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE ichicsr SYSTEM "ich-icsr-v2.1.dtd">
+<ichicsr lang="en">
+  <!-- header comment -->
+  <safetyreport>
+    <safetyreportid></safetyreportid>
+    <?vendor note?>
+    <reporttype>9</reporttype>
+    <primarysource><qualification>3</qualification></primarysource>
+    <primarysource><reportercountry>FR</reportercountry><qualification>1</qualification></primarysource>
+  </safetyreport>
+  <safetyreport>
+    <safetyreportid>EDGE-2</safetyreportid>
+    <patient>
+      <patientonsetage>3</patientonsetage>
+      <!-- patient comment -->
+      <medicalhistoryepisode><patientmedicalhistorytext/></medicalhistoryepisode>
+      <medicalhistoryepisode><patientmedicalhistorytext>Asthma &amp; eczema</patientmedicalhistorytext></medicalhistoryepisode>
+      <drug/>
+      <reaction><reactionmeddrapt>Rash</reactionmeddrapt><reactionoutcome>7</reactionoutcome></reaction>
+      <summary><narrativeincludeclinical><![CDATA[Narrative <with> markup]]></narrativeincludeclinical></summary>
+    </patient>
+  </safetyreport>
+</ichicsr>
+"""
+
+
+def _as_dicts(reports):
+    return [dataclasses.asdict(r) for r in reports]
+
+
+def check_conformance(name, xml_content):
+    """Exit if any backend/mode combination disagrees on xml_content"""
+    results = {}
+    for backend in ('etree', 'lxml'):
+        results[f'{backend}.parse'] = _as_dicts(E2BR2Parser(xml_content, backend=backend).parse())
+        stream = io.BytesIO(xml_content.encode('utf-8'))
+        results[f'{backend}.iter_reports'] = _as_dicts(E2BR2Parser(backend=backend).iter_reports(stream))
+
+    reference = results['etree.parse']
+    for label, reports in results.items():
+        if reports != reference:
+            sys.exit(f"{name}: {label} differs from etree.parse")
+    print(f"conformant: {name} ({len(reference)} reports)")
+
+
+def _best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--reports', type=int, default=5_000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    if LET is None:
+        sys.exit("lxml is not installed; nothing to compare")
+
+    with open(SAMPLE_PATH, 'r', encoding='utf-8') as f:
+        check_conformance('sample_e2b_r2.xml', f.read())
+    check_conformance('edge cases', EDGE_CASES)
+    xml_content = synthetic_message(args.reports)
+    check_conformance(f'synthetic x{args.reports:,}', xml_content)
+
+    encoded = xml_content.encode('utf-8')
+    print(f"\n{'backend':>8} {'parse()/s':>11} {'iter_reports()/s':>17}")
+    for backend in ('etree', 'lxml'):
+        parse_s = _best_of(args.repeat, lambda: E2BR2Parser(xml_content, backend=backend).parse())
+        iter_s = _best_of(args.repeat, lambda: sum(
+            1 for _ in E2BR2Parser(backend=backend).iter_reports(io.BytesIO(encoded))))
+        print(f"{backend:>8} {args.reports / parse_s:>11,.0f} {args.reports / iter_s:>17,.0f}")
+
+
+if __name__ == '__main__':
+    main()
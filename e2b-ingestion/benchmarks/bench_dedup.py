@@ -0,0 +1,52 @@
+"""
+Cost and recall of blocked duplicate detection (e2b_dedup.DuplicateDetector).
+
+Writes randomised messages with a share of injected duplicates
+(synthetic.write_duplicated_message) and streams each through the
+detector, reporting pairs scored against the n(n-1)/2 of an all-pairs
+comparison, recall of the injected pairs and the false-positive count.
+
+Usage:
+    python benchmarks/bench_dedup.py [--sizes 10000 100000] [--duplicate-share 0.05]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from e2b_dedup import DuplicateDetector, find_duplicates
+from synthetic import write_duplicated_message
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    ap.add_argument('--duplicate-share', type=float, default=0.05)
+    ap.add_argument('--threshold', type=float, default=None)
+    args = ap.parse_args()
+
+    print(f"{'reports':>9} {'pairs scored':>13} {'of n^2/2':>9} {'recall':>7} {'false +':>8} {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f'dedup_{n}.xml')
+            injected = set(write_duplicated_message(path, n, args.duplicate_share))
+
+            detector = DuplicateDetector() if args.threshold is None else DuplicateDetector(args.threshold)
+            start = time.perf_counter()
+            found = {(c.case_id, c.matched_case_id) for c in find_duplicates(path, detector)}
+            elapsed = time.perf_counter() - start
+
+            all_pairs = n * (n - 1) / 2
+            recall = len(found & injected) / len(injected) if injected else 1.0
+            print(f"{n:>9,} {detector.pairs_scored:>13,} {detector.pairs_scored / all_pairs:>9.2%} "
+                  f"{recall:>7.1%} {len(found - injected):>8,} {elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
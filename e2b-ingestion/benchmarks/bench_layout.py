@@ -0,0 +1,58 @@
+"""
+Retained bytes per parsed case for the working-tree record layout vs a git revision.
+
+Builds SafetyReports for a scaled-up sample_e2b_r2.xml with each parser, frees
+the ElementTree, and reports the memory still held by the reports (via
+tracemalloc). The default revision has plain per-instance __dict__
+dataclasses, showing the effect of slotted records and pooled code values.
+
+Usage:
+    python benchmarks/bench_layout.py [--rev REV] [--reports N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import e2b_parser
+from bench_throughput import BASELINE_REV, load_revision, make_parser
+from synthetic import synthetic_message
+
+
+def bytes_per_case(module, xml_content, n_reports):
+    """Retained bytes per case of SafetyReports built by module's parser"""
+    parser = make_parser(module, xml_content)
+    gc.collect()
+    tracemalloc.start()
+    root = ET.fromstring(xml_content)
+    reports = [parser._parse_safety_report(e) for e in root.iter('safetyreport')]
+    del root
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(reports) == n_reports
+    return retained / n_reports
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--rev', default=BASELINE_REV, help='git revision to compare against')
+    ap.add_argument('--reports', type=int, default=10_000)
+    args = ap.parse_args()
+
+    xml_content = synthetic_message(args.reports)
+    before = bytes_per_case(load_revision(args.rev), xml_content, args.reports)
+    after = bytes_per_case(e2b_parser, xml_content, args.reports)
+
+    print(f"{args.reports:,} cases")
+    print(f"{args.rev:>12}: {before:>8,.0f} bytes/case")
+    print(f"{'working tree':>12}: {after:>8,.0f} bytes/case  ({1 - after / before:.0%} smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Peak RSS of E2BR2Parser.parse() vs E2BR2Parser.iter_reports() as input grows.
+
+parse() and iter_reports() read the replicated sample message. A third run
+streams a randomised message in which every free-text value is unique per
+report, so flat iter_reports() memory does not rely on repeated strings.
+Each measurement runs in a fresh subprocess so peaks are independent.
+
+Usage:
+    python benchmarks/bench_memory.py [--sizes N ...]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import write_random_message, write_synthetic_message
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000, 100_000]
+
+
+def _measure(mode, path):
+    """Run one parse in this process and print report count and peak RSS in MB"""
+    from e2b_parser import E2BR2Parser
+
+    if mode == 'parse':
+        with open(path, 'r', encoding='utf-8') as f:
+            count = len(E2BR2Parser(f.read()).parse())
+    else:
+        count = sum(1 for _ in E2BR2Parser().iter_reports(path))
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(count, peak_kb / 1024)
+
+
+def _peak_mb(mode, path):
+    out = subprocess.run(
+        [sys.executable, __file__, '--measure', mode, path],
+        check=True, capture_output=True, text=True
+    ).stdout.split()
+    return float(out[1])
+
+
+def main(sizes):
+    print(f"{'reports':>10} {'file MB':>9} {'parse() MB':>11} {'iter_reports() MB':>18} {'unique text MB':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = write_synthetic_message(os.path.join(tmp, f'e2b_{n}.xml'), n)
+            file_mb = os.path.getsize(path) / (1 << 20)
+            parse_mb = _peak_mb('parse', path)
+            iter_mb = _peak_mb('iter', path)
+            os.remove(path)
+
+            path = write_random_message(os.path.join(tmp, f'e2b_unique_{n}.xml'), n, unique_text=True)
+            unique_mb = _peak_mb('iter', path)
+            os.remove(path)
+            print(f"{n:>10,} {file_mb:>9.1f} {parse_mb:>11.1f} {iter_mb:>18.1f} {unique_mb:>15.1f}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    ap.add_argument('--measure', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.measure:
+        _measure(*args.measure)
+    else:
+        main(args.sizes)
@@ -0,0 +1,58 @@
+"""
+Wall-clock scaling of parse_e2b_directory() across worker counts.
+
+Writes a directory of small synthetic E2B(R2) files (like a nightly intake)
+and times parse_e2b_directory() with 1, 2, 4 and 8 workers. Speedup is
+bounded by the number of CPU cores available.
+
+Usage:
+    python benchmarks/bench_scaling.py [--files N] [--reports-per-file K]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from e2b_parser import parse_e2b_directory
+from synthetic import write_synthetic_message
+
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--files', type=int, default=2_000)
+    ap.add_argument('--reports-per-file', type=int, default=2)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.files):
+            write_synthetic_message(os.path.join(tmp, f'e2b_{i:06d}.xml'), args.reports_per_file)
+
+        print(f"{args.files:,} files x {args.reports_per_file} reports, {os.cpu_count()} CPU cores")
+        print(f"{'workers':>8} {'seconds':>9} {'files/s':>9} {'speedup':>8}")
+        baseline = None
+        reference = None
+        for workers in WORKER_COUNTS:
+            start = time.perf_counter()
+            records, errors = parse_e2b_directory(tmp, workers=workers)
+            elapsed = time.perf_counter() - start
+
+            case_ids = [c['CASE_ID'] for c in records['ICSR_CASES']]
+            if reference is None:
+                reference = case_ids
+            elif case_ids != reference:
+                sys.exit(f"Output order differs with {workers} workers")
+            if errors:
+                sys.exit(f"Unexpected parse errors: {errors[:3]}")
+
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.files / elapsed:>9,.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
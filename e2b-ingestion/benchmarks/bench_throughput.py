@@ -0,0 +1,137 @@
+"""
+Reports per second of the working-tree E2BR2Parser vs a git revision.
+
+Loads e2b_parser.py from the given revision (by default the tree before the
+parser optimizations), checks both produce identical SafetyReports on a
+scaled-up sample_e2b_r2.xml, then times field extraction (safetyreport
+element -> SafetyReport on a pre-built tree) and end-to-end parse() for each.
+
+Reports are compared field by field at every level over the fields both
+revisions have. Intended output changes are applied to the working tree's
+reports first (see EXPECTED_CHANGES), so any remaining difference is a bug.
+
+Usage:
+    python benchmarks/bench_throughput.py [--rev REV] [--reports N] [--repeat K]
+"""
+
+import argparse
+import dataclasses
+import inspect
+import os
+import subprocess
+import sys
+import time
+import types
+import xml.etree.ElementTree as ET
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+
+import e2b_parser
+from synthetic import synthetic_message
+
+# The tree before the parser optimizations
+BASELINE_REV = '48d3998'
+
+
+def load_revision(rev):
+    """Import e2b_parser.py as it existed at a git revision"""
+    source = subprocess.run(
+        ['git', 'show', f'{rev}:./e2b_parser.py'],
+        cwd=HERE, check=True, capture_output=True, text=True
+    ).stdout
+    module = types.ModuleType(f'e2b_parser_{rev}')
+    module.__file__ = f'{rev}:e2b_parser.py'
+    sys.modules[module.__name__] = module
+    exec(compile(source, module.__file__, 'exec'), module.__dict__)
+    return module
+
+
+def make_parser(module, xml_content):
+    """module's E2BR2Parser; revisions before streaming input require xml_content"""
+    param = inspect.signature(module.E2BR2Parser).parameters.get('xml_content')
+    if param is not None and param.default is inspect.Parameter.empty:
+        return module.E2BR2Parser(xml_content)
+    return module.E2BR2Parser()
+
+
+def _verbatim_as_pt(report, old):
+    """Before VERBATIM_TERM, primarysourcereaction was reported as meddra_pt"""
+    if old['reactions'] and 'verbatim' not in old['reactions'][0]:
+        for reaction in report['reactions']:
+            reaction['meddra_pt'] = reaction['verbatim'] or reaction['meddra_pt']
+
+
+# Intended output changes, applied to a working-tree report (as a dict) given
+# the same report from the compared revision
+EXPECTED_CHANGES = (_verbatim_as_pt,)
+
+
+def _shared_fields(value, other):
+    """value restricted, at every level, to the fields other also has"""
+    if isinstance(value, dict) and isinstance(other, dict):
+        return {k: _shared_fields(value[k], other[k]) for k in value.keys() & other.keys()}
+    if isinstance(value, list) and isinstance(other, list) and len(value) == len(other):
+        return [_shared_fields(v, o) for v, o in zip(value, other)]
+    return value
+
+
+def same_reports(old_reports, new_reports):
+    """Whether two revisions' SafetyReports agree on every shared field, nested records included"""
+    old = [dataclasses.asdict(r) for r in old_reports]
+    new = [dataclasses.asdict(r) for r in new_reports]
+    if len(old) != len(new):
+        return False
+    for report, old_report in zip(new, old):
+        for change in EXPECTED_CHANGES:
+            change(report, old_report)
+    return _shared_fields(old, new) == _shared_fields(new, old)
+
+
+def _best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def extraction_rate(module, xml_content, sr_elems, repeat):
+    parser = make_parser(module, xml_content)
+    return len(sr_elems) / _best_of(repeat, lambda: [parser._parse_safety_report(e) for e in sr_elems])
+
+
+def parse_rate(module, xml_content, n_reports, repeat):
+    return n_reports / _best_of(repeat, lambda: module.E2BR2Parser(xml_content).parse())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--rev', default=BASELINE_REV, help='git revision to compare against')
+    ap.add_argument('--reports', type=int, default=20_000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    baseline = load_revision(args.rev)
+    xml_content = synthetic_message(args.reports)
+
+    if not same_reports(baseline.E2BR2Parser(xml_content).parse(), e2b_parser.E2BR2Parser(xml_content).parse()):
+        sys.exit(f"Output differs from {args.rev}")
+
+    sr_elems = ET.fromstring(xml_content).findall('.//safetyreport')
+    print(f"{args.reports:,} reports, output identical to {args.rev}")
+    print(f"{'':>12}  {'extract/s':>10}  {'parse()/s':>10}")
+    rates = {}
+    for label, module in ((args.rev, baseline), ('working tree', e2b_parser)):
+        rates[label] = (
+            extraction_rate(module, xml_content, sr_elems, args.repeat),
+            parse_rate(module, xml_content, args.reports, args.repeat),
+        )
+        print(f"{label:>12}  {rates[label][0]:>10,.0f}  {rates[label][1]:>10,.0f}")
+    (old_extract, old_parse), (new_extract, new_parse) = rates[args.rev], rates['working tree']
+    print(f"{'speedup':>12}  {new_extract / old_extract:>9.2f}x  {new_parse / old_parse:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+E2B(R2) parser benchmark suite.
+
+Generates randomised E2B(R2) messages (benchmarks/synthetic.py) at each size,
+then measures, each in a fresh subprocess:
+
+  dom     parse()-style: phases 'parse' (build tree), 'transform'
+          (safetyreport -> SafetyReport) and 'to_snowflake_records'
+  stream  iter_column_batches() end to end, constant memory
+
+recording reports/s, per-phase seconds and peak RSS. Results are written as
+JSON so runs can be compared between commits.
+
+Usage:
+    python benchmarks/run_suite.py [--sizes 1 1000 100000 1000000] [--output FILE]
+    python benchmarks/run_suite.py --compare BASE.json NEW.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from synthetic import write_random_message
+
+DEFAULT_SIZES = [1, 1_000, 10_000, 100_000]
+# The dom mode holds the whole tree; above this size only stream mode runs
+DEFAULT_MAX_DOM_REPORTS = 100_000
+RESULTS_DIR = os.path.join(HERE, 'results')
+
+
+def _measure(mode, path, backend):
+    """Run one measurement in this process and print it as JSON"""
+    from e2b_parser import E2BR2Parser
+
+    parser = E2BR2Parser(backend=backend)
+    seconds = {}
+    start = time.perf_counter()
+
+    if mode == 'dom':
+        with open(path, 'r', encoding='utf-8') as f:
+            xml_content = f.read()
+        t0 = time.perf_counter()
+        root = parser.backend.fromstring(xml_content)
+        sr_elems = parser.backend.find_reports(root)
+        t1 = time.perf_counter()
+        parser.reports = [parser._parse_safety_report(e) for e in sr_elems]
+        t2 = time.perf_counter()
+        records = parser.to_snowflake_records()
+        t3 = time.perf_counter()
+        seconds.update(parse=t1 - t0, transform=t2 - t1, to_snowflake_records=t3 - t2)
+        n_reports = len(records['ICSR_CASES'])
+    else:
+        n_reports = 0
+        for batch in parser.iter_column_batches(path):
+            n_reports += len(batch['ICSR_CASES']['CASE_ID'])
+
+    seconds['total'] = time.perf_counter() - start
+    print(json.dumps({
+        'reports': n_reports,
+        'mode': mode,
+        'backend': parser.backend.name,
+        'seconds': seconds,
+        'reports_per_s': n_reports / seconds['total'] if seconds['total'] else None,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=HERE, check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, backend, seed, max_dom_reports, data_dir):
+    results = []
+    for n in sizes:
+        path = os.path.join(data_dir, f'e2b_random_{n}_{seed}.xml')
+        if not os.path.exists(path):
+            write_random_message(path, n, seed)
+        file_mb = os.path.getsize(path) / (1 << 20)
+
+        modes = ['dom', 'stream'] if n <= max_dom_reports else ['stream']
+        for mode in modes:
+            cmd = [sys.executable, __file__, '--measure', mode, path]
+            if backend:
+                cmd += ['--backend', backend]
+            result = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+            result['file_mb'] = round(file_mb, 2)
+            results.append(result)
+            phases = ', '.join(f"{k}={v:.3f}s" for k, v in result['seconds'].items())
+            print(f"{n:>9,} {mode:>6}: {result['reports_per_s'] or 0:>9,.0f} reports/s, "
+                  f"peak {result['peak_rss_mb']:>7.1f} MB ({phases})")
+    return results
+
+
+def compare(base_path, new_path, threshold):
+    """Print per-case throughput and memory changes; return True if any regressed"""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    base_results = {(r['reports'], r['mode']): r for r in base['results']}
+
+    print(f"base {base.get('commit')} -> new {new.get('commit')}")
+    print(f"{'reports':>9} {'mode':>6} {'reports/s':>18} {'peak MB':>18}")
+    regressed = False
+    for r in new['results']:
+        b = base_results.get((r['reports'], r['mode']))
+        if b is None or not b['reports_per_s'] or not r['reports_per_s']:
+            continue
+        speed = r['reports_per_s'] / b['reports_per_s']
+        memory = r['peak_rss_mb'] / b['peak_rss_mb']
+        flag = ''
+        if speed < 1 - threshold or memory > 1 + threshold:
+            flag = '  REGRESSION'
+            regressed = True
+        print(f"{r['reports']:>9,} {r['mode']:>6} {r['reports_per_s']:>9,.0f} ({speed:>5.2f}x) "
+              f"{r['peak_rss_mb']:>9.1f} ({memory:>5.2f}x){flag}")
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    ap.add_argument('--backend', choices=['etree', 'lxml'], default=None)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--max-dom-reports', type=int, default=DEFAULT_MAX_DOM_REPORTS)
+    ap.add_argument('--data-dir', help='directory to keep generated messages in (default: temporary)')
+    ap.add_argument('--output', help='results JSON path (default: benchmarks/results/<commit>.json)')
+    ap.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'))
+    ap.add_argument('--threshold', type=float, default=0.10, help='relative change reported as a regression')
+    ap.add_argument('--measure', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.measure:
+        _measure(args.measure[0], args.measure[1], args.backend)
+        return
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    commit = _git('rev-parse', '--short', 'HEAD') or 'unknown'
+    dirty = bool(_git('status', '--porcelain', '--', '..'))
+
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+        results = run(args.sizes, args.backend, args.seed, args.max_dom_reports, args.data_dir)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run(args.sizes, args.backend, args.seed, args.max_dom_reports, tmp)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'dirty': dirty,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'results': results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+"""
+Synthetic E2B(R2) message writers for benchmarks.
+write_synthetic_message() replicates the safety reports in sample_e2b_r2.xml
+with unique report IDs; write_random_message() generates varied, realistic
+reports modelled on the sample.
+"""
+
+import os
+import re
+import random
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_e2b_r2.xml')
+
+_REPORT_RE = re.compile(r'<safetyreport>.*?</safetyreport>', re.DOTALL)
+_REPORT_ID_RE = re.compile(r'<safetyreportid>[^<]*</safetyreportid>')
+
+
+def _load_sample():
+    with open(SAMPLE_PATH, 'r', encoding='utf-8') as f:
+        xml_content = f.read()
+    reports = _REPORT_RE.findall(xml_content)
+    header = xml_content[:xml_content.index('<safetyreport>')]
+    return header, reports
+
+
+def write_synthetic_message(path, n_reports):
+    """Write an E2B(R2) message holding n_reports safety reports to path"""
+    header, reports = _load_sample()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(header)
+        for i in range(n_reports):
+            template = reports[i % len(reports)]
+            f.write(_REPORT_ID_RE.sub(f'<safetyreportid>SYN-{i:08d}</safetyreportid>', template))
+            f.write('\n  ')
+        f.write('\n</ichicsr>\n')
+    return path
+
+
+def synthetic_message(n_reports):
+    """Return an E2B(R2) message holding n_reports safety reports as a str"""
+    header, reports = _load_sample()
+    body = '\n  '.join(
+        _REPORT_ID_RE.sub(f'<safetyreportid>SYN-{i:08d}</safetyreportid>', reports[i % len(reports)])
+        for i in range(n_reports)
+    )
+    return f"{header}{body}\n</ichicsr>\n"
+
+
+# ---------------------------------------------------------------------------
+# Randomised message generator
+# ---------------------------------------------------------------------------
+
+_PRODUCTS = [
+    # (medicinal product, active substance, dosage form, route, indication)
+    ('CARDIOMAX 100mg tablets', 'cardimaxolol', 'tablet', '048', 'Atrial fibrillation'),
+    ('DERMACLEAR Cream 0.1%', 'dermazolone', 'cream', '028', 'Eczema'),
+    ('NEUROBALANCE 50mg capsules', 'neurobalanine', 'capsule', '048', 'Major depressive disorder'),
+    ('Lisinopril 10mg', 'lisinopril', 'tablet', '048', 'Hypertension'),
+    ('Metformin 500mg', 'metformin hydrochloride', 'tablet', '048', 'Type 2 Diabetes Mellitus'),
+    ('Atorvastatin 20mg', 'atorvastatin calcium', 'tablet', '048', 'Hyperlipidemia'),
+    ('Amoxicillin 500mg', 'amoxicillin', 'capsule', '048', 'Respiratory tract infection'),
+    ('Insulin glargine 100 U/ml', 'insulin glargine', 'solution for injection', '058', 'Type 1 Diabetes Mellitus'),
+    ('Omeprazole 20mg', 'omeprazole', 'capsule', '048', 'Gastrooesophageal reflux disease'),
+    ('Salbutamol 100mcg inhaler', 'salbutamol sulfate', 'inhalation powder', '055', 'Asthma'),
+]
+
+_REACTIONS = [
+    # (verbatim, MedDRA PT)
+    ('Severe bradycardia', 'Bradycardia'), ('Fainted', 'Syncope'), ('Dizzy spells', 'Dizziness'),
+    ('Skin rash at application site', 'Dermatitis contact'), ('Burning skin', 'Skin burning sensation'),
+    ('Nausea', 'Nausea'), ('Headache', 'Headache'), ('Vomiting', 'Vomiting'), ('Itching', 'Pruritus'),
+    ('Tiredness', 'Fatigue'), ('Low blood sugar', 'Hypoglycaemia'), ('Liver enzymes raised', 'Hepatic enzyme increased'),
+    ('Swollen face', 'Face oedema'), ('Shortness of breath', 'Dyspnoea'), ('Diarrhoea', 'Diarrhoea'),
+]
+
+_HISTORY = [
+    'Hypertension diagnosed 2015, well-controlled on lisinopril', 'Type 2 Diabetes Mellitus diagnosed 2018',
+    'Hyperlipidemia', 'Asthma since childhood', 'Chronic kidney disease stage 2', 'Penicillin allergy',
+    'Previous myocardial infarction 2012', 'Hypothyroidism on levothyroxine', 'Osteoarthritis of both knees',
+]
+
+_NARRATIVE_SENTENCES = [
+    'The patient was started on {product} for {indication}.',
+    'Approximately {days} days after starting treatment the patient developed {reaction}.',
+    'The patient was assessed by the treating physician and {product} was discontinued.',
+    'Symptoms gradually improved over the following {days} days without further intervention.',
+    'The reporter considered the event possibly related to {product}.',
+    'Relevant laboratory tests were within normal limits apart from the findings described.',
+    'No rechallenge was performed and the patient was advised to avoid the product in future.',
+]
+
+_COUNTRIES = ['US', 'GB', 'DE', 'FR', 'JP', 'CA', 'ES', 'IT']
+_SENDERS = ['Demo Pharmaceuticals Inc.', 'Acme Biologics Ltd.', 'Generic Health GmbH']
+
+
+def _date(rng):
+    return f"{rng.randint(2019, 2024)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+
+
+def _random_report(rng, i, unique_text=False):
+    country = rng.choice(_COUNTRIES)
+    products = [rng.choice(_PRODUCTS) for _ in range(rng.randint(1, 6))]
+    reactions = rng.sample(_REACTIONS, rng.randint(1, 5))
+    history = rng.sample(_HISTORY, rng.randint(0, 4))
+    sender = rng.choice(_SENDERS)
+    if unique_text:
+        tag = f' {i:09d}'
+        products = [(p + tag, g + tag, form, route, ind + tag) for p, g, form, route, ind in products]
+        reactions = [(verbatim + tag, pt) for verbatim, pt in reactions]
+        history = [text + tag for text in history]
+        sender += tag
+    flags = {k: rng.choice('12') for k in ('death', 'lifethreatening', 'hospitalization', 'disabling', 'congenitalanomali', 'other')}
+    serious = '1' if '1' in flags.values() else '2'
+
+    parts = [
+        '  <safetyreport>\n',
+        f'    <safetyreportversion>{rng.randint(1, 3)}</safetyreportversion>\n',
+        f'    <safetyreportid>{country}-SYN-{i:09d}</safetyreportid>\n',
+        f'    <primarysourcecountry>{country}</primarysourcecountry>\n',
+        '    <transmissiondateformat>102</transmissiondateformat>\n',
+        f'    <transmissiondate>{_date(rng)}</transmissiondate>\n',
+        f'    <reporttype>{rng.choice("1112")}</reporttype>\n',
+        f'    <serious>{serious}</serious>\n',
+    ]
+    parts += [f'    <seriousness{k}>{v}</seriousness{k}>\n' for k, v in flags.items()]
+    parts += [
+        f'    <receivedate>{_date(rng)}</receivedate>\n',
+        f'    <receiptdate>{_date(rng)}</receiptdate>\n',
+        f'    <primarysource>\n      <reportercountry>{country}</reportercountry>\n'
+        f'      <qualification>{rng.randint(1, 5)}</qualification>\n    </primarysource>\n',
+        f'    <sender>\n      <sendertype>1</sendertype>\n'
+        f'      <senderorganization>{sender}</senderorganization>\n    </sender>\n',
+        '    <receiver>\n      <receivertype>2</receivertype>\n'
+        '      <receiverorganization>FDA</receiverorganization>\n    </receiver>\n',
+        '    <patient>\n',
+        f'      <patientinitial>{chr(65 + i % 26)}.{chr(65 + (i // 26) % 26)}.</patientinitial>\n',
+        f'      <patientonsetage>{rng.randint(1, 95)}</patientonsetage>\n',
+        '      <patientonsetageunit>801</patientonsetageunit>\n',
+        f'      <patientsex>{rng.choice("12")}</patientsex>\n',
+        f'      <patientweight>{rng.randint(40, 120)}</patientweight>\n',
+    ]
+    for text in history:
+        parts.append(
+            f'      <medicalhistoryepisode>\n        <patientmedicalhistorytext>{text}</patientmedicalhistorytext>\n'
+            f'      </medicalhistoryepisode>\n')
+    for seq, (product, generic, form, route, indication) in enumerate(products):
+        parts.append(
+            '      <drug>\n'
+            f'        <drugcharacterization>{"1" if seq == 0 else rng.choice("223")}</drugcharacterization>\n'
+            f'        <medicinalproduct>{product}</medicinalproduct>\n'
+            f'        <activesubstancename>{generic}</activesubstancename>\n'
+            f'        <drugbatchnumb>BN{rng.randint(10000, 99999)}</drugbatchnumb>\n'
+            f'        <drugdosageform>{form}</drugdosageform>\n'
+            f'        <drugadministrationroute>{route}</drugadministrationroute>\n'
+            f'        <drugindication>{indication}</drugindication>\n'
+            '        <drugstartdateformat>102</drugstartdateformat>\n'
+            f'        <drugstartdate>{_date(rng)}</drugstartdate>\n'
+            f'        <actiondrug>{rng.randint(1, 5)}</actiondrug>\n'
+            '      </drug>\n')
+    for verbatim, pt in reactions:
+        parts.append(
+            '      <reaction>\n'
+            f'        <primarysourcereaction>{verbatim}</primarysourcereaction>\n'
+            '        <reactionmeddraversionpt>26.1</reactionmeddraversionpt>\n'
+            f'        <reactionmeddrapt>{pt}</reactionmeddrapt>\n'
+            '        <reactionstartdateformat>102</reactionstartdateformat>\n'
+            f'        <reactionstartdate>{_date(rng)}</reactionstartdate>\n'
+            f'        <reactionoutcome>{rng.randint(1, 6)}</reactionoutcome>\n'
+            '      </reaction>\n')
+    narrative = ' '.join(
+        rng.choice(_NARRATIVE_SENTENCES).format(
+            product=products[0][0], indication=products[0][4], reaction=reactions[0][1].lower(),
+            days=rng.randint(2, 60))
+        for _ in range(rng.randint(3, 12)))
+    parts += [
+        f'      <summary>\n        <narrativeincludeclinical>{narrative}</narrativeincludeclinical>\n      </summary>\n',
+        '    </patient>\n',
+        '  </safetyreport>\n',
+    ]
+    return ''.join(parts)
+
+
+def write_random_message(path, n_reports, seed=0, unique_text=False):
+    """Write an E2B(R2) message of n_reports randomised reports, modelled on the sample.
+
+    Each case has 1-6 drugs (the first suspect), 1-5 reactions, 0-4
+    medical-history episodes and a narrative of 3-12 sentences. Output is
+    deterministic for a given seed and is streamed, so 1M-report files are fine.
+    With unique_text, every free-text value (sender, product and substance
+    names, indications, verbatim terms, history) is made unique per report.
+    """
+    rng = random.Random(seed)
+    header, _ = _load_sample()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(header.rstrip() + '\n')
+        for i in range(n_reports):
+            f.write(_random_report(rng, i, unique_text))
+        f.write('</ichicsr>\n')
+    return path
+
+
+_ID_RE = re.compile(r'<safetyreportid>([^<]*)</safetyreportid>')
+_AGE_RE = re.compile(r'<patientonsetage>(\d+)</patientonsetage>')
+_REACTION_RE = re.compile(r'      <reaction>.*?</reaction>\n', re.DOTALL)
+
+
+def write_duplicated_message(path, n_reports, duplicate_share=0.05, seed=0):
+    """Write a randomised message in which duplicate_share of the reports re-send an earlier case.
+
+    A duplicate carries a new safetyreportid and sender country prefix and
+    may have its age shifted by a year or a reaction left out, as when a case reaches the sponsor
+    from both the reporter and a regulator. Returns the injected
+    (duplicate id, original id) pairs.
+    """
+    rng = random.Random(seed)
+    header, _ = _load_sample()
+    pairs = []
+    recent = []
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(header.rstrip() + '\n')
+        for i in range(n_reports):
+            if recent and rng.random() < duplicate_share:
+                original = rng.choice(recent)
+                original_id = _ID_RE.search(original).group(1)
+                report = _ID_RE.sub(f'<safetyreportid>DUP-{i:09d}</safetyreportid>', original)
+                report = _AGE_RE.sub(lambda m: f'<patientonsetage>{int(m.group(1)) + rng.choice((-1, 0, 1))}'
+                                               f'</patientonsetage>', report)
+                reactions = _REACTION_RE.findall(report)
+                if len(reactions) > 1 and rng.random() < 0.5:
+                    report = report.replace(rng.choice(reactions), '', 1)
+                pairs.append((f'DUP-{i:09d}', original_id))
+            else:
+                report = _random_report(rng, i)
+                recent.append(report)
+                if len(recent) > 1_000:
+                    recent.pop(0)
+            f.write(report)
+        f.write('</ichicsr>\n')
+    return pairs
+
+
+# ---------------------------------------------------------------------------
+# Synthetic MedDRA distribution
+# ---------------------------------------------------------------------------
+
+# Enough distinct syllables that term names have roughly the character
+# n-gram variety of real LLT names
+_SYLLABLES = ['ab', 'cal', 'der', 'em', 'fer', 'gas', 'hep', 'ist', 'lym', 'my', 'neu', 'oed', 'par',
+              'pul', 'ren', 'sal', 'ter', 'ur', 'vas', 'xan', 'bra', 'cho', 'dys', 'eso', 'fib', 'gly',
+              'hyp', 'ile', 'ker', 'lip', 'mal', 'nep', 'ost', 'pha', 'rhi', 'spl', 'tac', 'thr', 'uve',
+              'vit', 'ble', 'cor', 'dia', 'ent', 'gan', 'hae', 'kin', 'lar', 'mic', 'odo', 'pro', 'sco',
+              'tox', 'vul', 'zon', 'ite', 'oma', 'ary', 'cyt', 'rrh']
+
+
+def _term_name(rng, words):
+    return ' '.join(''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(words)).capitalize()
+
+
+def write_synthetic_meddra(path, n_pt=25_000, llts_per_pt=3.4, seed=0, version='26.1'):
+    """Write a MedDRA ASCII distribution (llt.asc, mdhier.asc, meddra_release.asc) of made-up terms.
+
+    Sized like a real release by default: 27 SOCs, 337 HLGTs, 1,737 HLTs,
+    n_pt PTs (30% multi-axial) and about llts_per_pt LLTs per PT, 10% of
+    them non-current. The PTs of the randomised reports are included, so
+    write_random_message() reactions code against it. MedDRA itself is
+    licensed and is not redistributed here.
+    """
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+    socs = [(10_000_000 + i, _term_name(rng, 3)) for i in range(27)]
+    hlgts = [(10_100_000 + i, _term_name(rng, 3), rng.choice(socs)) for i in range(337)]
+    hlts = [(10_200_000 + i, _term_name(rng, 3), rng.choice(hlgts)) for i in range(1_737)]
+    known = sorted({pt for _, pt in _REACTIONS})
+    pt_names = known + [_term_name(rng, rng.randint(1, 3)) for _ in range(n_pt - len(known))]
+
+    with open(os.path.join(path, 'meddra_release.asc'), 'w', encoding='latin-1') as f:
+        f.write(f'{version}$English$$$$\n')
+    with open(os.path.join(path, 'mdhier.asc'), 'w', encoding='latin-1') as hier, \
+            open(os.path.join(path, 'llt.asc'), 'w', encoding='latin-1') as llt:
+        next_llt = 10_500_000
+        for i, name in enumerate(pt_names):
+            pt = 10_300_000 + i
+            paths = rng.sample(hlts, 2 if rng.random() < 0.3 else 1)
+            for j, (hlt, hlt_name, (hlgt, hlgt_name, (soc, soc_name))) in enumerate(paths):
+                hier.write(f'{pt}${hlt}${hlgt}${soc}${name}${hlt_name}${hlgt_name}${soc_name}$'
+                           f'{soc_name[:4].upper()}$${paths[0][2][2][0]}${"Y" if j == 0 else "N"}$\n')
+            # Every PT is also an LLT of the same code and name
+            llt.write(f'{pt}${name}${pt}$$$$$$$Y$$\n')
+            for _ in range(max(0, round(rng.expovariate(1 / (llts_per_pt - 1))))):
+                variant = f'{name} {_term_name(rng, 1).lower()}'
+                llt.write(f'{next_llt}${variant}${pt}$$$$$$${"N" if rng.random() < 0.1 else "Y"}$$\n')
+                next_llt += 1
+    return path
+
+
+def synthetic_verbatim_terms(meddra, n_terms, noise_share=0.05, seed=0):
+    """(verbatim text, PT code or None) pairs as reporters might write a dictionary's LLTs.
+
+    Each term starts from a random current LLT and is reported as is,
+    re-cased, punctuated, with its words reordered or with one or two
+    typos; noise_share of the terms are made-up words with no true PT.
+    """
+    rng = random.Random(seed)
+    llts = sorted(meddra.current) or sorted(meddra.llt_pt)
+    names = meddra.names['LLT']
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+
+    def typo(text):
+        i = rng.randrange(len(text))
+        kind = rng.randrange(4)
+        if kind == 0:
+            return text[:i] + text[i + 1:]
+        if kind == 1:
+            return text[:i] + rng.choice(letters) + text[i:]
+        if kind == 2:
+            return text[:i] + rng.choice(letters) + text[i + 1:]
+        return text[:i] + text[i + 1:i + 2] + text[i:i + 1] + text[i + 2:]
+
+    variants = [
+        lambda t: t,
+        lambda t: t.upper(),
+        lambda t: f'{t.lower()}.',
+        lambda t: ', '.join(reversed(t.split())),
+        lambda t: typo(t),
+        lambda t: typo(typo(t)).lower(),
+    ]
+    terms = []
+    for _ in range(n_terms):
+        if rng.random() < noise_share:
+            terms.append((_term_name(rng, rng.randint(1, 3)), None))
+            continue
+        llt = rng.choice(llts)
+        terms.append((rng.choice(variants)(names[llt]), meddra.llt_pt[llt]))
+    return terms
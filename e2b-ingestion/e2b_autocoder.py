@@ -0,0 +1,214 @@
+"""
+Verbatim-to-MedDRA autocoding of E2B(R2) reactions.
+primarysourcereaction holds the reporter's own wording ("Dizzy spells",
+"headache severe", "nausia"), which fragments PT-level counts when used as
+a term. MedDRAAutocoder codes verbatim text to LLTs of a MedDRADictionary:
+exact and normalized matches through hash indexes, everything else through
+a character n-gram inverted index scoring a bounded number of candidates.
+Each result carries a confidence so low-confidence terms can be routed to
+manual coding (V_E2B_MANUAL_CODING).
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from e2b_meddra import UNCODED, MedDRADictionary, code_columns, code_records, normalize_term
+from e2b_stage import qualified_name
+
+
+# Character n-gram length of the fuzzy index
+NGRAM = 3
+
+# Postings read per fuzzy lookup, rarest n-grams first; bounds the cost of
+# terms made of common n-grams
+MAX_POSTINGS = 1_000
+# Candidates scored exactly per fuzzy lookup, those sharing the most n-grams first
+MAX_CANDIDATES = 10
+# Distinct verbatim texts memoized per autocoder; the least recently used are evicted
+MEMO_SIZE = 1 << 16
+
+# Confidence per match type; fuzzy matches score their n-gram Dice similarity
+EXACT, NORMALIZED, TOKENS, FUZZY = 'exact', 'normalized', 'tokens', 'fuzzy'
+MATCH_CONFIDENCE = {EXACT: 1.0, NORMALIZED: 0.97, TOKENS: 0.93}
+
+# Fuzzy matches below this are left uncoded
+MIN_CONFIDENCE = 0.6
+# Coded terms below this are flagged for manual coding, here and in V_E2B_MANUAL_CODING,
+# whose DDL in sql/01_setup_tables.sql is generated by manual_coding_view_sql()
+REVIEW_CONFIDENCE = 0.85
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_verbatim(text: str) -> str:
+    """Lower case, accents stripped, punctuation as spaces: 'Rash (Pruritic)!' -> 'rash pruritic'"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+
+def _token_key(normalized: str) -> str:
+    return ' '.join(sorted(normalized.split()))
+
+
+def _ngrams(normalized: str, n: int = NGRAM) -> set:
+    padded = f" {normalized} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+@dataclass(slots=True)
+class CodingResult:
+    """The LLT a verbatim term was coded to, how, and with what confidence"""
+    llt: int
+    pt: int
+    match: str
+    confidence: float
+
+    @property
+    def needs_review(self) -> bool:
+        return self.confidence < REVIEW_CONFIDENCE
+
+
+def manual_coding_view_sql(target_schema: Optional[str] = None) -> str:
+    """CREATE VIEW V_E2B_MANUAL_CODING: verbatim terms left uncoded or below REVIEW_CONFIDENCE.
+
+    sql/01_setup_tables.sql holds this DDL; regenerate it after changing
+    REVIEW_CONFIDENCE rather than editing the threshold in SQL.
+    """
+    return (
+        f"CREATE OR REPLACE VIEW {qualified_name(target_schema, 'V_E2B_MANUAL_CODING')} AS\n"
+        "SELECT\n"
+        "    r.VERBATIM_TERM,\n"
+        "    MAX(r.MEDDRA_CODED_PT) AS SUGGESTED_PT,\n"
+        "    MAX(r.CODING_CONFIDENCE) AS CODING_CONFIDENCE,\n"
+        "    COUNT(*) AS REACTIONS,\n"
+        "    COUNT(DISTINCT r.CASE_ID) AS CASES\n"
+        f"FROM {qualified_name(target_schema, 'E2B_ICSR_REACTIONS')} r\n"
+        "WHERE r.VERBATIM_TERM IS NOT NULL\n"
+        f"  AND (r.MEDDRA_CODED_PT IS NULL OR r.CODING_CONFIDENCE < {REVIEW_CONFIDENCE})\n"
+        "GROUP BY r.VERBATIM_TERM\n"
+        "ORDER BY REACTIONS DESC"
+    )
+
+
+class MedDRAAutocoder:
+    """Codes verbatim reaction text to current LLTs of a MedDRADictionary.
+
+    Lookups try, in order: the dictionary's case-insensitive name index
+    (exact), the name with accents and punctuation removed (normalized),
+    the same words in any order (tokens), then the n-gram index (fuzzy).
+    The fuzzy step reads the postings of the query's rarest n-grams, up to
+    max_postings, counts shared n-grams per LLT and scores only the
+    max_candidates best by Dice similarity, so its cost is bounded however
+    common the query's n-grams are. Results are memoized for the memo_size
+    most recently coded distinct texts, since verbatim terms repeat heavily
+    across a batch.
+
+    Also usable as E2BR2Parser(meddra=...): reactions keep their reported
+    LLT or PT coding, and the rest are coded from VERBATIM_TERM.
+    """
+
+    def __init__(self, meddra: MedDRADictionary, max_postings: int = MAX_POSTINGS,
+                 max_candidates: int = MAX_CANDIDATES, min_confidence: float = MIN_CONFIDENCE,
+                 memo_size: int = MEMO_SIZE):
+        self.meddra = meddra
+        self.max_postings = max_postings
+        self.max_candidates = max_candidates
+        self.min_confidence = min_confidence
+
+        # Only current LLTs are coded to; a distribution without currency flags uses them all
+        llts = [llt for llt in meddra.llt_pt if llt in meddra.current] or list(meddra.llt_pt)
+        names = meddra.names['LLT']
+        self.normalized: Dict[str, int] = {}
+        self.tokens: Dict[str, int] = {}
+        for llt in llts:
+            key = normalize_verbatim(names[llt])
+            self.normalized.setdefault(key, llt)
+            self.tokens.setdefault(_token_key(key), llt)
+
+        # Fuzzy index over distinct normalized names: term id -> (key, LLT), n-gram -> term ids.
+        # Postings are tuples sharing one int per term id, which Counter counts
+        # faster than arrays that box every element
+        self.keys: List[str] = list(self.normalized)
+        self.key_llts: List[int] = [self.normalized[key] for key in self.keys]
+        postings: Dict[str, List[int]] = {}
+        for term_id, key in enumerate(self.keys):
+            for gram in _ngrams(key):
+                postings.setdefault(gram, []).append(term_id)
+        self.postings: Dict[str, Tuple[int, ...]] = {gram: tuple(ids) for gram, ids in postings.items()}
+        self._code = lru_cache(maxsize=memo_size)(self._lookup)
+
+    def _result(self, llt: int, match: str, confidence: float) -> CodingResult:
+        return CodingResult(llt, self.meddra.llt_pt[llt], match, confidence)
+
+    def _fuzzy(self, key: str) -> Optional[CodingResult]:
+        grams = _ngrams(key)
+        lists = sorted((self.postings[g] for g in grams if g in self.postings), key=len)
+        counts: Counter = Counter()
+        read = 0
+        for ids in lists:
+            if read >= self.max_postings and counts:
+                break
+            counts.update(ids)
+            read += len(ids)
+
+        # Sorting the keys in C is several times faster than most_common()'s heap here
+        best_id, best = None, 0.0
+        for term_id in sorted(counts, key=counts.__getitem__, reverse=True)[:self.max_candidates]:
+            term_grams = _ngrams(self.keys[term_id])
+            score = 2 * len(grams & term_grams) / (len(grams) + len(term_grams))
+            if score > best:
+                best_id, best = term_id, score
+        if best_id is None or best < self.min_confidence:
+            return None
+        return self._result(self.key_llts[best_id], FUZZY, round(best, 3))
+
+    def code(self, verbatim: Optional[str]) -> Optional[CodingResult]:
+        """The best LLT for a verbatim term, or None when nothing scores min_confidence"""
+        if not verbatim:
+            return None
+        return self._code(verbatim)
+
+    def _lookup(self, verbatim: str) -> Optional[CodingResult]:
+        result = None
+        llt = self.meddra.by_name.get(normalize_term(verbatim))
+        if llt is not None:
+            result = self._result(llt, EXACT, MATCH_CONFIDENCE[EXACT])
+        else:
+            key = normalize_verbatim(verbatim)
+            if key in self.normalized:
+                result = self._result(self.normalized[key], NORMALIZED, MATCH_CONFIDENCE[NORMALIZED])
+            elif _token_key(key) in self.tokens:
+                result = self._result(self.tokens[_token_key(key)], TOKENS, MATCH_CONFIDENCE[TOKENS])
+            elif key:
+                result = self._fuzzy(key)
+        return result
+
+    def code_terms(self, terms: Iterable[Optional[str]]) -> List[Optional[CodingResult]]:
+        """Batch code(); each distinct term is looked up once"""
+        return list(map(self.code, terms))
+
+    # -----------------------------------------------------------------------
+    # E2BR2Parser(meddra=...) interface, mirroring MedDRADictionary
+    # -----------------------------------------------------------------------
+
+    def code_reaction(self, llt: Optional[str], pt: Optional[str],
+                      verbatim: Optional[str] = None) -> Tuple[Optional[int], Optional[str], Optional[str], Optional[float]]:
+        """CODED_COLUMNS of a reaction: its reported coding, else its verbatim text autocoded"""
+        coded = self.meddra.code_reaction(llt, pt)
+        if coded is not UNCODED:
+            return coded
+        result = self.code(verbatim)
+        if result is None:
+            return UNCODED
+        return result.pt, self.meddra.primary_soc(result.pt), result.match, result.confidence
+
+    def code_columns(self, reactions: Dict[str, Any]) -> Dict[str, Any]:
+        return code_columns(self.code_reaction, reactions)
+
+    def code_records(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return code_records(self.code_reaction, rows)
@@ -0,0 +1,280 @@
+"""
+Duplicate ICSR detection at ingestion time.
+The same adverse event often arrives from several senders (MAH, regulator,
+literature) under different safetyreportids. Each new case is reduced to a
+CaseProfile, filed under a few blocking keys (sex, age band, suspect
+substance, reaction PT, onset month), and scored only against earlier
+cases sharing a key, so the cost grows with block size rather than n^2.
+Pairs scoring at or above the threshold go to the E2B_DUPLICATE_CANDIDATES
+review table.
+"""
+
+import json
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+
+from e2b_parser import E2BR2Parser, XMLSource
+from e2b_stage import child_case_rows, qualified_name
+
+
+REVIEW_TABLE = 'E2B_DUPLICATE_CANDIDATES'
+REVIEW_COLUMNS = ('CASE_ID', 'MATCHED_CASE_ID', 'SCORE', 'BLOCK_KEY', 'FIELD_SCORES', 'DETECTED_AT')
+
+# Drug characterizations whose substances identify the case
+SUSPECT_CHARACTERIZATIONS = frozenset(('Suspect', 'Interacting'))
+
+# Relative weight of each field in the pair score
+FIELD_WEIGHTS = {
+    'sex': 1.0,
+    'age': 1.5,
+    'substances': 2.0,
+    'reactions': 3.0,
+    'onset': 2.0,
+    'country': 0.5,
+}
+# Differences at which age and onset similarity fall to zero
+AGE_TOLERANCE_YEARS = 5.0
+ONSET_TOLERANCE_DAYS = 30
+
+# A pair is only scored when fields carrying at least this share of the
+# total weight are present on both sides
+MIN_WEIGHT_SHARE = 0.5
+
+DEFAULT_THRESHOLD = 0.8
+# Earlier cases looked at per block key; larger blocks use their newest members
+DEFAULT_MAX_BLOCK = 200
+# Earlier cases scored per new case, those sharing the most block keys first
+DEFAULT_MAX_CANDIDATES = 50
+
+
+@dataclass(slots=True, eq=False)
+class CaseProfile:
+    """The fields of one case used for blocking and scoring; hashed by identity"""
+    case_id: str
+    sex: Optional[str] = None
+    age: Optional[float] = None
+    substances: FrozenSet[str] = frozenset()
+    reactions: FrozenSet[str] = frozenset()
+    onset: Optional[date] = None
+    country: Optional[str] = None
+
+
+@dataclass(slots=True)
+class DuplicateCandidate:
+    case_id: str
+    matched_case_id: str
+    score: float
+    block_key: str
+    field_scores: Dict[str, float] = field(default_factory=dict)
+
+
+def _term(value: Optional[str]) -> Optional[str]:
+    return ' '.join(value.lower().split()) if value else None
+
+
+def profiles_from_batch(batch: Dict[str, Dict[str, Sequence]]) -> List[CaseProfile]:
+    """CaseProfiles for a normalized column batch (E2BR2Parser.iter_column_batches()).
+
+    Suspect and interacting drugs contribute their active substance (or the
+    product name when none is given); onset is the earliest reaction start.
+    """
+    cases, drugs, reactions = batch['ICSR_CASES'], batch['ICSR_DRUGS'], batch['ICSR_REACTIONS']
+    case_ids = cases['CASE_ID']
+    substances = [set() for _ in case_ids]
+    terms = [set() for _ in case_ids]
+    onsets: List[Optional[date]] = [None] * len(case_ids)
+
+    rows = child_case_rows(case_ids, drugs, 'DRUG_SEQ')
+    for j, characterization, generic, product in zip(
+            rows, drugs['DRUG_CHARACTERIZATION'], drugs['GENERIC_NAME'], drugs['MEDICINAL_PRODUCT']):
+        name = _term(generic or product)
+        if characterization in SUSPECT_CHARACTERIZATIONS and name:
+            substances[j].add(name)
+
+    rows = child_case_rows(case_ids, reactions, 'REACTION_SEQ')
+    for j, term, verbatim, start in zip(rows, reactions['MEDDRA_PT'], reactions['VERBATIM_TERM'],
+                                        reactions['START_DATE']):
+        term = _term(term or verbatim)
+        if term:
+            terms[j].add(term)
+        if isinstance(start, date) and (onsets[j] is None or start < onsets[j]):
+            onsets[j] = start
+
+    return [
+        CaseProfile(case_id, sex, age, frozenset(subs), frozenset(pts), onset, country)
+        for case_id, sex, age, subs, pts, onset, country in zip(
+            case_ids, cases['PATIENT_SEX'], cases['PATIENT_AGE'], substances, terms, onsets,
+            cases['REPORTER_COUNTRY'])
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Blocking and scoring
+# ---------------------------------------------------------------------------
+
+def _age_band(age: Optional[float]) -> str:
+    return str(int(age // 10)) if age is not None else '?'
+
+
+def _onset_month(onset: Optional[date]) -> str:
+    return f"{onset:%Y-%m}" if onset else '?'
+
+
+def _onset_year(onset: Optional[date]) -> str:
+    return f"{onset:%Y}" if onset else '?'
+
+
+def blocking_keys(profile: CaseProfile) -> Iterator[Tuple[str, ...]]:
+    """Block keys of a profile; duplicates must share at least one.
+
+    Three passes, each tolerating a different field being missing or
+    miscoded: (sex, age band, substance, onset month), (substance, PT,
+    onset month) and (sex, age band, substance, PT, onset year), the last
+    catching onsets either side of a month boundary. A profile without a
+    suspect substance or reaction falls back to (sex, age band, onset month).
+    """
+    band, month, year = _age_band(profile.age), _onset_month(profile.onset), _onset_year(profile.onset)
+    sex = profile.sex or '?'
+    for substance in profile.substances:
+        yield ('sasm', sex, band, substance, month)
+        for term in profile.reactions:
+            yield ('spm', substance, term, month)
+            yield ('saspy', sex, band, substance, term, year)
+    if not profile.substances or not profile.reactions:
+        yield ('sam', sex, band, month)
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b)
+
+
+def score_pair(a: CaseProfile, b: CaseProfile,
+               weights: Dict[str, float] = FIELD_WEIGHTS) -> Tuple[float, Dict[str, float]]:
+    """Weighted similarity in [0, 1] over the fields present on both sides, and per-field scores.
+
+    Returns (0.0, {}) when too little is known to compare the two cases.
+    """
+    scores = {}
+    if a.sex and b.sex:
+        scores['sex'] = float(a.sex == b.sex)
+    if a.age is not None and b.age is not None:
+        scores['age'] = max(0.0, 1 - abs(a.age - b.age) / AGE_TOLERANCE_YEARS)
+    if a.substances and b.substances:
+        scores['substances'] = _jaccard(a.substances, b.substances)
+    if a.reactions and b.reactions:
+        scores['reactions'] = _jaccard(a.reactions, b.reactions)
+    if a.onset and b.onset:
+        scores['onset'] = max(0.0, 1 - abs((a.onset - b.onset).days) / ONSET_TOLERANCE_DAYS)
+    if a.country and b.country:
+        scores['country'] = float(a.country == b.country)
+
+    present = total = 0.0
+    for name, s in scores.items():
+        weight = weights[name]
+        present += weight
+        total += weight * s
+    if present < MIN_WEIGHT_SHARE * sum(weights.values()):
+        return 0.0, {}
+    return total / present, scores
+
+
+class DuplicateDetector:
+    """Incremental blocking index of ingested cases.
+
+    add() counts the block keys a new case shares with the newest
+    max_block cases of each of its blocks, scores the max_candidates
+    sharing the most, then files the case under its blocks. Both bounds
+    hold however skewed the data, so the cost per case is constant and a
+    run is linear in the number of cases. Versions of one CASE_ID are
+    never paired with each other.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_block: int = DEFAULT_MAX_BLOCK,
+                 max_candidates: int = DEFAULT_MAX_CANDIDATES, weights: Dict[str, float] = FIELD_WEIGHTS):
+        self.threshold = threshold
+        self.max_block = max_block
+        self.max_candidates = max_candidates
+        self.weights = weights
+        self.blocks: Dict[Tuple[str, ...], List[CaseProfile]] = defaultdict(list)
+        self.candidates: List[DuplicateCandidate] = []
+        # candidates[:saved] are already in the review table
+        self.saved = 0
+        self.cases_indexed = 0
+        self.pairs_scored = 0
+
+    def index(self, profile: CaseProfile) -> None:
+        """File a case under its blocks without scoring it, e.g. to seed with already loaded cases"""
+        for key in blocking_keys(profile):
+            self.blocks[key].append(profile)
+        self.cases_indexed += 1
+
+    def add(self, profile: CaseProfile) -> List[DuplicateCandidate]:
+        """Score a new case against its blocks, then index it; returns its suspected duplicates"""
+        keys = list(blocking_keys(profile))
+        shared: Counter = Counter()
+        for key in keys:
+            shared.update(self.blocks[key][-self.max_block:])
+
+        found = []
+        scored = set()
+        for other, _ in shared.most_common(2 * self.max_candidates):
+            if len(scored) == self.max_candidates:
+                break
+            if other.case_id == profile.case_id or other.case_id in scored:
+                continue
+            scored.add(other.case_id)
+            self.pairs_scored += 1
+            score, field_scores = score_pair(profile, other, self.weights)
+            if score >= self.threshold:
+                key = next(k for k in blocking_keys(other) if k in keys)
+                found.append(DuplicateCandidate(profile.case_id, other.case_id, round(score, 3), '|'.join(key),
+                                                field_scores))
+
+        for key in keys:
+            block = self.blocks[key]
+            block.append(profile)
+            if len(block) > 2 * self.max_block:
+                # Only the newest max_block members are ever looked at again
+                del block[:-self.max_block]
+        self.cases_indexed += 1
+        found.sort(key=lambda c: c.score, reverse=True)
+        self.candidates.extend(found)
+        return found
+
+    def add_batch(self, batch: Dict[str, Dict[str, Sequence]]) -> List[DuplicateCandidate]:
+        found = []
+        for profile in profiles_from_batch(batch):
+            found.extend(self.add(profile))
+        return found
+
+    def review_rows(self) -> List[Tuple[Any, ...]]:
+        """Rows of REVIEW_COLUMNS for the candidates found since the last save()"""
+        detected_at = datetime.now().isoformat()
+        return [
+            (c.case_id, c.matched_case_id, c.score, c.block_key,
+             json.dumps({k: round(v, 3) for k, v in c.field_scores.items()}), detected_at)
+            for c in self.candidates[self.saved:]
+        ]
+
+    def save(self, stage, target_schema: Optional[str] = None) -> int:
+        """Append the unsaved candidates to the review table through a SnowflakeStage or LocalStage
+
+        A detector reused across loads inserts each candidate once.
+        """
+        rows = self.review_rows()
+        if not rows:
+            return 0
+        inserted = stage.insert_rows(qualified_name(target_schema, REVIEW_TABLE), REVIEW_COLUMNS, rows)
+        self.saved += len(rows)
+        return inserted
+
+
+def find_duplicates(source: XMLSource, detector: Optional[DuplicateDetector] = None,
+                    batch_size: int = 10_000, backend: Optional[str] = None) -> List[DuplicateCandidate]:
+    """Stream source through a DuplicateDetector; returns the suspected duplicates it holds"""
+    detector = detector or DuplicateDetector()
+    for batch in E2BR2Parser(backend=backend).iter_column_batches(source, batch_size):
+        detector.add_batch(batch)
+    return detector.candidates
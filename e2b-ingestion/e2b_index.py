@@ -0,0 +1,208 @@
+"""
+Byte-offset index of <safetyreport> elements in E2B(R2) XML files.
+Enables parsing a single case by safetyreportid, and splitting one large
+message into byte-range chunks for parallel parsing, without reading the
+whole document into Python strings.
+"""
+
+import os
+import re
+import json
+import mmap
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Tuple, Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+from e2b_parser import E2BR2Parser, SafetyReport, _merge_file_results
+
+
+# Sidecar index files live next to the message: <message>.xml.idx
+SIDECAR_SUFFIX = '.idx'
+SIDECAR_FORMAT_VERSION = 1
+
+_REPORT_START_RE = re.compile(rb'<safetyreport[\s>]')
+_REPORT_END = b'</safetyreport>'
+_REPORT_ID_RE = re.compile(rb'<safetyreportid>\s*([^<]*?)\s*</safetyreportid>')
+_ENCODING_RE = re.compile(rb'<\?xml[^>]*encoding=["\']([A-Za-z0-9._-]+)["\']')
+
+
+@dataclass(slots=True)
+class ReportSpan:
+    report_id: Optional[str]
+    start: int
+    end: int
+
+
+class ReportIndex:
+    """Byte ranges of each <safetyreport> in an E2B(R2) file, keyed by safetyreportid.
+
+    Scanning works on the raw bytes through mmap, so the file must use an
+    ASCII-compatible encoding (UTF-8, ISO-8859-x, ...), as E2B(R2) files do.
+    """
+
+    def __init__(self, path: str, encoding: str, spans: List[ReportSpan],
+                 source_size: int, source_mtime_ns: int):
+        self.path = path
+        self.encoding = encoding
+        self.spans = spans
+        self.source_size = source_size
+        self.source_mtime_ns = source_mtime_ns
+        self._by_id: Dict[Optional[str], List[ReportSpan]] = {}
+        for span in spans:
+            self._by_id.setdefault(span.report_id, []).append(span)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def __contains__(self, report_id: str) -> bool:
+        return report_id in self._by_id
+
+    def get(self, report_id: str) -> List[ReportSpan]:
+        """All spans for a report ID in file order (follow-ups share an ID)"""
+        return self._by_id.get(report_id, [])
+
+    @classmethod
+    def build(cls, path: str) -> 'ReportIndex':
+        """Scan path through mmap and record the byte range of each safetyreport"""
+        stat = os.stat(path)
+        spans = []
+        encoding = 'utf-8'
+
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            declaration = _ENCODING_RE.match(mm, 0, min(len(mm), 256))
+            if declaration:
+                encoding = declaration.group(1).decode('ascii').lower()
+
+            pos = 0
+            while True:
+                start_match = _REPORT_START_RE.search(mm, pos)
+                if start_match is None:
+                    break
+                start = start_match.start()
+                end = mm.find(_REPORT_END, start)
+                if end < 0:
+                    raise ValueError(f"Unterminated <safetyreport> at byte {start} in {path}")
+                end += len(_REPORT_END)
+
+                id_match = _REPORT_ID_RE.search(mm, start, end)
+                report_id = id_match.group(1).decode(encoding) if id_match and id_match.group(1) else None
+                spans.append(ReportSpan(report_id, start, end))
+                pos = end
+
+        return cls(path, encoding, spans, stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def sidecar_path(path: str) -> str:
+        return path + SIDECAR_SUFFIX
+
+    def save(self, sidecar: Optional[str] = None) -> str:
+        """Persist the index next to the source file and return its path"""
+        sidecar = sidecar or self.sidecar_path(self.path)
+        payload = {
+            'version': SIDECAR_FORMAT_VERSION,
+            'encoding': self.encoding,
+            'source_size': self.source_size,
+            'source_mtime_ns': self.source_mtime_ns,
+            'spans': [[s.report_id, s.start, s.end] for s in self.spans],
+        }
+        tmp_path = sidecar + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        os.replace(tmp_path, sidecar)
+        return sidecar
+
+    @classmethod
+    def load(cls, path: str, sidecar: Optional[str] = None) -> Optional['ReportIndex']:
+        """Load a sidecar index, or return None if it is missing or stale"""
+        sidecar = sidecar or cls.sidecar_path(path)
+        try:
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return None
+
+        if (payload.get('version') != SIDECAR_FORMAT_VERSION
+                or payload['source_size'] != stat.st_size
+                or payload['source_mtime_ns'] != stat.st_mtime_ns):
+            return None
+
+        spans = [ReportSpan(report_id, start, end) for report_id, start, end in payload['spans']]
+        return cls(path, payload['encoding'], spans, payload['source_size'], payload['source_mtime_ns'])
+
+    @classmethod
+    def load_or_build(cls, path: str, save: bool = True) -> 'ReportIndex':
+        """Load the sidecar index if it is current, otherwise rebuild (and persist) it"""
+        index = cls.load(path)
+        if index is None:
+            index = cls.build(path)
+            if save:
+                index.save()
+        return index
+
+    def chunks(self, n: int) -> List[Tuple[int, int]]:
+        """Split the reports into at most n contiguous byte ranges of similar size"""
+        if not self.spans:
+            return []
+        n = max(1, min(n, len(self.spans)))
+        first, last = self.spans[0].start, self.spans[-1].end
+        target = (last - first) / n
+
+        ranges = []
+        chunk_start = first
+        for i, span in enumerate(self.spans):
+            is_last = i == len(self.spans) - 1
+            if is_last or (span.end - first >= target * (len(ranges) + 1) and len(ranges) < n - 1):
+                ranges.append((chunk_start, span.end))
+                if not is_last:
+                    chunk_start = self.spans[i + 1].start
+        return ranges
+
+    def iter_reports(self, start: int, end: int, backend: Optional[str] = None) -> Iterator[SafetyReport]:
+        """Parse the reports within one byte range of the indexed file"""
+        return E2BR2Parser(backend=backend).iter_reports_in_range(self.path, start, end, self.encoding)
+
+
+def parse_report(path: str, report_id: str, backend: Optional[str] = None) -> Optional[SafetyReport]:
+    """Parse a single report by safetyreportid, using (and creating) the sidecar index.
+
+    When the file holds several versions of a report, the last one is returned.
+    """
+    index = ReportIndex.load_or_build(path)
+    spans = index.get(report_id)
+    if not spans:
+        return None
+    span = spans[-1]
+    return next(index.iter_reports(span.start, span.end, backend), None)
+
+
+def _parse_e2b_range(path: str, start: int, end: int, encoding: str,
+                     backend: Optional[str]) -> Tuple[Optional[Dict[str, List[Dict]]], Optional[str]]:
+    """Parse one byte range, returning (records, None) or (None, error)"""
+    try:
+        parser = E2BR2Parser(backend=backend)
+        parser.reports = list(parser.iter_reports_in_range(path, start, end, encoding))
+        return parser.to_snowflake_records(), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def parse_e2b_file_parallel(path: str, workers: Optional[int] = None,
+                            backend: Optional[str] = None) -> Tuple[Dict[str, List[Dict]], List[Dict[str, str]]]:
+    """Parse one large E2B(R2) file by splitting it into byte-range chunks across a process pool.
+
+    Returns (records, errors) in the same shape as parse_e2b_directory(),
+    with records merged in file order. Each error names its byte range.
+    """
+    workers = workers or os.cpu_count() or 1
+    index = ReportIndex.load_or_build(path)
+    ranges = index.chunks(workers)
+    labels = [f"{path}[{start}:{end}]" for start, end in ranges]
+    args = ([path] * len(ranges), [s for s, _ in ranges], [e for _, e in ranges],
+            [index.encoding] * len(ranges), [backend] * len(ranges))
+
+    if workers == 1 or len(ranges) <= 1:
+        return _merge_file_results(labels, map(_parse_e2b_range, *args))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _merge_file_results(labels, pool.map(_parse_e2b_range, *args))
@@ -5,103 +5,639 @@ Loads E2B XML files from stage into normalized Snowflake tables.
 
 import streamlit as st
 from snowflake.snowpark.context import get_active_session
-import xml.etree.ElementTree as ET
-from datetime import datetime
+from snowflake.snowpark.functions import col, lit
+from snowflake.snowpark.types import StructType, StructField, StringType, IntegerType, LongType, DoubleType, DateType, DecimalType, TimestampType
+import pandas as pd
+import io
+import gzip
+import time
+import itertools
+import threading
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+from datetime import date, datetime
+
+from e2b_parser import STAGES, E2BR2Parser, IngestionStats, open_e2b_documents, parse_e2b_upload, write_run_log
+from e2b_manifest import SnowflakeCheckpoints, file_digest, ingest_resumable
+from e2b_stage import STAGING_SUFFIX, TARGET_TABLES, child_versions, snowflake_upsert_sql
+from e2b_meddra import load_meddra
+from e2b_autocoder import MedDRAAutocoder
 
 st.set_page_config(page_title="E2B(R2) ICSR Ingestion", page_icon="📥", layout="wide")
 
 session = get_active_session()
 
-DRUG_CHARACTERIZATION = {"1": "Suspect", "2": "Concomitant", "3": "Interacting"}
-REACTION_OUTCOME = {"1": "Recovered/Resolved", "2": "Recovering/Resolving", "3": "Not Recovered/Not Resolved", "4": "Recovered with Sequelae", "5": "Fatal", "6": "Unknown"}
-SEX_MAP = {"1": "Male", "2": "Female"}
-REPORT_TYPE = {"1": "Spontaneous", "2": "Report from Study", "3": "Other", "4": "Not available"}
+def _schema(*columns):
+    """StructType from (name, type) pairs; columns not listed are VARCHAR"""
+    return StructType([StructField(name, col_type or StringType()) for name, col_type in columns])
 
-def get_text(elem, path):
-    found = elem.find(path)
-    return found.text if found is not None and found.text else None
+# Typed schemas for the upsert staging tables, matching the setup tab DDL (INGESTION_TIMESTAMP
+# uses its default). Child rows also carry their case's version.
+CASES_SCHEMA = _schema(
+    ("CASE_ID", None), ("SAFETY_REPORT_VERSION", None), ("TRANSMISSION_DATE", DateType()), ("REPORT_TYPE", None),
+    ("SERIOUS", None), ("SERIOUSNESS_DEATH", None), ("SERIOUSNESS_LIFE_THREATENING", None),
+    ("SERIOUSNESS_HOSPITALIZATION", None), ("SERIOUSNESS_DISABILITY", None), ("SERIOUSNESS_CONGENITAL", None),
+    ("SERIOUSNESS_OTHER", None), ("RECEIVE_DATE", DateType()), ("RECEIPT_DATE", DateType()),
+    ("SENDER_ORGANIZATION", None), ("RECEIVER_ORGANIZATION", None), ("CASE_NARRATIVE", None),
+    ("REPORTER_COUNTRY", None), ("QUALIFICATION", None), ("PATIENT_AGE", DecimalType(6, 2)), ("PATIENT_SEX", None),
+    ("PATIENT_WEIGHT", None), ("PATIENT_MEDICAL_HISTORY", None), ("PATIENT_DEATH_DATE", DateType()),
+)
+DRUGS_SCHEMA = _schema(
+    ("CASE_ID", None), ("DRUG_SEQ", IntegerType()), ("DRUG_CHARACTERIZATION", None), ("MEDICINAL_PRODUCT", None),
+    ("GENERIC_NAME", None), ("BATCH_NUMBER", None), ("AUTHORIZATION_HOLDER", None), ("DOSAGE_TEXT", None),
+    ("DOSAGE_FORM", None), ("ROUTE_OF_ADMIN", None), ("INDICATION", None), ("START_DATE", DateType()),
+    ("END_DATE", DateType()), ("ACTION_TAKEN", None), ("SAFETY_REPORT_VERSION", None),
+)
+REACTIONS_SCHEMA = _schema(
+    ("CASE_ID", None), ("REACTION_SEQ", IntegerType()), ("VERBATIM_TERM", None), ("MEDDRA_PT", None), ("MEDDRA_PT_CODE", None),
+    ("MEDDRA_LLT", None), ("START_DATE", DateType()), ("END_DATE", DateType()), ("OUTCOME", None),
+    ("MEDDRA_CODED_PT", LongType()), ("MEDDRA_SOC", None), ("CODING_MATCH", None), ("CODING_CONFIDENCE", DecimalType(4, 3)),
+    ("SAFETY_REPORT_VERSION", None),
+)
+RUNS_SCHEMA = _schema(
+    ("RUN_ID", None), ("SOURCE", None), ("STATUS", None), ("STARTED_AT", TimestampType()),
+    ("FINISHED_AT", TimestampType()), ("REPORTS", IntegerType()), ("ROW_COUNT", LongType()), ("BYTES_READ", LongType()),
+    ("DECODE_SECONDS", DoubleType()), ("PARSE_SECONDS", DoubleType()), ("BUILD_SECONDS", DoubleType()),
+    ("WRITE_SECONDS", DoubleType()), ("TOTAL_SECONDS", DoubleType()), ("ROWS_PER_SECOND", DoubleType()), ("ERROR", None),
+)
+ICSR_TABLES = tuple(table for table, _ in TARGET_TABLES.values())
+RUN_LOG_PATH = os.path.join(tempfile.gettempdir(), "e2b_ingestion_runs.jsonl")
 
-def parse_e2b_xml(xml_content):
-    """Parse E2B(R2) XML and return structured records"""
-    root = ET.fromstring(xml_content)
-    icsr_cases, icsr_drugs, icsr_reactions = [], [], []
-    
-    for sr in root.findall('.//safetyreport'):
-        case_id = get_text(sr, 'safetyreportid') or f"CASE_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        patient_elem = sr.find('.//patient')
-        patient_age = get_text(patient_elem, 'patientonsetage') if patient_elem else None
-        patient_sex = SEX_MAP.get(get_text(patient_elem, 'patientsex'), None) if patient_elem else None
-        
-        medical_history_parts = []
-        if patient_elem:
-            for mh in patient_elem.findall('.//medicalhistoryepisode'):
-                mh_text = get_text(mh, 'patientmedicalhistorytext')
-                if mh_text:
-                    medical_history_parts.append(mh_text)
-        
-        report_type_code = get_text(sr, 'reporttype')
-        
-        icsr_cases.append({
-            'CASE_ID': case_id,
-            'SAFETY_REPORT_VERSION': get_text(sr, 'safetyreportversion'),
-            'TRANSMISSION_DATE': get_text(sr, 'transmissiondate'),
-            'REPORT_TYPE': REPORT_TYPE.get(report_type_code, report_type_code),
-            'SERIOUS': get_text(sr, 'serious'),
-            'SERIOUSNESS_DEATH': get_text(sr, 'seriousnessdeath'),
-            'SERIOUSNESS_LIFE_THREATENING': get_text(sr, 'seriousnesslifethreatening'),
-            'SERIOUSNESS_HOSPITALIZATION': get_text(sr, 'seriousnesshospitalization'),
-            'SERIOUSNESS_DISABILITY': get_text(sr, 'seriousnessdisabling'),
-            'SERIOUSNESS_CONGENITAL': get_text(sr, 'seriousnesscongenitalanomali'),
-            'SERIOUSNESS_OTHER': get_text(sr, 'seriousnessother'),
-            'RECEIVE_DATE': get_text(sr, 'receivedate'),
-            'RECEIPT_DATE': get_text(sr, 'receiptdate'),
-            'SENDER_ORGANIZATION': get_text(sr, './/sender/senderorganization'),
-            'RECEIVER_ORGANIZATION': get_text(sr, './/receiver/receiverorganization'),
-            'CASE_NARRATIVE': get_text(sr, './/narrativeincludeclinical'),
-            'REPORTER_COUNTRY': get_text(sr, './/primarysource/reportercountry'),
-            'QUALIFICATION': get_text(sr, './/primarysource/qualification'),
-            'PATIENT_AGE': patient_age,
-            'PATIENT_SEX': patient_sex,
-            'PATIENT_WEIGHT': get_text(patient_elem, 'patientweight') if patient_elem else None,
-            'PATIENT_MEDICAL_HISTORY': '; '.join(medical_history_parts) if medical_history_parts else None,
-            'PATIENT_DEATH_DATE': get_text(patient_elem, 'patientdeathdate') if patient_elem else None
-        })
-        
-        if patient_elem:
-            for idx, drug_elem in enumerate(patient_elem.findall('.//drug'), 1):
-                char_code = get_text(drug_elem, 'drugcharacterization')
-                icsr_drugs.append({
-                    'CASE_ID': case_id,
-                    'DRUG_SEQ': idx,
-                    'DRUG_CHARACTERIZATION': DRUG_CHARACTERIZATION.get(char_code, char_code),
-                    'MEDICINAL_PRODUCT': get_text(drug_elem, 'medicinalproduct'),
-                    'GENERIC_NAME': get_text(drug_elem, 'activesubstancename'),
-                    'BATCH_NUMBER': get_text(drug_elem, 'drugbatchnumb'),
-                    'AUTHORIZATION_HOLDER': get_text(drug_elem, 'drugauthorizationholder'),
-                    'DOSAGE_TEXT': get_text(drug_elem, 'drugstructuredosagenumb'),
-                    'DOSAGE_FORM': get_text(drug_elem, 'drugdosageform'),
-                    'ROUTE_OF_ADMIN': get_text(drug_elem, 'drugadministrationroute'),
-                    'INDICATION': get_text(drug_elem, 'drugindication'),
-                    'START_DATE': get_text(drug_elem, 'drugstartdate'),
-                    'END_DATE': get_text(drug_elem, 'drugenddate'),
-                    'ACTION_TAKEN': get_text(drug_elem, 'actiondrug')
-                })
+def _typed_value(value, col_type):
+    """Convert a parsed record value to the Python type of its schema column"""
+    if value is None:
+        return None
+    if isinstance(col_type, DateType):
+        # Parsed records hold dates; records read back from the parse cache hold ISO strings
+        return value if isinstance(value, date) else date.fromisoformat(value)
+    if isinstance(col_type, TimestampType):
+        return datetime.fromisoformat(value)
+    if isinstance(col_type, DecimalType):
+        return Decimal(str(value))
+    return value
+
+def bulk_load(columns, schema, table):
+    """Append a column batch ({column: values}) to table with one typed DataFrame write; returns the row count"""
+    rows = list(zip(*([_typed_value(value, f.datatype) for value in columns[f.name]] for f in schema.fields)))
+    if not rows:
+        return 0
+    session.create_dataframe(rows, schema=schema).write.mode("append").save_as_table(table, column_order="name")
+    return len(rows)
+
+def session_lock():
+    """The process-wide lock every statement on the shared session runs under (see JobRegistry)"""
+    return get_job_registry().session_lock
+
+def run_sql(statement):
+    """Run one statement on the shared session under session_lock(); returns its rows"""
+    with session_lock():
+        return session.sql(statement).collect()
+
+def upsert_records(cases, drugs, reactions, job, extra_statements=()):
+    """Bulk load column batches into the job's temporary staging tables, then apply them by version in one transaction.
+
+    Runs under the job's session lock; extra_statements run inside the same
+    transaction (e.g. a checkpoint update). The staging tables are dropped
+    once the transaction ends.
+    """
+    target, suffix = job.target, job.staging_suffix
+    staging_ddl, transaction = snowflake_upsert_sql(target, suffix)
+    with job.session_lock:
+        for statement in staging_ddl:
+            session.sql(statement).collect()
+        try:
+            counts = (
+                bulk_load(cases, CASES_SCHEMA, f"{target}.E2B_ICSR_CASES{suffix}"),
+                bulk_load(drugs, DRUGS_SCHEMA, f"{target}.E2B_ICSR_DRUGS{suffix}"),
+                bulk_load(reactions, REACTIONS_SCHEMA, f"{target}.E2B_ICSR_REACTIONS{suffix}"),
+            )
             
-            for idx, reaction_elem in enumerate(patient_elem.findall('.//reaction'), 1):
-                outcome_code = get_text(reaction_elem, 'reactionoutcome')
-                icsr_reactions.append({
-                    'CASE_ID': case_id,
-                    'REACTION_SEQ': idx,
-                    'MEDDRA_PT': get_text(reaction_elem, 'primarysourcereaction') or get_text(reaction_elem, 'reactionmeddrapt'),
-                    'MEDDRA_PT_CODE': get_text(reaction_elem, 'reactionmeddraversionpt'),
-                    'MEDDRA_LLT': get_text(reaction_elem, 'reactionmeddrallt'),
-                    'START_DATE': get_text(reaction_elem, 'reactionstartdate'),
-                    'END_DATE': get_text(reaction_elem, 'reactionenddate'),
-                    'OUTCOME': REACTION_OUTCOME.get(outcome_code, outcome_code)
-                })
-    
-    return icsr_cases, icsr_drugs, icsr_reactions
+            session.sql("BEGIN").collect()
+            try:
+                for statement in transaction + list(extra_statements):
+                    session.sql(statement).collect()
+            except Exception:
+                session.sql("ROLLBACK").collect()
+                raise
+            session.sql("COMMIT").collect()
+        finally:
+            for table in ICSR_TABLES:
+                session.sql(f"DROP TABLE IF EXISTS {target}.{table}{suffix}").collect()
+    return counts
+
+# Columns older deployments created as VARCHAR(20) raw E2B strings: table -> column -> current type
+TYPED_COLUMNS = {
+    "E2B_ICSR_CASES": {"TRANSMISSION_DATE": "DATE", "RECEIVE_DATE": "DATE", "RECEIPT_DATE": "DATE",
+                       "PATIENT_DEATH_DATE": "DATE", "PATIENT_AGE": "NUMBER(6,2)"},
+    "E2B_ICSR_DRUGS": {"START_DATE": "DATE", "END_DATE": "DATE"},
+    "E2B_ICSR_REACTIONS": {"START_DATE": "DATE", "END_DATE": "DATE"},
+}
+
+def untyped_columns(target):
+    """(table, column, type) of each TYPED_COLUMNS column still VARCHAR under target (DB.SCHEMA)"""
+    database, schema = target.split(".")
+    rows = run_sql(
+        f"SELECT TABLE_NAME, COLUMN_NAME FROM {database}.INFORMATION_SCHEMA.COLUMNS "
+        f"WHERE TABLE_SCHEMA = '{schema.upper()}' AND DATA_TYPE = 'TEXT'"
+    )
+    return [(table, column, TYPED_COLUMNS[table][column])
+            for table, column in rows if column in TYPED_COLUMNS.get(table, {})]
+
+def typed_column_migration(target, table, column, col_type):
+    """Statements replacing a VARCHAR column of raw E2B strings by a converted col_type column.
+
+    Snowflake cannot ALTER VARCHAR to DATE or NUMBER. Dates convert as
+    parse_e2b_date does; PATIENT_AGE keeps its number as years, since its
+    unit was not stored. Mirrors MIGRATE_E2B_TYPED_COLUMNS() in sql/01.
+    """
+    if col_type == "DATE":
+        converted = (f"IFF(LENGTH({column}) IN (4, 6, 8, 12, 14), "
+                     f"TRY_TO_DATE(RPAD(LEFT({column}, 8), 8, '01'), 'YYYYMMDD'), NULL)")
+    else:
+        converted = f"TRY_TO_NUMBER({column}, 6, 2)"
+    table = f"{target}.{table}"
+    return [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}_TYPED {col_type}",
+        f"UPDATE {table} SET {column}_TYPED = {converted}",
+        f"ALTER TABLE {table} DROP COLUMN {column}",
+        f"ALTER TABLE {table} RENAME COLUMN {column}_TYPED TO {column}",
+    ]
+
+def checkpoints(target, file_name=None, lock=None):
+    """e2b_manifest checkpoint store in {target}.E2B_INGESTION_CHECKPOINTS, run on the shared session under lock"""
+    lock = lock or session_lock()
+    def execute(statement):
+        with lock:
+            return session.sql(statement).collect()
+    return SnowflakeCheckpoints(execute, target, file_name)
+
+def load_upload_resumable(uploaded_file, batch_size, job, meddra=None):
+    """Upsert an upload into job.target in batches of batch_size reports, resuming from its checkpoint.
+
+    e2b_manifest.ingest_resumable() advances the checkpoint (file hash,
+    reports committed) after each batch's upsert commits, so a rerun after
+    a failure skips the committed reports; a batch interrupted before its
+    checkpoint is upserted again, which the versioned upsert makes a no-op.
+    job (an IngestionJob) receives progress and is checked for cancellation
+    between batches. meddra (see get_meddra) codes the reactions; without
+    one their coding columns load as NULL. Returns the reports loaded by
+    this run.
+    """
+    stats = job.stats
+    # The parser times decode, parse and build into stats and counts the reports read and rows built
+    parser = E2BR2Parser(stats=stats, meddra=meddra)
+    
+    def load_batch(batch):
+        if job.cancel_requested.is_set():
+            raise JobCancelled(f"cancelled after {job.reports_committed:,} reports")
+        parser.reports = batch
+        cases, drugs, reactions = with_case_versions(parser.to_snowflake_columns())
+        with stats.timed("write"):
+            upsert_records(cases, drugs, reactions, job)
+        # stats.reports counts the skipped reports too, so it is the file offset of this batch's end
+        job.reports_committed = stats.reports
+    
+    store = checkpoints(job.target, uploaded_file.name, job.session_lock)
+    return ingest_resumable(uploaded_file, load_batch, store, batch_size, parser=parser)
+
+def count_reports(uploaded_file):
+    """Count <safetyreport> start tags in an upload (decompressing as needed), for progress and ETA"""
+    tag = b'<safetyreport>'
+    total = 0
+    for _, stream in open_e2b_documents(uploaded_file):
+        tail = b''
+        for chunk in iter(lambda: stream.read(1 << 20), b''):
+            data = tail + chunk
+            total += data.count(tag)
+            # Keep a partial tag at the chunk boundary, but never a whole one
+            tail = data[-(len(tag) - 1):]
+    uploaded_file.seek(0)
+    return total
+
+PARSE_CACHE_DIR = os.path.join(tempfile.gettempdir(), "e2b_parse_cache")
+PARSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+PARSE_CACHE_TABLES = ("cases", "drugs", "reactions")
+
+class ParseCache:
+    """Parse results keyed by the digest of the uploaded bytes, spilled to disk and shared by all sessions.
+
+    Each entry is a directory holding one gzip column-oriented JSON file
+    per table ({column: [values]}, as e2b_parser column batches) plus the
+    file's summary row. Reads
+    refresh an entry's mtime, and the least recently used entries are
+    evicted once the cache exceeds max_bytes.
+    """
+    
+    def __init__(self, root=PARSE_CACHE_DIR, max_bytes=PARSE_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+    
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+    
+    def summary(self, key):
+        """The cached summary row, marking the entry as recently used; None on a miss"""
+        try:
+            with open(os.path.join(self._entry(key), "summary.json")) as f:
+                summary = json.load(f)
+            os.utime(self._entry(key))
+        except OSError:
+            return None
+        return summary
+    
+    def load(self, key, table):
+        """Columns of one cached table ('cases', 'drugs' or 'reactions'); KeyError on a miss"""
+        try:
+            with gzip.open(os.path.join(self._entry(key), f"{table}.json.gz"), "rt", encoding="utf-8") as f:
+                columns = json.load(f)
+            os.utime(self._entry(key))
+        except OSError:
+            raise KeyError(key)
+        return columns
+    
+    def put(self, key, batches, summary):
+        """Cache the (cases, drugs, reactions) column batches of one file"""
+        tmp = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+        for table, batch in zip(PARSE_CACHE_TABLES, batches):
+            columns = {name: list(values) for name, values in batch.items()}
+            with gzip.open(os.path.join(tmp, f"{table}.json.gz"), "wt", encoding="utf-8", compresslevel=3) as f:
+                json.dump(columns, f, separators=(",", ":"), default=date.isoformat)
+        with open(os.path.join(tmp, "summary.json"), "w") as f:
+            json.dump(summary, f)
+        with self._lock:
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            os.replace(tmp, self._entry(key))
+            self._evict()
+    
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".tmp-") or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path))
+            entries.append((os.stat(path).st_mtime, size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+@st.cache_resource
+def get_parse_cache():
+    return ParseCache()
+
+@st.cache_resource
+def get_meddra(path):
+    """Autocoder over the MedDRA ASCII distribution (MedAscii folder) at path, loaded once per process.
+
+    Codes each reaction from its reported LLT or PT, and else its verbatim
+    text, filling MEDDRA_CODED_PT, MEDDRA_SOC, CODING_MATCH and CODING_CONFIDENCE.
+    """
+    return MedDRAAutocoder(load_meddra(path))
+
+def with_case_versions(batch):
+    """(cases, drugs, reactions) of an e2b_parser column batch, child rows carrying their case's version for the upsert"""
+    for table, seq in (("ICSR_DRUGS", "DRUG_SEQ"), ("ICSR_REACTIONS", "REACTION_SEQ")):
+        batch[table]["SAFETY_REPORT_VERSION"] = child_versions(batch["ICSR_CASES"], batch[table], seq)
+    return batch["ICSR_CASES"], batch["ICSR_DRUGS"], batch["ICSR_REACTIONS"]
+
+def parse_uploads(uploaded_files, cache, max_workers=None):
+    """Parse uploads into the cache, keyed by their digests; returns per-file summary rows in upload order.
+
+    Parsing holds the GIL, so files not already cached are parsed across a
+    process pool by e2b_parser.parse_e2b_upload, which workers can import
+    under any start method. Parse errors are captured in the summary and
+    are not cached.
+    """
+    keys = [file_digest(f) for f in uploaded_files]
+    rows = [cache.summary(key) for key in keys]
+    misses = [i for i, row in enumerate(rows) if row is None]
+    rows = [row and dict(row, File=f.name, Cached=True) for f, row in zip(uploaded_files, rows)]
+    names = [uploaded_files[i].name for i in misses]
+    data = [uploaded_files[i].getvalue() for i in misses]
+    
+    workers = min(max_workers or os.cpu_count() or 1, len(misses))
+    if workers <= 1:
+        results = list(map(parse_e2b_upload, names, data))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(parse_e2b_upload, names, data))
+    
+    for i, (columns, error, seconds) in zip(misses, results):
+        batches = columns and with_case_versions(columns)
+        summary = {
+            "File": uploaded_files[i].name,
+            "Key": keys[i],
+            "Cases": len(batches[0]["CASE_ID"]) if batches else 0,
+            "Drugs": len(batches[1]["CASE_ID"]) if batches else 0,
+            "Reactions": len(batches[2]["CASE_ID"]) if batches else 0,
+            "Errors": error,
+            "Parse ms": round(seconds * 1000, 1),
+        }
+        if batches is not None:
+            cache.put(keys[i], batches, summary)
+        rows[i] = dict(summary, Cached=False)
+    return rows
+
+class JobCancelled(Exception):
+    pass
+
+class IngestionJob:
+    """One queued load: progress counters updated by its worker thread and read by the UI.
+
+    work(job) does the loading and reports progress through the job's counters.
+    session_lock is the registry's lock over the shared session.
+    """
+    
+    def __init__(self, job_id, name, target, work, session_lock):
+        self.job_id = job_id
+        self.name = name
+        self.target = target
+        self.work = work
+        self.status = "queued"
+        self.reports_total = None
+        self.reports_committed = 0
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.cancel_requested = threading.Event()
+        self.session_lock = session_lock
+        # Reports parsed, rows loaded, bytes read and seconds per stage; its to_record() is the run's row
+        self.stats = IngestionStats(source=name)
+        self.log_error = None
+    
+    @property
+    def staging_suffix(self):
+        """Suffix of this job's temporary staging tables, so concurrent jobs never share them"""
+        return f"{STAGING_SUFFIX}_{self.stats.run_id[:12].upper()}"
+    
+    @property
+    def reports_parsed(self):
+        return self.stats.reports
+    
+    @property
+    def rows_loaded(self):
+        return sum(self.stats.rows.values())
+    
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+    
+    @property
+    def reports_per_s(self):
+        return self.reports_parsed / self.elapsed if self.elapsed else 0.0
+    
+    @property
+    def eta(self):
+        """Seconds remaining at the current rate, or None if unknown"""
+        if self.status != "running" or not self.reports_total or not self.reports_per_s:
+            return None
+        return max(self.reports_total - self.reports_parsed, 0) / self.reports_per_s
+    
+    def run(self):
+        if self.cancel_requested.is_set():
+            self.status = "cancelled"
+            return
+        self.status = "running"
+        self.started = self.stats.started = time.time()
+        try:
+            self.work(self)
+            self.status = "done"
+        except JobCancelled:
+            self.status = "cancelled"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished = time.time()
+            self.work = None
+            try:
+                record_run(self)
+            except Exception as e:
+                self.log_error = str(e)
+
+def runs_ddl(target):
+    return f"""
+CREATE TABLE IF NOT EXISTS {target}.E2B_INGESTION_RUNS (
+    RUN_ID VARCHAR(64) PRIMARY KEY,
+    SOURCE VARCHAR(500),
+    STATUS VARCHAR(20),
+    STARTED_AT TIMESTAMP_NTZ,
+    FINISHED_AT TIMESTAMP_NTZ,
+    REPORTS NUMBER,
+    ROW_COUNT NUMBER,
+    BYTES_READ NUMBER,
+    DECODE_SECONDS FLOAT,
+    PARSE_SECONDS FLOAT,
+    BUILD_SECONDS FLOAT,
+    WRITE_SECONDS FLOAT,
+    TOTAL_SECONDS FLOAT,
+    ROWS_PER_SECOND FLOAT,
+    ERROR TEXT
+);"""
+
+def record_run(job):
+    """Append a finished job to the local JSON-lines run log and to {target}.E2B_INGESTION_RUNS (created by Setup)"""
+    if job.started is None:
+        return
+    record = job.stats.to_record(job.status, job.error, job.finished)
+    write_run_log(record, RUN_LOG_PATH)
+    with job.session_lock:
+        bulk_load({name: [value] for name, value in record.items()}, RUNS_SCHEMA, f"{job.target}.E2B_INGESTION_RUNS")
+
+def stream_upload_work(name, data, batch_size, meddra=None):
+    """Job work: stream one upload through load_upload_resumable()"""
+    def work(job):
+        upload = io.BytesIO(data)
+        upload.name = name
+        job.reports_total = count_reports(upload)
+        load_upload_resumable(upload, batch_size, job, meddra)
+    return work
+
+def merge_columns(batches):
+    """Concatenate column batches that share their columns"""
+    return {name: [value for batch in batches for value in batch[name]] for name in batches[0]}
+
+def merged_load_work(cache, files, meddra=None):
+    """Job work: one bulk upsert of the cached records of several parsed files.
+
+    files is [(file name, cache key, reports)]; each is checkpointed as
+    complete, by its digest, in the same transaction. The cache holds
+    uncoded reactions, so meddra (see get_meddra) codes them at load time.
+    """
+    def work(job):
+        try:
+            # Reading the spilled gzip files is this run's decode stage; parsing happened at Parse time
+            with job.stats.timed("decode"):
+                cases, drugs, reactions = (
+                    merge_columns([cache.load(key, table) for _, key, _ in files]) for table in PARSE_CACHE_TABLES)
+        except KeyError:
+            raise RuntimeError("parse results were evicted from the cache; parse the files again") from None
+        job.reports_total = job.stats.reports = len(cases["CASE_ID"])
+        if meddra is not None:
+            with job.stats.timed("build"):
+                meddra.code_columns(reactions)
+        store = checkpoints(job.target, lock=job.session_lock)
+        completed = [store.statement(key, n, True, file_name=name) for name, key, n in files]
+        with job.stats.timed("write"):
+            loaded = upsert_records(cases, drugs, reactions, job, extra_statements=completed)
+        for table, n in zip(ICSR_TABLES, loaded):
+            job.stats.count_rows(table, n)
+        job.reports_committed = len(cases["CASE_ID"])
+    return work
+
+class JobRegistry:
+    """Process-wide queue of ingestion jobs run by a worker pool; survives reruns and browser refreshes"""
+    
+    def __init__(self, max_workers=4):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="e2b-ingest")
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Background jobs, the setup tab and the browser share one session, and DDL commits its open
+        # transaction, so every statement runs under this lock. It lives here rather than in the script
+        # so all reruns and sessions share it; reentrant, so a load can hold it across staging, its
+        # transaction and the calls in between
+        self.session_lock = threading.RLock()
+    
+    def submit(self, name, target, work):
+        with self._lock:
+            job = IngestionJob(next(self._ids), name, target, work, self.session_lock)
+            self.jobs[job.job_id] = job
+        self.pool.submit(job.run)
+        return job
+    
+    def cancel(self, job_id):
+        """Stop a job between batches; its committed batches and checkpoint are kept"""
+        self.jobs[job_id].cancel_requested.set()
+    
+    def clear_finished(self):
+        with self._lock:
+            for job_id in [j.job_id for j in self.jobs.values() if j.status in ("done", "failed", "cancelled")]:
+                del self.jobs[job_id]
+
+@st.cache_resource
+def get_job_registry():
+    return JobRegistry()
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return "–"
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes}m {secs:02d}s" if minutes else f"{secs}s"
+
+def render_jobs(registry):
+    """Progress, throughput, ETA and a cancel button per job"""
+    if not registry.jobs:
+        st.caption("No ingestion jobs queued.")
+        return
+    for job in sorted(registry.jobs.values(), key=lambda j: j.job_id, reverse=True):
+        with st.container(border=True):
+            header, cancel = st.columns([5, 1])
+            header.markdown(f"**#{job.job_id} {job.name}** → `{job.target}` · {job.status}")
+            if job.status in ("queued", "running") and not job.cancel_requested.is_set():
+                if cancel.button("Cancel", key=f"cancel_{job.job_id}"):
+                    registry.cancel(job.job_id)
+            fraction = min(job.reports_parsed / job.reports_total, 1.0) if job.reports_total else 0.0
+            st.progress(fraction, text=f"{job.reports_parsed:,} of {job.reports_total or 0:,} reports parsed, "
+                                       f"{job.reports_committed:,} committed")
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Rows loaded", f"{job.rows_loaded:,}")
+            c2.metric("Reports/s", f"{job.reports_per_s:,.0f}")
+            c3.metric("Elapsed", _format_seconds(job.elapsed))
+            c4.metric("ETA", _format_seconds(job.eta))
+            st.caption(" · ".join(f"{stage} {job.stats.seconds[stage]:.1f}s" for stage in STAGES)
+                       + f" · {job.stats.bytes_read / (1 << 20):,.1f} MB read")
+            if job.log_error:
+                st.warning(f"Run not recorded in E2B_INGESTION_RUNS: {job.log_error}")
+            if job.error:
+                st.error(f"{job.error}. Committed batches are kept; queue the file again to resume from the last checkpoint.")
+
+# Browsable tables: label -> (table, keyset columns in sort order, newest first, columns)
+BROWSE_TABLES = {
+    "Cases": ("E2B_ICSR_CASES", ("INGESTION_TIMESTAMP", "CASE_ID"), True,
+              [f.name for f in CASES_SCHEMA.fields] + ["INGESTION_TIMESTAMP"]),
+    "Drugs": ("E2B_ICSR_DRUGS", ("CASE_ID", "DRUG_SEQ"), False,
+              [f.name for f in DRUGS_SCHEMA.fields if f.name != "SAFETY_REPORT_VERSION"]),
+    "Reactions": ("E2B_ICSR_REACTIONS", ("CASE_ID", "REACTION_SEQ"), False,
+                  [f.name for f in REACTIONS_SCHEMA.fields if f.name != "SAFETY_REPORT_VERSION"]),
+    # Maintained incrementally by REFRESH_E2B_CASE_SUMMARY(); one row per case and suspect drug,
+    # whose DRUG_SEQ is 0 for cases without one
+    "Case Summary": ("E2B_CASE_SUMMARY", ("CASE_ID", "DRUG_SEQ"), False,
+                     ["CASE_ID", "DRUG_SEQ", "REPORT_TYPE", "PATIENT", "IS_SERIOUS", "SUSPECT_DRUG", "GENERIC_NAME", "INDICATION",
+                      "ADVERSE_EVENTS", "REPORTER_COUNTRY", "SENDER_ORGANIZATION", "INGESTION_TIMESTAMP"]),
+}
+# Free-text columns left out of the browser's default projection
+WIDE_COLUMNS = {"CASE_NARRATIVE", "PATIENT_MEDICAL_HISTORY"}
+
+def browse_frame(target, label, case_id="", product="", received=()):
+    """Lazy Snowpark DataFrame over one browsable table with the filters pushed down.
+    
+    case_id is a CASE_ID prefix; product matches MEDICINAL_PRODUCT or
+    GENERIC_NAME (case-insensitive, % wildcards allowed); received is a
+    (start, end) range of the case's RECEIVE_DATE. Filters on another table
+    become CASE_ID IN (subquery).
+    """
+    table, _, _, _ = BROWSE_TABLES[label]
+    df = session.table(f"{target}.{table}")
+    if case_id:
+        df = df.filter(col("CASE_ID").startswith(lit(case_id)))
+    if product:
+        pattern = f"%{product}%"
+        drugs = session.table(f"{target}.E2B_ICSR_DRUGS")
+        matches = col("MEDICINAL_PRODUCT").ilike(pattern) | col("GENERIC_NAME").ilike(pattern)
+        df = df.filter(matches) if label == "Drugs" else df.filter(col("CASE_ID").isin(drugs.filter(matches).select("CASE_ID")))
+    if len(received) == 2:
+        in_range = col("RECEIVE_DATE").between(lit(received[0]), lit(received[1]))
+        cases = session.table(f"{target}.E2B_ICSR_CASES")
+        df = df.filter(in_range) if label == "Cases" else df.filter(col("CASE_ID").isin(cases.filter(in_range).select("CASE_ID")))
+    return df
+
+def _after(keys, cursor, descending):
+    """Keyset predicate for rows sorting after cursor: (k1 > c1) OR (k1 = c1 AND k2 > c2), or < when descending"""
+    condition = None
+    for i, key in enumerate(keys):
+        term = col(key) < lit(cursor[i]) if descending else col(key) > lit(cursor[i])
+        for prior, value in zip(keys[:i], cursor):
+            term = term & (col(prior) == lit(value))
+        condition = term if condition is None else condition | term
+    return condition
+
+def _cursor_value(value):
+    if hasattr(value, "to_pydatetime"):
+        return value.to_pydatetime()
+    return value.item() if hasattr(value, "item") else value
+
+def fetch_page(df, label, columns, cursor=None, page_size=100):
+    """One page of df in keyset order after cursor, fetched as Arrow batches.
+    
+    Returns (page, next cursor); the next cursor is None on the last page.
+    Only the projected columns are transferred, and the query reads at most
+    page_size + 1 rows however deep the page is. Keys must be non-null and
+    unique together, so each page resumes exactly after the last row shown.
+    """
+    _, keys, descending, _ = BROWSE_TABLES[label]
+    if cursor is not None:
+        df = df.filter(_after(keys, cursor, descending))
+    order = [col(k).desc() if descending else col(k).asc() for k in keys]
+    projected = list(keys) + [c for c in columns if c not in keys]
+    batches = list(df.sort(*order).select(*projected).limit(page_size + 1).to_pandas_batches())
+    page = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame(columns=projected)
+    if len(page) <= page_size:
+        return page, None
+    page = page.iloc[:page_size]
+    return page, tuple(_cursor_value(page[k].iloc[-1]) for k in keys)
+
 
 st.title("📥 E2B(R2) ICSR XML Ingestion")
 st.caption("ICH E2B(R2) compliant Individual Case Safety Report XML parser and loader")
@@ -122,83 +658,105 @@ with tab1:
         st.markdown("- Drug information")
         st.markdown("- Reactions (MedDRA)")
     
-    uploaded_file = st.file_uploader("Upload E2B(R2) XML file", type=['xml'])
+    uploaded_files = st.file_uploader("Upload E2B(R2) XML files", type=['xml', 'gz', 'zip'], accept_multiple_files=True)
+    target = f"{target_db}.{target_schema}"
     
-    if uploaded_file:
-        xml_content = uploaded_file.read().decode('utf-8')
-        st.success(f"Loaded: {uploaded_file.name} ({len(xml_content):,} bytes)")
+    if uploaded_files:
+        st.success(f"Loaded: {len(uploaded_files)} file(s), {sum(f.size for f in uploaded_files):,} bytes")
         
         with st.expander("Preview XML"):
-            st.code(xml_content[:2000] + "..." if len(xml_content) > 2000 else xml_content, language="xml")
+            preview_file = st.selectbox("File", uploaded_files, format_func=lambda f: f.name)
+            preview_file.seek(0)
+            for doc_name, stream in open_e2b_documents(preview_file):
+                preview = stream.read(2001).decode('utf-8', errors='replace')
+                st.caption(doc_name)
+                st.code(preview[:2000] + "..." if len(preview) > 2000 else preview, language="xml")
+                break
         
         if st.button("🔍 Parse E2B XML", type="primary"):
-            with st.spinner("Parsing E2B(R2) XML..."):
+            with st.spinner(f"Parsing {len(uploaded_files)} file(s)..."):
+                st.session_state['parse_summary'] = parse_uploads(uploaded_files, get_parse_cache())
+        
+        summaries = st.session_state.get('parse_summary')
+        if summaries:
+            parsed = [row for row in summaries if not row["Errors"]]
+            failed = len(summaries) - len(parsed)
+            st.success(f"Parsed: {sum(r['Cases'] for r in parsed)} cases, {sum(r['Drugs'] for r in parsed)} drugs, "
+                       f"{sum(r['Reactions'] for r in parsed)} reactions from {len(parsed)} file(s) "
+                       f"({sum(1 for r in parsed if r['Cached'])} from cache)")
+            if failed:
+                st.warning(f"{failed} file(s) failed to parse and are excluded from the merged load")
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("ICSR Cases", sum(r['Cases'] for r in parsed))
+            with col2:
+                st.metric("Drug Records", sum(r['Drugs'] for r in parsed))
+            with col3:
+                st.metric("Reaction Records", sum(r['Reactions'] for r in parsed))
+            
+            st.markdown("**Per-file Summary:**")
+            st.dataframe([{k: v for k, v in row.items() if k != "Key"} for row in summaries],
+                         use_container_width=True, hide_index=True)
+            
+            sample = next((r for r in parsed if r['Cases']), None)
+            if sample:
+                st.markdown("**Sample Case:**")
                 try:
-                    cases, drugs, reactions = parse_e2b_xml(xml_content)
-                    
-                    st.session_state['parsed_cases'] = cases
-                    st.session_state['parsed_drugs'] = drugs
-                    st.session_state['parsed_reactions'] = reactions
-                    
-                    st.success(f"Parsed: {len(cases)} cases, {len(drugs)} drugs, {len(reactions)} reactions")
-                    
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("ICSR Cases", len(cases))
-                    with col2:
-                        st.metric("Drug Records", len(drugs))
-                    with col3:
-                        st.metric("Reaction Records", len(reactions))
-                    
-                    if cases:
-                        st.markdown("**Sample Case:**")
-                        st.json(cases[0])
-                except Exception as e:
-                    st.error(f"Parse error: {str(e)}")
-    
-    if 'parsed_cases' in st.session_state and st.session_state['parsed_cases']:
+                    cases = get_parse_cache().load(sample["Key"], "cases")
+                    st.json({name: values[0] for name, values in cases.items()})
+                except KeyError:
+                    st.caption("Parse results were evicted from the cache; parse again to preview.")
+    
+    if uploaded_files:
         st.divider()
         st.markdown("### Load to Snowflake")
         
-        if st.button("📥 Insert into Snowflake Tables", type="primary", key="btn_insert"):
-            with st.spinner("Inserting records..."):
-                try:
-                    cases = st.session_state['parsed_cases']
-                    drugs = st.session_state['parsed_drugs']
-                    reactions = st.session_state['parsed_reactions']
-                    
-                    case_count = 0
-                    for case in cases:
-                        cols = ', '.join(case.keys())
-                        vals = ', '.join([f"'{str(v).replace(chr(39), chr(39)+chr(39))}'" if v else 'NULL' for v in case.values()])
-                        sql = f"INSERT INTO {target_db}.{target_schema}.E2B_ICSR_CASES ({cols}) VALUES ({vals})"
-                        session.sql(sql).collect()
-                        case_count += 1
-                    
-                    drug_count = 0
-                    for drug in drugs:
-                        cols = ', '.join(drug.keys())
-                        vals = ', '.join([f"'{str(v).replace(chr(39), chr(39)+chr(39))}'" if v else 'NULL' for v in drug.values()])
-                        sql = f"INSERT INTO {target_db}.{target_schema}.E2B_ICSR_DRUGS ({cols}) VALUES ({vals})"
-                        session.sql(sql).collect()
-                        drug_count += 1
-                    
-                    reaction_count = 0
-                    for reaction in reactions:
-                        cols = ', '.join(reaction.keys())
-                        vals = ', '.join([f"'{str(v).replace(chr(39), chr(39)+chr(39))}'" if v else 'NULL' for v in reaction.values()])
-                        sql = f"INSERT INTO {target_db}.{target_schema}.E2B_ICSR_REACTIONS ({cols}) VALUES ({vals})"
-                        session.sql(sql).collect()
-                        reaction_count += 1
-                    
-                    st.success(f"Inserted: {case_count} cases, {drug_count} drugs, {reaction_count} reactions")
-                    
-                    st.session_state.pop('parsed_cases', None)
-                    st.session_state.pop('parsed_drugs', None)
-                    st.session_state.pop('parsed_reactions', None)
-                    
-                except Exception as e:
-                    st.error(f"Insert error: {str(e)}")
+        batch_size = st.number_input("Commit every N cases", min_value=100, max_value=100_000, value=1_000, step=100)
+        meddra_path = st.text_input("MedDRA MedAscii folder", key="meddra_path",
+                                    help="Licensed MedDRA ASCII distribution (llt.asc, mdhier.asc) used to code "
+                                         "reactions and roll them up by SOC. Leave empty to load them uncoded.").strip()
+        meddra = None
+        if meddra_path:
+            try:
+                meddra = get_meddra(meddra_path)
+                st.caption(f"Coding reactions with MedDRA {meddra.meddra.version or '(unknown version)'}")
+            except OSError as e:
+                st.error(f"Could not read MedDRA from {meddra_path}: {e}")
+        else:
+            st.caption("No MedDRA distribution set: reactions load without MEDDRA_CODED_PT or MEDDRA_SOC.")
+        st.caption("Loads run as background jobs, so the page stays responsive and survives a refresh. "
+                   "Each committed batch advances a checkpoint: a failed or cancelled job resumes where it "
+                   "stopped when the same file is queued again. Checkpoints and run statistics go to tables "
+                   "created in the Database Setup tab.")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("📥 Queue each file (streamed, checkpointed)", type="primary", key="btn_insert"):
+                registry = get_job_registry()
+                for f in uploaded_files:
+                    registry.submit(f.name, target, stream_upload_work(f.name, f.getvalue(), int(batch_size), meddra))
+                st.success(f"Queued {len(uploaded_files)} job(s)")
+        with col2:
+            parsed = [row for row in st.session_state.get('parse_summary') or () if not row["Errors"]]
+            if parsed and st.button("📦 Load all parsed files in one bulk load", key="btn_merged"):
+                files = [(row["File"], row["Key"], row["Cases"]) for row in parsed]
+                job = get_job_registry().submit(
+                    f"{len(files)} merged file(s)", target, merged_load_work(get_parse_cache(), files, meddra))
+                st.session_state.pop('parse_summary', None)
+                st.success(f"Queued job #{job.job_id}: one bulk load of {len(files)} file(s)")
+    
+    st.divider()
+    st.markdown("### Ingestion Jobs")
+    if st.button("🧹 Clear finished jobs", key="btn_clear_jobs"):
+        get_job_registry().clear_finished()
+    
+    # Re-render just the job panel every 2s where st.fragment is available
+    @(st.fragment(run_every=2) if hasattr(st, "fragment") else (lambda fn: fn))
+    def job_panel():
+        render_jobs(get_job_registry())
+    
+    job_panel()
 
 with tab2:
     st.markdown("### Create E2B ICSR Tables")
@@ -211,7 +769,7 @@ with tab2:
 CREATE TABLE IF NOT EXISTS {db_name}.{schema_name}.E2B_ICSR_CASES (
     CASE_ID VARCHAR(100) PRIMARY KEY,
     SAFETY_REPORT_VERSION VARCHAR(10),
-    TRANSMISSION_DATE VARCHAR(20),
+    TRANSMISSION_DATE DATE,
     REPORT_TYPE VARCHAR(50),
     SERIOUS VARCHAR(5),
     SERIOUSNESS_DEATH VARCHAR(5),
@@ -220,18 +778,18 @@ CREATE TABLE IF NOT EXISTS {db_name}.{schema_name}.E2B_ICSR_CASES (
     SERIOUSNESS_DISABILITY VARCHAR(5),
     SERIOUSNESS_CONGENITAL VARCHAR(5),
     SERIOUSNESS_OTHER VARCHAR(5),
-    RECEIVE_DATE VARCHAR(20),
-    RECEIPT_DATE VARCHAR(20),
+    RECEIVE_DATE DATE,
+    RECEIPT_DATE DATE,
     SENDER_ORGANIZATION VARCHAR(200),
     RECEIVER_ORGANIZATION VARCHAR(200),
     CASE_NARRATIVE TEXT,
     REPORTER_COUNTRY VARCHAR(10),
     QUALIFICATION VARCHAR(50),
-    PATIENT_AGE VARCHAR(20),
+    PATIENT_AGE NUMBER(6,2),
     PATIENT_SEX VARCHAR(20),
     PATIENT_WEIGHT VARCHAR(20),
     PATIENT_MEDICAL_HISTORY TEXT,
-    PATIENT_DEATH_DATE VARCHAR(20),
+    PATIENT_DEATH_DATE DATE,
     INGESTION_TIMESTAMP TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
 );"""
 
@@ -248,8 +806,8 @@ CREATE TABLE IF NOT EXISTS {db_name}.{schema_name}.E2B_ICSR_DRUGS (
     DOSAGE_FORM VARCHAR(100),
     ROUTE_OF_ADMIN VARCHAR(100),
     INDICATION VARCHAR(500),
-    START_DATE VARCHAR(20),
-    END_DATE VARCHAR(20),
+    START_DATE DATE,
+    END_DATE DATE,
     ACTION_TAKEN VARCHAR(100),
     PRIMARY KEY (CASE_ID, DRUG_SEQ),
     FOREIGN KEY (CASE_ID) REFERENCES {db_name}.{schema_name}.E2B_ICSR_CASES(CASE_ID)
@@ -259,33 +817,68 @@ CREATE TABLE IF NOT EXISTS {db_name}.{schema_name}.E2B_ICSR_DRUGS (
 CREATE TABLE IF NOT EXISTS {db_name}.{schema_name}.E2B_ICSR_REACTIONS (
     CASE_ID VARCHAR(100),
     REACTION_SEQ INT,
+    VERBATIM_TERM VARCHAR(500),
     MEDDRA_PT VARCHAR(500),
     MEDDRA_PT_CODE VARCHAR(20),
     MEDDRA_LLT VARCHAR(500),
-    START_DATE VARCHAR(20),
-    END_DATE VARCHAR(20),
+    START_DATE DATE,
+    END_DATE DATE,
     OUTCOME VARCHAR(100),
+    MEDDRA_CODED_PT NUMBER(8),
+    MEDDRA_SOC VARCHAR(500),
+    CODING_MATCH VARCHAR(20),
+    CODING_CONFIDENCE NUMBER(4,3),
     PRIMARY KEY (CASE_ID, REACTION_SEQ),
     FOREIGN KEY (CASE_ID) REFERENCES {db_name}.{schema_name}.E2B_ICSR_CASES(CASE_ID)
 );"""
+    # Tables created before MedDRA coding and verbatim autocoding; mirrors sql/01_setup_tables.sql
+    ddl_reactions_columns = [
+        f"ALTER TABLE {db_name}.{schema_name}.E2B_ICSR_REACTIONS ADD COLUMN IF NOT EXISTS {column}"
+        for column in ("MEDDRA_CODED_PT NUMBER(8)", "MEDDRA_SOC VARCHAR(500)", "VERBATIM_TERM VARCHAR(500)",
+                       "CODING_MATCH VARCHAR(20)", "CODING_CONFIDENCE NUMBER(4,3)")
+    ]
+    
+    ddl_checkpoints = checkpoints(f"{db_name}.{schema_name}").ddl()
+    ddl_runs = runs_ddl(f"{db_name}.{schema_name}")
     
     with st.expander("View DDL Statements"):
         st.code(ddl_cases, language="sql")
         st.code(ddl_drugs, language="sql")
         st.code(ddl_reactions, language="sql")
+        st.code(";\n".join(ddl_reactions_columns), language="sql")
+        st.code(ddl_checkpoints, language="sql")
+        st.code(ddl_runs, language="sql")
+        st.caption("Tables created with VARCHAR dates and ages are converted in place, e.g.:")
+        st.code(";\n".join(typed_column_migration(f"{db_name}.{schema_name}", "E2B_ICSR_CASES", "RECEIVE_DATE", "DATE")),
+                language="sql")
     
     if st.button("🔨 Create Tables", type="primary", key="btn_create"):
         with st.spinner("Creating tables..."):
             try:
-                session.sql(ddl_cases).collect()
+                run_sql(ddl_cases)
                 st.success("Created E2B_ICSR_CASES")
                 
-                session.sql(ddl_drugs).collect()
+                run_sql(ddl_drugs)
                 st.success("Created E2B_ICSR_DRUGS")
                 
-                session.sql(ddl_reactions).collect()
+                run_sql(ddl_reactions)
+                for statement in ddl_reactions_columns:
+                    run_sql(statement)
                 st.success("Created E2B_ICSR_REACTIONS")
                 
+                run_sql(ddl_checkpoints)
+                st.success("Created E2B_INGESTION_CHECKPOINTS")
+                
+                run_sql(ddl_runs)
+                st.success("Created E2B_INGESTION_RUNS")
+                
+                # No load may run between a column's drop and rename
+                with session_lock():
+                    for table, column, col_type in untyped_columns(f"{db_name}.{schema_name}"):
+                        for statement in typed_column_migration(f"{db_name}.{schema_name}", table, column, col_type):
+                            run_sql(statement)
+                        st.success(f"Converted {table}.{column} from VARCHAR to {col_type}")
+                
                 st.balloons()
             except Exception as e:
                 st.error(f"Error: {str(e)}")
@@ -296,31 +889,87 @@ with tab3:
     view_db = st.text_input("Database", value="HCLS_DEMO", key="view_db")
     view_schema = st.text_input("Schema", value="PHARMACOVIGILANCE", key="view_schema")
     
-    col1, col2, col3 = st.columns(3)
+    view_target = f"{view_db}.{view_schema}"
     
+    col1, col2, col3 = st.columns([1, 2, 1])
     with col1:
-        if st.button("📋 View Cases"):
-            try:
-                df = session.sql(f"SELECT * FROM {view_db}.{view_schema}.E2B_ICSR_CASES LIMIT 100").to_pandas()
-                st.dataframe(df, use_container_width=True)
-            except Exception as e:
-                st.error(str(e))
-    
+        browse_label = st.radio("Table", list(BROWSE_TABLES), horizontal=True, key="browse_table")
+    all_columns = BROWSE_TABLES[browse_label][3]
     with col2:
-        if st.button("💊 View Drugs"):
-            try:
-                df = session.sql(f"SELECT * FROM {view_db}.{view_schema}.E2B_ICSR_DRUGS LIMIT 100").to_pandas()
-                st.dataframe(df, use_container_width=True)
-            except Exception as e:
-                st.error(str(e))
+        browse_columns = st.multiselect("Columns", all_columns, key=f"browse_columns_{browse_label}",
+                                        default=[c for c in all_columns if c not in WIDE_COLUMNS])
+    with col3:
+        page_size = st.selectbox("Rows per page", [50, 100, 500, 1000], index=1, key="browse_page_size")
     
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        case_filter = st.text_input("Case ID starts with", key="browse_case").strip()
+    with col2:
+        product_filter = st.text_input("Product or active substance", key="browse_product").strip()
     with col3:
-        if st.button("⚠️ View Reactions"):
-            try:
-                df = session.sql(f"SELECT * FROM {view_db}.{view_schema}.E2B_ICSR_REACTIONS LIMIT 100").to_pandas()
-                st.dataframe(df, use_container_width=True)
-            except Exception as e:
-                st.error(str(e))
+        received_filter = st.date_input("Received between", value=(), key="browse_received")
+    
+    # Any change to the query restarts paging at the first page. Pages fetched for the query are
+    # kept by cursor, so reruns triggered by other widgets don't query Snowflake again
+    query = (view_target, browse_label, tuple(browse_columns), page_size, case_filter, product_filter, tuple(received_filter))
+    if st.session_state.get('browse_query') != query:
+        st.session_state['browse_query'] = query
+        st.session_state['browse_cursors'] = [(None, 0)]
+        st.session_state['browse_pages'] = {}
+    cursors = st.session_state['browse_cursors']
+    pages = st.session_state['browse_pages']
+    
+    try:
+        cursor, first_row = cursors[-1]
+        if cursor not in pages:
+            # Waits for a running load's current batch to commit
+            with session_lock():
+                frame = browse_frame(view_target, browse_label, case_filter, product_filter, tuple(received_filter))
+                pages[cursor] = fetch_page(frame, browse_label, browse_columns, cursor, page_size)
+        page, next_cursor = pages[cursor]
+        
+        nav1, nav2, nav3, nav4, nav5 = st.columns([1, 1, 1, 2, 2])
+        # Callbacks move the cursor stack before the rerun that fetches the new page
+        nav1.button("◀ Previous", disabled=len(cursors) == 1, key="browse_prev", on_click=cursors.pop)
+        nav2.button("Next ▶", disabled=next_cursor is None, key="browse_next",
+                    on_click=cursors.append, args=((next_cursor, first_row + len(page)),))
+        nav3.button("🔄 Refresh", key="browse_refresh", on_click=pages.clear, help="Fetch the pages again")
+        nav4.caption(f"Page {len(cursors)} · rows {first_row + 1:,}–{first_row + len(page):,}"
+                     if len(page) else "No matching rows")
+        if nav5.button("🔢 Count matching rows", key="browse_count"):
+            with session_lock():
+                matching = browse_frame(view_target, browse_label, case_filter, product_filter,
+                                        tuple(received_filter)).count()
+            nav5.caption(f"{matching:,} matching rows")
+        
+        st.dataframe(page, use_container_width=True, hide_index=True)
+    except Exception as e:
+        st.error(str(e))
+    
+    st.divider()
+    st.markdown("### Ingestion Runs")
+    st.caption("Throughput and time per stage (decode, parse, build, write) of recent ingestion jobs.")
+    if st.button("📈 View Recent Runs", key="btn_runs"):
+        try:
+            with session_lock():
+                runs = session.sql(
+                    f"SELECT * FROM {view_db}.{view_schema}.E2B_INGESTION_RUNS ORDER BY STARTED_AT DESC LIMIT 50"
+                ).to_pandas()
+            if runs.empty:
+                st.info("No ingestion runs recorded yet.")
+            else:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Runs", len(runs))
+                col2.metric("Median rows/s", f"{runs['ROWS_PER_SECOND'].median():,.0f}")
+                col3.metric("Rows loaded", f"{int(runs['ROW_COUNT'].sum()):,}")
+                
+                st.markdown("**Seconds per stage:**")
+                stage_columns = [f"{stage.upper()}_SECONDS" for stage in STAGES]
+                breakdown = runs.set_index(runs['STARTED_AT'].astype(str) + " " + runs['SOURCE'])[stage_columns]
+                st.bar_chart(breakdown.rename(columns=lambda c: c.removesuffix("_SECONDS").lower()).iloc[::-1])
+                st.dataframe(runs, use_container_width=True, hide_index=True)
+        except Exception as e:
+            st.error(str(e))
 
 st.divider()
 col1, col2, col3, col4 = st.columns(4)
@@ -0,0 +1,240 @@
+"""
+Local manifest of ingested E2B(R2) files and reports.
+Records (case id, version, content hash) per report and a digest per file in
+a small SQLite index, so re-delivered files skip parsing and unchanged
+reports skip loading. Per-file checkpoints let interrupted loads resume;
+ingest_resumable() keeps them in the manifest or, for loads that run where
+no local file persists (the Streamlit app), in E2B_INGESTION_CHECKPOINTS.
+"""
+
+import os
+import hashlib
+import sqlite3
+from itertools import islice
+from datetime import datetime
+from typing import Any, List, Optional, Tuple, Iterable, Callable
+
+from e2b_parser import E2BR2Parser, SafetyReport, case_id_for, CHUNK_SIZE
+from e2b_stage import qualified_name
+
+
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.expanduser('~'), '.e2b_ingestion', 'manifest.sqlite')
+
+CHECKPOINT_TABLE = 'E2B_INGESTION_CHECKPOINTS'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested_reports (
+    case_id TEXT PRIMARY KEY,
+    version TEXT,
+    content_hash BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ingested_files (
+    file_hash BLOB PRIMARY KEY,
+    report_count INTEGER,
+    ingested_at TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ingestion_checkpoints (
+    file_hash BLOB PRIMARY KEY,
+    reports_committed INTEGER NOT NULL,
+    complete INTEGER NOT NULL,
+    updated_at TEXT
+) WITHOUT ROWID;
+"""
+
+
+def file_digest(source) -> str:
+    """Hex digest of a file's raw bytes (path or binary file object, read from the start and rewound)"""
+    digest = hashlib.blake2b(digest_size=16)
+    if hasattr(source, 'read'):
+        source.seek(0)
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+        source.seek(0)
+        return digest.hexdigest()
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """SQLite-backed manifest of ingested files and (case id, version, content hash)"""
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'IngestionManifest':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def has_file(self, file_hash: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM ingested_files WHERE file_hash = ?", (bytes.fromhex(file_hash),)
+        ).fetchone()
+        return row is not None
+
+    def changed_reports(self, reports: Iterable[SafetyReport]) -> List[SafetyReport]:
+        """Reports that are new, or whose version or content differs from the manifest.
+
+        Reports must carry content_hash (parse with E2BR2Parser(hash_content=True)).
+        """
+        changed = []
+        lookup = self.conn.execute
+        for report in reports:
+            row = lookup(
+                "SELECT version, content_hash FROM ingested_reports WHERE case_id = ?", (case_id_for(report),)
+            ).fetchone()
+            if row is None or row[0] != report.safety_report_version or row[1] != bytes.fromhex(report.content_hash):
+                changed.append(report)
+        return changed
+
+    def mark_ingested(self, reports: Iterable[SafetyReport], file_hash: Optional[str] = None) -> None:
+        """Record reports (and optionally their file) as loaded; call after the load succeeds"""
+        rows = [(case_id_for(r), r.safety_report_version, bytes.fromhex(r.content_hash)) for r in reports]
+        with self.conn:
+            self._insert_reports(rows)
+            if file_hash is not None:
+                self._insert_file(file_hash, len(rows))
+
+    def _insert_reports(self, rows: List[Tuple[str, Optional[str], bytes]]) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO ingested_reports (case_id, version, content_hash) VALUES (?, ?, ?)", rows
+        )
+
+    def _insert_file(self, file_hash: str, report_count: int) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO ingested_files (file_hash, report_count, ingested_at) VALUES (?, ?, ?)",
+            (bytes.fromhex(file_hash), report_count, datetime.now().isoformat())
+        )
+
+    def checkpoint(self, file_hash: str) -> Tuple[int, bool]:
+        """(reports committed, complete) for a file; (0, False) if it was never started"""
+        row = self.conn.execute(
+            "SELECT reports_committed, complete FROM ingestion_checkpoints WHERE file_hash = ?",
+            (bytes.fromhex(file_hash),)
+        ).fetchone()
+        return (row[0], bool(row[1])) if row else (0, False)
+
+    def commit_batch(self, file_hash: str, reports: Iterable[SafetyReport], reports_committed: int,
+                     complete: bool = False) -> None:
+        """Record a loaded batch and advance the file's checkpoint to reports_committed, atomically"""
+        rows = [(case_id_for(r), r.safety_report_version, bytes.fromhex(r.content_hash)) for r in reports]
+        with self.conn:
+            self._insert_reports(rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ingestion_checkpoints (file_hash, reports_committed, complete, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (bytes.fromhex(file_hash), reports_committed, int(complete), datetime.now().isoformat())
+            )
+            if complete:
+                self._insert_file(file_hash, reports_committed)
+
+
+class SnowflakeCheckpoints:
+    """Per-file checkpoints in the E2B_INGESTION_CHECKPOINTS table, for ingest_resumable().
+
+    execute(statement) runs one statement and returns its rows, e.g.
+    ``lambda sql: session.sql(sql).collect()``. target_schema qualifies the
+    table (e.g. 'HCLS_DEMO.PHARMACOVIGILANCE'); file_name is recorded with
+    new checkpoints. No report manifest is kept, so parsers need no content
+    hashes.
+    """
+
+    def __init__(self, execute: Callable[[str], List[Any]], target_schema: Optional[str] = None,
+                 file_name: Optional[str] = None):
+        self.execute = execute
+        self.table = qualified_name(target_schema, CHECKPOINT_TABLE)
+        self.file_name = file_name
+
+    def ddl(self) -> str:
+        return f"""
+CREATE TABLE IF NOT EXISTS {self.table} (
+    FILE_HASH VARCHAR(32) PRIMARY KEY,
+    FILE_NAME VARCHAR(500),
+    REPORTS_COMMITTED NUMBER,
+    COMPLETE BOOLEAN,
+    UPDATED_AT TIMESTAMP_NTZ
+);"""
+
+    def checkpoint(self, file_hash: str) -> Tuple[int, bool]:
+        """(reports committed, complete) for a file; (0, False) if it was never started"""
+        rows = self.execute(
+            f"SELECT REPORTS_COMMITTED, COMPLETE FROM {self.table} WHERE FILE_HASH = '{file_hash}'")
+        return (int(rows[0][0]), bool(rows[0][1])) if rows else (0, False)
+
+    def statement(self, file_hash: str, reports_committed: int, complete: bool,
+                  file_name: Optional[str] = None) -> str:
+        """MERGE advancing a file's checkpoint, to run alone or inside a load's own transaction"""
+        name = (file_name or self.file_name or '').replace("'", "''")
+        return (
+            f"MERGE INTO {self.table} t USING (SELECT '{file_hash}' AS FILE_HASH) s "
+            f"ON t.FILE_HASH = s.FILE_HASH "
+            f"WHEN MATCHED THEN UPDATE SET REPORTS_COMMITTED = {reports_committed}, COMPLETE = {complete}, "
+            f"UPDATED_AT = CURRENT_TIMESTAMP() "
+            f"WHEN NOT MATCHED THEN INSERT (FILE_HASH, FILE_NAME, REPORTS_COMMITTED, COMPLETE, UPDATED_AT) "
+            f"VALUES (s.FILE_HASH, '{name}', {reports_committed}, {complete}, CURRENT_TIMESTAMP())"
+        )
+
+    def commit_batch(self, file_hash: str, reports: Iterable[SafetyReport], reports_committed: int,
+                     complete: bool = False) -> None:
+        """Advance the file's checkpoint to reports_committed"""
+        self.execute(self.statement(file_hash, reports_committed, complete))
+
+
+def parse_new_reports(path: str, manifest: IngestionManifest,
+                      backend: Optional[str] = None) -> Tuple[str, List[SafetyReport]]:
+    """Parse a file, returning (file hash, reports that are new or changed).
+
+    A file whose exact bytes were ingested before is not parsed at all. After
+    loading the returned reports, call manifest.mark_ingested(reports, file_hash).
+    """
+    file_hash = file_digest(path)
+    if manifest.has_file(file_hash):
+        return file_hash, []
+    reports = E2BR2Parser(backend=backend, hash_content=True).iter_reports(path)
+    return file_hash, manifest.changed_reports(reports)
+
+
+def ingest_resumable(path, load_batch: Callable[[List[SafetyReport]], None], checkpoints,
+                     batch_size: int = 10_000, backend: Optional[str] = None,
+                     parser: Optional[E2BR2Parser] = None) -> int:
+    """Load a file in batches of batch_size reports, checkpointing after each, and resume after interruption.
+
+    path is a file path or binary file object. checkpoints is an
+    IngestionManifest or a SnowflakeCheckpoints. load_batch(reports) must
+    load and commit one batch in its own transaction. The checkpoint (file
+    hash, reports committed) advances only after it returns, so a rerun
+    skips the committed prefix of the file and continues with the first
+    uncommitted batch. If the process dies between the load and the
+    checkpoint, that batch is loaded again; use an idempotent loader such
+    as e2b_stage's versioned upsert. parser (default
+    E2BR2Parser(backend=backend, hash_content=True)) reads the reports; an
+    IngestionManifest needs their content hashes. Returns the number of
+    reports loaded by this call (0 if the file was already complete).
+    """
+    file_hash = file_digest(path)
+    committed, complete = checkpoints.checkpoint(file_hash)
+    if complete:
+        return 0
+
+    parser = parser or E2BR2Parser(backend=backend, hash_content=True)
+    reports = islice(parser.iter_reports(path), committed, None)
+    loaded = 0
+    while True:
+        batch = list(islice(reports, batch_size))
+        if batch:
+            load_batch(batch)
+            loaded += len(batch)
+        done = len(batch) < batch_size
+        checkpoints.commit_batch(file_hash, batch, committed + loaded, complete=done)
+        if done:
+            return loaded
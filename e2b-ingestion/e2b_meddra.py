@@ -0,0 +1,224 @@
+"""
+MedDRA terminology for coding and rolling up E2B(R2) reactions.
+load_meddra() reads the ASCII distribution (llt.asc, mdhier.asc and
+meddra_release.asc from the MedAscii folder) into a MedDRADictionary: an
+integer-keyed LLT -> PT -> HLT -> HLGT -> SOC index that codes reactions at
+ingest (E2BR2Parser(meddra=...)) and publishes E2B_MEDDRA_CLOSURE, so SOC
+and HLGT rollups are one join on the coded PT. MedDRA is licensed; the
+files are read from a local path and never shipped with this repo.
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from e2b_stage import qualified_name
+
+
+CLOSURE_TABLE = 'E2B_MEDDRA_CLOSURE'
+CLOSURE_COLUMNS = ('ANCESTOR_CODE', 'ANCESTOR_LEVEL', 'ANCESTOR_NAME', 'DESCENDANT_CODE', 'DESCENDANT_LEVEL',
+                   'DEPTH', 'PRIMARY_PATH', 'MEDDRA_VERSION', 'LOADED_AT')
+
+# Hierarchy levels, most specific first
+LEVELS = ('LLT', 'PT', 'HLT', 'HLGT', 'SOC')
+
+# Reaction columns filled by MedDRADictionary.code_columns()/code_records()
+CODED_COLUMNS = ('MEDDRA_CODED_PT', 'MEDDRA_SOC', 'CODING_MATCH', 'CODING_CONFIDENCE')
+
+# CODING_MATCH of a reaction coded from the sender's own LLT or PT
+REPORTED = 'reported'
+
+# Coded columns of a reaction that could not be coded
+UNCODED = (None, None, None, None)
+
+# Distribution files are Latin-1 for the English release
+DEFAULT_ENCODING = 'latin-1'
+
+
+def _fields(path: str, encoding: str) -> Iterator[List[str]]:
+    """$-delimited records of a MedDRA ASCII file (each line ends with a trailing $)"""
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line:
+                yield line.split('$')
+
+
+def normalize_term(text: str) -> str:
+    """Case- and whitespace-insensitive key of a term name"""
+    return ' '.join(text.lower().split())
+
+
+# code_reaction(llt, pt, verbatim) -> CODED_COLUMNS values, as provided by
+# MedDRADictionary and e2b_autocoder.MedDRAAutocoder
+CodeReaction = Callable[[Optional[str], Optional[str], Optional[str]], Tuple[Any, ...]]
+
+
+def code_columns(code_reaction: CodeReaction, reactions: Dict[str, Any]) -> Dict[str, Any]:
+    """Add CODED_COLUMNS to a column-oriented ICSR_REACTIONS batch, in place"""
+    coded = list(map(code_reaction, reactions['MEDDRA_LLT'], reactions['MEDDRA_PT'], reactions['VERBATIM_TERM']))
+    for name, values in zip(CODED_COLUMNS, zip(*coded) if coded else [()] * len(CODED_COLUMNS)):
+        reactions[name] = list(values)
+    return reactions
+
+
+def code_records(code_reaction: CodeReaction, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Row-oriented counterpart of code_columns(), in place"""
+    for row in rows:
+        row.update(zip(CODED_COLUMNS, code_reaction(row['MEDDRA_LLT'], row['MEDDRA_PT'], row['VERBATIM_TERM'])))
+    return rows
+
+
+@dataclass(slots=True)
+class MedDRADictionary:
+    """One MedDRA version, indexed by integer code.
+
+    llt_pt maps each LLT to its PT and pt_paths each PT to its (HLT, HLGT,
+    SOC) paths, primary path first; names holds each level's code -> name,
+    with strings shared between levels where an LLT and PT coincide.
+    by_name maps normalized LLT names (every PT is also an LLT) to LLT
+    codes, current LLTs taking precedence.
+    """
+    version: Optional[str]
+    llt_pt: Dict[int, int]
+    pt_paths: Dict[int, Tuple[Tuple[int, int, int], ...]]
+    names: Dict[str, Dict[int, str]]
+    by_name: Dict[str, int]
+    current: frozenset
+
+    def pt_code(self, term: Optional[str]) -> Optional[int]:
+        """PT code of a reported term: an LLT or PT code, or an LLT or PT name (any case)"""
+        if not term:
+            return None
+        if term.isdigit():
+            code = int(term)
+            return code if code in self.pt_paths else self.llt_pt.get(code)
+        llt = self.by_name.get(normalize_term(term))
+        return self.llt_pt.get(llt) if llt is not None else None
+
+    def primary_path(self, pt: int) -> Optional[Tuple[int, int, int]]:
+        """(HLT, HLGT, SOC) codes of a PT's primary path"""
+        paths = self.pt_paths.get(pt)
+        return paths[0] if paths else None
+
+    def primary_soc(self, pt: Optional[int]) -> Optional[str]:
+        path = self.primary_path(pt) if pt is not None else None
+        return self.names['SOC'][path[2]] if path else None
+
+    def code_reaction(self, llt: Optional[str], pt: Optional[str],
+                      verbatim: Optional[str] = None) -> Tuple[Optional[int], Optional[str], Optional[str], Optional[float]]:
+        """CODED_COLUMNS of a reaction, from its reported LLT and else its PT term.
+
+        The verbatim text is not coded here; see e2b_autocoder.MedDRAAutocoder.
+        """
+        code = self.pt_code(llt) or self.pt_code(pt)
+        return (code, self.primary_soc(code), REPORTED, 1.0) if code is not None else UNCODED
+
+    def code_columns(self, reactions: Dict[str, Any]) -> Dict[str, Any]:
+        return code_columns(self.code_reaction, reactions)
+
+    def code_records(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return code_records(self.code_reaction, rows)
+
+    # -----------------------------------------------------------------------
+    # Closure table
+    # -----------------------------------------------------------------------
+
+    def closure_rows(self) -> Iterator[Tuple[int, str, str, int, str, int, bool]]:
+        """(ANCESTOR_CODE, ANCESTOR_LEVEL, ANCESTOR_NAME, DESCENDANT_CODE, DESCENDANT_LEVEL, DEPTH, PRIMARY_PATH)
+
+        One row per term and each of its ancestors, itself included at
+        depth 0. PRIMARY_PATH is true when the ancestor lies on the
+        descendant's primary path; an ancestor reached by several paths
+        appears once. Multi-axial PTs reach secondary SOCs with it false.
+        """
+        names = self.names
+        # (descendant level, code) -> {(ancestor level, ancestor code): (depth, primary)}
+        ancestors: Dict[Tuple[str, int], Dict[Tuple[str, int], Tuple[int, bool]]] = {}
+
+        def add(descendant, chain, primary):
+            entry = ancestors.setdefault(descendant, {})
+            for depth, ancestor in enumerate(chain):
+                seen = entry.get(ancestor)
+                entry[ancestor] = (depth, primary or (seen is not None and seen[1]))
+
+        for pt, paths in self.pt_paths.items():
+            for i, (hlt, hlgt, soc) in enumerate(paths):
+                primary = i == 0
+                add(('PT', pt), [('PT', pt), ('HLT', hlt), ('HLGT', hlgt), ('SOC', soc)], primary)
+                add(('HLT', hlt), [('HLT', hlt), ('HLGT', hlgt), ('SOC', soc)], True)
+                add(('HLGT', hlgt), [('HLGT', hlgt), ('SOC', soc)], True)
+                add(('SOC', soc), [('SOC', soc)], True)
+
+        for (level, code), entry in ancestors.items():
+            for (ancestor_level, ancestor), (depth, primary) in entry.items():
+                yield ancestor, ancestor_level, names[ancestor_level][ancestor], code, level, depth, primary
+
+        # LLTs inherit their PT's ancestors one level further down
+        for llt, pt in self.llt_pt.items():
+            yield llt, 'LLT', names['LLT'][llt], llt, 'LLT', 0, True
+            for (ancestor_level, ancestor), (depth, primary) in ancestors.get(('PT', pt), {}).items():
+                yield ancestor, ancestor_level, names[ancestor_level][ancestor], llt, 'LLT', depth + 1, primary
+
+    def publish(self, stage, target_schema: Optional[str] = None) -> int:
+        """Replace E2B_MEDDRA_CLOSURE with this version's closure through a SnowflakeStage or LocalStage"""
+        loaded_at = datetime.now().isoformat()
+        rows = [row + (self.version, loaded_at) for row in self.closure_rows()]
+        return stage.insert_rows(qualified_name(target_schema, CLOSURE_TABLE), CLOSURE_COLUMNS, rows, replace=True)
+
+
+def load_meddra(path: str, encoding: str = DEFAULT_ENCODING) -> MedDRADictionary:
+    """Read a MedDRA ASCII distribution directory (MedAscii) into a MedDRADictionary.
+
+    Uses llt.asc (LLT -> PT, currency) and mdhier.asc (every PT -> HLT ->
+    HLGT -> SOC path with its names and primary SOC flag); the version comes
+    from meddra_release.asc when present.
+    """
+    version = None
+    release = os.path.join(path, 'meddra_release.asc')
+    if os.path.exists(release):
+        version = next(_fields(release, encoding), [None])[0]
+
+    names: Dict[str, Dict[int, str]] = {level: {} for level in LEVELS}
+    paths: Dict[int, List[Tuple[int, int, int]]] = {}
+    # mdhier.asc: pt_code$hlt_code$hlgt_code$soc_code$pt_name$hlt_name$hlgt_name$soc_name$soc_abbrev$
+    #             null_field$pt_soc_code$primary_soc_fg$
+    for fields in _fields(os.path.join(path, 'mdhier.asc'), encoding):
+        pt, hlt, hlgt, soc = (int(code) for code in fields[:4])
+        for level, code, name in (('PT', pt, fields[4]), ('HLT', hlt, fields[5]),
+                                  ('HLGT', hlgt, fields[6]), ('SOC', soc, fields[7])):
+            names[level].setdefault(code, name)
+        pt_paths = paths.setdefault(pt, [])
+        if fields[11] == 'Y':
+            pt_paths.insert(0, (hlt, hlgt, soc))
+        else:
+            pt_paths.append((hlt, hlgt, soc))
+
+    llt_pt: Dict[int, int] = {}
+    current = set()
+    by_name: Dict[str, int] = {}
+    pt_names = names['PT']
+    # llt.asc: llt_code$llt_name$pt_code$whoart$harts$costart$icd9$icd9cm$icd10$llt_currency$jart$
+    for fields in _fields(os.path.join(path, 'llt.asc'), encoding):
+        llt, name, pt = int(fields[0]), fields[1], int(fields[2])
+        if pt not in paths:
+            continue
+        # Share the PT's string for the LLT of the same name
+        names['LLT'][llt] = pt_names[pt] if pt_names[pt] == name else name
+        llt_pt[llt] = pt
+        key = normalize_term(name)
+        is_current = fields[9] == 'Y'
+        if is_current:
+            current.add(llt)
+        if key not in by_name or (is_current and by_name[key] not in current):
+            by_name[key] = llt
+
+    return MedDRADictionary(
+        version=version,
+        llt_pt=llt_pt,
+        pt_paths={pt: tuple(p) for pt, p in paths.items()},
+        names=names,
+        by_name=by_name,
+        current=frozenset(current),
+    )
@@ -3,14 +3,48 @@ E2B(R2) ICSR XML Parser for Snowflake
 Parses ICH E2B(R2) Individual Case Safety Report XML files and loads into Snowflake tables.
 """
 
+import os
+import io
+import glob
+import gzip
+import hashlib
+import mmap
+import time
+import uuid
+import zipfile
+from array import array
+from contextlib import contextmanager, nullcontext
+from operator import attrgetter
+from functools import partial, lru_cache
 import xml.etree.ElementTree as ET
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional, Dict, Any, Iterator, Union, BinaryIO, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date
 import json
 
+try:
+    from lxml import etree as LET
+except ImportError:  # lxml is optional; the stdlib backend is used without it
+    LET = None
 
-@dataclass
+
+# Bytes read per chunk when feeding the incremental parser
+CHUNK_SIZE = 1 << 16
+
+# A file path or an open binary file object
+XMLSource = Union[str, bytes, os.PathLike, BinaryIO]
+
+# Shared instances of repeated code values (flags, countries, units, routes,
+# ...) so each distinct value is stored once per process. Only closed code
+# sets are pooled, never free text, and the pool is emptied once it passes
+# VALUE_POOL_MAX entries, so unexpected values cannot grow it without bound.
+VALUE_POOL_MAX = 10_000
+_VALUE_POOL: Dict[str, str] = {}
+_POOLED = _VALUE_POOL.setdefault
+
+
+@dataclass(slots=True)
 class Drug:
     characterization: Optional[str] = None
     medicinal_product: Optional[str] = None
@@ -30,8 +64,9 @@ class Drug:
     recurrence: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Reaction:
+    verbatim: Optional[str] = None
     meddra_pt: Optional[str] = None
     meddra_pt_code: Optional[str] = None
     meddra_llt: Optional[str] = None
@@ -42,7 +77,7 @@ class Reaction:
     outcome: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Patient:
     identifier: Optional[str] = None
     age: Optional[str] = None
@@ -56,7 +91,7 @@ class Patient:
     autopsy: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class SafetyReport:
     safety_report_id: Optional[str] = None
     safety_report_version: Optional[str] = None
@@ -81,6 +116,337 @@ class SafetyReport:
     patient: Patient = field(default_factory=Patient)
     drugs: List[Drug] = field(default_factory=list)
     reactions: List[Reaction] = field(default_factory=list)
+    content_hash: Optional[str] = None
+
+
+# ---------------------------------------------------------------------------
+# Date and age normalization
+# ---------------------------------------------------------------------------
+
+# E2B(R2) date formats by value length: 102 CCYYMMDD, 203 CCYYMMDDHHMM,
+# 204 CCYYMMDDHHMMSS, 602 CCYY, 610 CCYYMM
+E2B_DATE_FORMATS = {8: '102', 12: '203', 14: '204', 4: '602', 6: '610'}
+
+# patientonsetageunit code -> years per unit (800 decade ... 805 hour)
+AGE_UNIT_YEARS = {
+    '800': 10.0,
+    '801': 1.0,
+    '802': 1 / 12,
+    '803': 7 / 365.25,
+    '804': 1 / 365.25,
+    '805': 1 / 8766,
+}
+
+# Output date columns per table, converted to datetime.date by normalization
+DATE_COLUMNS = {
+    'ICSR_CASES': ('TRANSMISSION_DATE', 'RECEIVE_DATE', 'RECEIPT_DATE', 'PATIENT_DEATH_DATE'),
+    'ICSR_DRUGS': ('START_DATE', 'END_DATE'),
+    'ICSR_REACTIONS': ('START_DATE', 'END_DATE'),
+}
+
+
+@lru_cache(maxsize=1 << 16)
+def parse_e2b_date(value: Optional[str]) -> Optional[date]:
+    """Convert an E2B(R2) date value (formats 102/203/204/602/610) to a date.
+
+    The format is identified by the value's length. Times (203/204) are
+    dropped, and partial dates (602 year, 610 month) map to the first day of
+    their period. Invalid values return None. Memoized, since dates repeat
+    heavily across a batch.
+    """
+    if not value or not value.isdigit() or len(value) not in E2B_DATE_FORMATS:
+        return None
+    try:
+        return date(int(value[:4]), int(value[4:6] or 1), int(value[6:8] or 1))
+    except ValueError:
+        return None
+
+
+def age_in_years(age: Optional[str], unit: Optional[str]) -> Optional[float]:
+    """Convert patientonsetage and its unit code to years (unit defaults to 801 years)"""
+    if age is None:
+        return None
+    try:
+        value = float(age)
+    except ValueError:
+        return None
+    factor = AGE_UNIT_YEARS.get(unit or '801')
+    return round(value * factor, 2) if factor is not None else None
+
+
+def normalize_columns(batch: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Convert a column-oriented batch's date columns to dates and PATIENT_AGE to years, in place"""
+    for table, columns in DATE_COLUMNS.items():
+        table_columns = batch[table]
+        for name in columns:
+            table_columns[name] = list(map(parse_e2b_date, table_columns[name]))
+    cases = batch['ICSR_CASES']
+    cases['PATIENT_AGE'] = list(map(age_in_years, cases['PATIENT_AGE'], cases['PATIENT_AGE_UNIT']))
+    return batch
+
+
+def normalize_records(records: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+    """Row-oriented counterpart of normalize_columns(), in place"""
+    for table, columns in DATE_COLUMNS.items():
+        for row in records[table]:
+            for name in columns:
+                row[name] = parse_e2b_date(row[name])
+    for row in records['ICSR_CASES']:
+        row['PATIENT_AGE'] = age_in_years(row['PATIENT_AGE'], row['PATIENT_AGE_UNIT'])
+    return records
+
+
+# ---------------------------------------------------------------------------
+# Ingestion instrumentation
+# ---------------------------------------------------------------------------
+
+# Pipeline stages timed by IngestionStats: reading and decompressing input,
+# XML tokenizing, building reports and records, and writing to the target
+STAGES = ('decode', 'parse', 'build', 'write')
+
+
+@dataclass
+class IngestionStats:
+    """Wall seconds per pipeline stage and report, row and byte counters for one run.
+
+    Pass one to E2BR2Parser(stats=...) to time decode, parse and build;
+    writers add their own time with ``stats.timed('write')``. to_record()
+    gives one row of the E2B_INGESTION_RUNS table.
+    """
+    source: Optional[str] = None
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started: float = field(default_factory=time.time)
+    seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    reports: int = 0
+    rows: Dict[str, int] = field(default_factory=dict)
+    bytes_read: int = 0
+
+    @contextmanager
+    def timed(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - start
+
+    def count_rows(self, table: str, n: int) -> None:
+        self.rows[table] = self.rows.get(table, 0) + n
+
+    def count_bytes(self, data: Union[str, bytes]) -> None:
+        """Add input read; already-decoded str input counts as its UTF-8 bytes, not characters"""
+        self.bytes_read += len(data.encode('utf-8')) if isinstance(data, str) else len(data)
+
+    def to_record(self, status: str = 'done', error: Optional[str] = None,
+                  finished: Optional[float] = None) -> Dict[str, Any]:
+        finished = finished or time.time()
+        elapsed = finished - self.started
+        row_count = sum(self.rows.values())
+        record = {
+            'RUN_ID': self.run_id,
+            'SOURCE': self.source,
+            'STATUS': status,
+            'STARTED_AT': datetime.fromtimestamp(self.started).isoformat(),
+            'FINISHED_AT': datetime.fromtimestamp(finished).isoformat(),
+            'REPORTS': self.reports,
+            'ROW_COUNT': row_count,
+            'BYTES_READ': self.bytes_read,
+        }
+        record.update({f"{stage.upper()}_SECONDS": round(self.seconds[stage], 4) for stage in STAGES})
+        record['TOTAL_SECONDS'] = round(elapsed, 4)
+        record['ROWS_PER_SECOND'] = round(row_count / elapsed, 1) if elapsed else None
+        record['ERROR'] = error
+        return record
+
+
+def write_run_log(record: Dict[str, Any], path: Union[str, os.PathLike]) -> None:
+    """Append one run record to a JSON-lines run log"""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+# File patterns picked up by parse_e2b_directory()
+E2B_FILE_PATTERNS = ('*.xml', '*.xml.gz', '*.zip')
+
+
+def element_content_hash(elem) -> str:
+    """Canonical content hash of an XML subtree: tags and stripped text in document order.
+
+    Independent of indentation, comments, processing instructions and the
+    XML backend, so an unchanged report hashes the same on every delivery.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for node in elem.iter():
+        tag = node.tag
+        if isinstance(tag, str):
+            text = node.text
+            digest.update(f"{tag}\x1f{text.strip() if text else ''}\x1e".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def case_id_for(report: 'SafetyReport') -> str:
+    """safetyreportid, or a deterministic fallback derived from the content hash"""
+    if report.safety_report_id:
+        return report.safety_report_id
+    content_hash = report.content_hash or hashlib.blake2b(
+        repr(asdict(report)).encode('utf-8'), digest_size=16).hexdigest()
+    return f"CASE_{content_hash[:20].upper()}"
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZIP_MAGIC = b'PK\x03\x04'
+
+
+class _RawReader(io.RawIOBase):
+    """RawIOBase adapter over any object with read(), so it can be buffered and peeked"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _peek(stream, n: int) -> Tuple[bytes, BinaryIO]:
+    """Return the first n bytes of a binary stream without consuming them.
+
+    Returns (head, stream); a stream that can neither peek nor seek is
+    wrapped in a buffered reader, which must be used from then on.
+    """
+    if not hasattr(stream, 'peek'):
+        if stream.seekable():
+            pos = stream.tell()
+            head = stream.read(n)
+            stream.seek(pos)
+            return head, stream
+        stream = io.BufferedReader(_RawReader(stream))
+    return stream.peek(n)[:n], stream
+
+
+def open_e2b_documents(source: XMLSource) -> Iterator[Tuple[str, BinaryIO]]:
+    """Yield (name, binary stream) for each E2B(R2) document in source.
+
+    source is a path or binary file object holding plain XML, gzip-compressed
+    XML (.xml.gz) or a zip archive, in which case each .xml member is yielded
+    in archive order. Compression is detected from the magic bytes, and
+    streams decompress lazily as they are read, so nothing is inflated up
+    front. Each stream is only valid until the next document is requested.
+    """
+    if hasattr(source, 'read'):
+        name = getattr(source, 'name', '<stream>')
+        yield from _open_stream_documents(str(name), source)
+        return
+
+    with open(source, 'rb') as f:
+        yield from _open_stream_documents(os.fspath(source), f)
+
+
+def _open_stream_documents(name: str, stream) -> Iterator[Tuple[str, BinaryIO]]:
+    head, stream = _peek(stream, 4)
+
+    if head.startswith(GZIP_MAGIC):
+        with gzip.GzipFile(fileobj=stream, mode='rb') as gz:
+            yield name, gz
+    elif head.startswith(ZIP_MAGIC):
+        with zipfile.ZipFile(stream) as zf:
+            for member in zf.infolist():
+                if member.is_dir() or not member.filename.lower().endswith('.xml'):
+                    continue
+                with zf.open(member) as member_stream:
+                    yield f"{name}!{member.filename}", member_stream
+    else:
+        yield name, stream
+
+
+class ElementTreeBackend:
+    """XML backend on the standard library xml.etree.ElementTree"""
+
+    name = 'etree'
+
+    def fromstring(self, xml_content: str):
+        return ET.fromstring(xml_content)
+
+    def find_reports(self, root) -> List[Any]:
+        return root.findall('.//safetyreport')
+
+    def iter_report_elements(self, chunks: Iterator[Union[str, bytes]]) -> Iterator[Any]:
+        """Yield each safetyreport element as it completes, then discard it"""
+        pull_parser = ET.XMLPullParser(events=('start', 'end'))
+        root = None
+
+        for chunk in chunks:
+            pull_parser.feed(chunk)
+            for event, elem in pull_parser.read_events():
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                elif elem.tag == 'safetyreport':
+                    yield elem
+                    elem.clear()
+                    root.clear()
+
+        pull_parser.close()
+
+
+class LxmlBackend:
+    """XML backend on lxml: tag-filtered incremental parsing and compiled XPath"""
+
+    name = 'lxml'
+
+    _find_reports = LET.XPath('.//safetyreport') if LET is not None else None
+
+    def __init__(self):
+        if LET is None:
+            raise ImportError("The lxml backend requires lxml to be installed")
+
+    @staticmethod
+    def _parser_options() -> Dict[str, bool]:
+        return {'resolve_entities': False, 'no_network': True}
+
+    def fromstring(self, xml_content: str):
+        # Feed rather than LET.fromstring(), which rejects str input that
+        # carries an XML encoding declaration
+        parser = LET.XMLParser(**self._parser_options())
+        parser.feed(xml_content)
+        return parser.close()
+
+    def find_reports(self, root) -> List[Any]:
+        return self._find_reports(root)
+
+    def iter_report_elements(self, chunks: Iterator[Union[str, bytes]]) -> Iterator[Any]:
+        """Yield each safetyreport element as it completes, then discard it"""
+        pull_parser = LET.XMLPullParser(events=('end',), tag='safetyreport', **self._parser_options())
+
+        for chunk in chunks:
+            pull_parser.feed(chunk)
+            for _, elem in pull_parser.read_events():
+                yield elem
+                elem.clear(keep_tail=True)
+                parent = elem.getparent()
+                if parent is not None:
+                    while elem.getprevious() is not None:
+                        del parent[0]
+
+        pull_parser.close()
+
+
+BACKENDS = {
+    ElementTreeBackend.name: ElementTreeBackend,
+    LxmlBackend.name: LxmlBackend,
+}
+
+
+def get_backend(name: Optional[str] = None):
+    """Return an XML backend by name; by default lxml when installed, else etree"""
+    if name is None:
+        name = LxmlBackend.name if LET is not None else ElementTreeBackend.name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown XML backend {name!r}; expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
 
 
 class E2BR2Parser:
@@ -113,223 +479,505 @@ class E2BR2Parser:
         "4": "Not available"
     }
 
-    def __init__(self, xml_content: str):
+    # Single-pass dispatch tables: child tag -> (field name, decoder or None).
+    # A decoder is called as decoder(text, text): a code map's .get, or _POOLED
+    # to share the values of a closed code set. Layout follows the ICH E2B(R2) DTD; the first
+    # occurrence of a tag wins.
+    REPORT_FIELDS = {
+        'safetyreportid': ('safety_report_id', None),
+        'safetyreportversion': ('safety_report_version', _POOLED),
+        'transmissiondate': ('transmission_date', None),
+        'reporttype': ('report_type', REPORT_TYPE.get),
+        'serious': ('serious', _POOLED),
+        'seriousnessdeath': ('seriousness_death', _POOLED),
+        'seriousnesslifethreatening': ('seriousness_life_threatening', _POOLED),
+        'seriousnesshospitalization': ('seriousness_hospitalization', _POOLED),
+        'seriousnessdisabling': ('seriousness_disability', _POOLED),
+        'seriousnesscongenitalanomali': ('seriousness_congenital', _POOLED),
+        'seriousnessother': ('seriousness_other', _POOLED),
+        'receivedate': ('receive_date', None),
+        'receiptdate': ('receipt_date', None),
+    }
+
+    REPORT_GROUP_FIELDS = {
+        'primarysource': {
+            'reportercountry': ('reporter_country', _POOLED),
+            'qualification': ('qualification', _POOLED),
+        },
+        'sender': {
+            'sendertype': ('sender_type', _POOLED),
+            'senderorganization': ('sender_organization', None),
+        },
+        'receiver': {
+            'receivertype': ('receiver_type', _POOLED),
+            'receiverorganization': ('receiver_organization', None),
+        },
+    }
+
+    PATIENT_FIELDS = {
+        'patientidentification': ('identifier', None),
+        'patientonsetage': ('age', None),
+        'patientonsetageunit': ('age_unit', _POOLED),
+        'patientbirthdate': ('birth_date', None),
+        'patientsex': ('sex', SEX_MAP.get),
+        'patientweight': ('weight', None),
+        'patientheight': ('height', None),
+        'patientdeathdate': ('death_date', None),
+        'patientautopsyyesno': ('autopsy', None),
+    }
+
+    MEDICAL_HISTORY_FIELDS = {
+        'patientmedicalhistorytext': ('text', None),
+    }
+
+    SUMMARY_FIELDS = {
+        'narrativeincludeclinical': ('case_narrative', None),
+    }
+
+    DRUG_FIELDS = {
+        'drugcharacterization': ('characterization', DRUG_CHARACTERIZATION.get),
+        'medicinalproduct': ('medicinal_product', None),
+        'activesubstancename': ('generic_name', None),
+        'obtaindrugcountry': ('brand_name', _POOLED),
+        'drugbatchnumb': ('batch_number', None),
+        'drugauthorizationnumb': ('authorization_number', None),
+        'drugauthorizationcountry': ('authorization_country', _POOLED),
+        'drugauthorizationholder': ('authorization_holder', None),
+        'drugstructuredosagenumb': ('dosage_text', None),
+        'drugdosageform': ('dosage_form', None),
+        'drugadministrationroute': ('route_of_admin', _POOLED),
+        'drugindication': ('indication', None),
+        'drugstartdate': ('start_date', None),
+        'drugenddate': ('end_date', None),
+        'actiondrug': ('action_taken', _POOLED),
+        'drugrecurreadministration': ('recurrence', _POOLED),
+    }
+
+    REACTION_FIELDS = {
+        'primarysourcereaction': ('verbatim', None),
+        'reactionmeddrapt': ('meddra_pt', None),
+        'reactionmeddraversionpt': ('meddra_pt_code', _POOLED),
+        'reactionmeddrallt': ('meddra_llt', None),
+        'reactionmeddraversionllt': ('meddra_llt_code', _POOLED),
+        'reactionstartdate': ('start_date', None),
+        'reactionenddate': ('end_date', None),
+        'reactionduration': ('duration', None),
+        'reactionoutcome': ('outcome', REACTION_OUTCOME.get),
+    }
+
+    # Output columns per table: (column name, getter on the record). CASE_ID,
+    # the sequence numbers and INGESTION_TIMESTAMP are added by the writers.
+    CASE_COLUMNS = tuple((name, attrgetter(path)) for name, path in (
+        ('SAFETY_REPORT_VERSION', 'safety_report_version'),
+        ('TRANSMISSION_DATE', 'transmission_date'),
+        ('REPORT_TYPE', 'report_type'),
+        ('SERIOUS', 'serious'),
+        ('SERIOUSNESS_DEATH', 'seriousness_death'),
+        ('SERIOUSNESS_LIFE_THREATENING', 'seriousness_life_threatening'),
+        ('SERIOUSNESS_HOSPITALIZATION', 'seriousness_hospitalization'),
+        ('SERIOUSNESS_DISABILITY', 'seriousness_disability'),
+        ('SERIOUSNESS_CONGENITAL', 'seriousness_congenital'),
+        ('SERIOUSNESS_OTHER', 'seriousness_other'),
+        ('RECEIVE_DATE', 'receive_date'),
+        ('RECEIPT_DATE', 'receipt_date'),
+        ('SENDER_TYPE', 'sender_type'),
+        ('SENDER_ORGANIZATION', 'sender_organization'),
+        ('RECEIVER_TYPE', 'receiver_type'),
+        ('RECEIVER_ORGANIZATION', 'receiver_organization'),
+        ('CASE_NARRATIVE', 'case_narrative'),
+        ('REPORTER_COUNTRY', 'reporter_country'),
+        ('QUALIFICATION', 'qualification'),
+        ('PATIENT_AGE', 'patient.age'),
+        ('PATIENT_AGE_UNIT', 'patient.age_unit'),
+        ('PATIENT_SEX', 'patient.sex'),
+        ('PATIENT_WEIGHT', 'patient.weight'),
+        ('PATIENT_HEIGHT', 'patient.height'),
+        ('PATIENT_MEDICAL_HISTORY', 'patient.medical_history'),
+        ('PATIENT_DEATH_DATE', 'patient.death_date'),
+    ))
+
+    DRUG_COLUMNS = tuple((name, attrgetter(path)) for name, path in (
+        ('DRUG_CHARACTERIZATION', 'characterization'),
+        ('MEDICINAL_PRODUCT', 'medicinal_product'),
+        ('GENERIC_NAME', 'generic_name'),
+        ('BATCH_NUMBER', 'batch_number'),
+        ('AUTHORIZATION_NUMBER', 'authorization_number'),
+        ('AUTHORIZATION_COUNTRY', 'authorization_country'),
+        ('AUTHORIZATION_HOLDER', 'authorization_holder'),
+        ('DOSAGE_TEXT', 'dosage_text'),
+        ('DOSAGE_FORM', 'dosage_form'),
+        ('ROUTE_OF_ADMIN', 'route_of_admin'),
+        ('INDICATION', 'indication'),
+        ('START_DATE', 'start_date'),
+        ('END_DATE', 'end_date'),
+        ('ACTION_TAKEN', 'action_taken'),
+    ))
+
+    REACTION_COLUMNS = tuple((name, attrgetter(path)) for name, path in (
+        ('VERBATIM_TERM', 'verbatim'),
+        ('MEDDRA_PT', 'meddra_pt'),
+        ('MEDDRA_PT_CODE', 'meddra_pt_code'),
+        ('MEDDRA_LLT', 'meddra_llt'),
+        ('MEDDRA_LLT_CODE', 'meddra_llt_code'),
+        ('START_DATE', 'start_date'),
+        ('END_DATE', 'end_date'),
+        ('DURATION', 'duration'),
+        ('OUTCOME', 'outcome'),
+    ))
+
+    # Reaction columns coded against a MedDRA dictionary (see e2b_meddra); NULL without one
+    CODED_REACTION_COLUMNS = ('MEDDRA_CODED_PT', 'MEDDRA_SOC', 'CODING_MATCH', 'CODING_CONFIDENCE')
+
+    CASE_COLUMN_NAMES = ('CASE_ID',) + tuple(name for name, _ in CASE_COLUMNS) + ('INGESTION_TIMESTAMP',)
+    DRUG_COLUMN_NAMES = ('CASE_ID', 'DRUG_SEQ') + tuple(name for name, _ in DRUG_COLUMNS)
+    REACTION_COLUMN_NAMES = (('CASE_ID', 'REACTION_SEQ') + tuple(name for name, _ in REACTION_COLUMNS)
+                             + CODED_REACTION_COLUMNS)
+
+    def __init__(self, xml_content: Optional[str] = None, backend: Optional[str] = None,
+                 hash_content: bool = False, normalize: bool = True,
+                 stats: Optional[IngestionStats] = None, meddra=None):
         self.xml_content = xml_content
+        self.backend = get_backend(backend)
+        # normalize converts output dates to datetime.date and PATIENT_AGE to
+        # years (see normalize_columns); disable to get the raw E2B strings
+        self.normalize = normalize
+        # content_hash is always set for reports without a safetyreportid (it
+        # derives their case ID); hash_content sets it for every report
+        self.hash_content = hash_content
+        # stats, when given, accumulates per-stage timings and counters
+        self.stats = stats
+        # meddra, an e2b_meddra.MedDRADictionary or e2b_autocoder.MedDRAAutocoder,
+        # codes each reaction to its PT and primary SOC (CODED_REACTION_COLUMNS)
+        self.meddra = meddra
         self.root = None
         self.reports: List[SafetyReport] = []
 
     def parse(self) -> List[SafetyReport]:
         """Parse the E2B(R2) XML and return list of SafetyReport objects"""
-        self.root = ET.fromstring(self.xml_content)
+        with self._timed('parse'):
+            self.root = self.backend.fromstring(self.xml_content)
         
-        for sr_elem in self.root.findall('.//safetyreport'):
-            report = self._parse_safety_report(sr_elem)
-            self.reports.append(report)
+        with self._timed('build'):
+            for sr_elem in self.backend.find_reports(self.root):
+                report = self._parse_safety_report(sr_elem)
+                self.reports.append(report)
         
+        if self.stats is not None:
+            self.stats.reports += len(self.reports)
+            self.stats.count_bytes(self.xml_content)
         return self.reports
 
-    def _get_text(self, elem, path: str) -> Optional[str]:
-        """Safely get text from element path"""
-        found = elem.find(path)
-        return found.text if found is not None and found.text else None
+    def iter_reports(self, source: Optional[XMLSource] = None) -> Iterator[SafetyReport]:
+        """Incrementally parse E2B(R2) XML, yielding one SafetyReport at a time.
+
+        ``source`` is a file path or a binary file object holding plain XML,
+        gzip-compressed XML or a zip of XML members (see open_e2b_documents);
+        when omitted the ``xml_content`` passed to the constructor is used.
+        Compressed input is decompressed chunk by chunk into the parser. Each
+        safetyreport subtree is discarded once parsed, so memory stays flat
+        regardless of how many reports the message holds.
+        """
+        if source is None:
+            documents = [self._iter_chunks()]
+        else:
+            documents = (self._read_chunks(stream) for _, stream in open_e2b_documents(source))
+
+        for chunks in documents:
+            yield from self._iter_parsed(chunks)
+
+    def iter_reports_in_range(self, path: Union[str, os.PathLike], start: int, end: int,
+                              encoding: str = 'utf-8') -> Iterator[SafetyReport]:
+        """Parse the safetyreport elements lying wholly within bytes [start, end) of path.
+
+        The byte range is read through mmap and fed to the incremental parser
+        inside a synthetic root element, so a single report or a slice of a
+        huge message can be parsed without reading the rest of the file.
+        Byte ranges normally come from e2b_index.ReportIndex.
+        """
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from self._iter_parsed(self._iter_range_chunks(mm, start, end, encoding))
+
+    def _iter_parsed(self, chunks: Iterator[Union[str, bytes]]) -> Iterator[SafetyReport]:
+        """Parse each safetyreport in chunks, timing the stages when stats is set.
+
+        Time spent pulling the next element is split into 'decode' (reading
+        chunks) and 'parse' (tokenizing); _parse_safety_report() is 'build'.
+        Two clock reads per report keep the overhead negligible.
+        """
+        stats = self.stats
+        if stats is None:
+            for sr_elem in self.backend.iter_report_elements(chunks):
+                yield self._parse_safety_report(sr_elem)
+            return
+
+        seconds = stats.seconds
+        elements = self.backend.iter_report_elements(self._timed_chunks(chunks))
+        while True:
+            start, decoding = time.perf_counter(), seconds['decode']
+            sr_elem = next(elements, None)
+            parsed = time.perf_counter()
+            seconds['parse'] += parsed - start - (seconds['decode'] - decoding)
+            if sr_elem is None:
+                return
+            report = self._parse_safety_report(sr_elem)
+            seconds['build'] += time.perf_counter() - parsed
+            stats.reports += 1
+            yield report
+
+    def _timed_chunks(self, chunks: Iterator[Union[str, bytes]]) -> Iterator[Union[str, bytes]]:
+        """Charge the time spent reading (and decompressing) each chunk to 'decode'"""
+        stats = self.stats
+        chunks = iter(chunks)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            stats.seconds['decode'] += time.perf_counter() - start
+            if chunk is None:
+                return
+            stats.count_bytes(chunk)
+            yield chunk
+
+    def _timed(self, stage: str):
+        return self.stats.timed(stage) if self.stats is not None else nullcontext()
+
+    def _count_rows(self, tables: Dict[str, Any]) -> None:
+        if self.stats is not None:
+            for table, rows in tables.items():
+                self.stats.count_rows(table, len(rows['CASE_ID']) if isinstance(rows, dict) else len(rows))
+
+    @staticmethod
+    def _iter_range_chunks(mm, start: int, end: int, encoding: str) -> Iterator[bytes]:
+        yield f'<?xml version="1.0" encoding="{encoding}"?><ichicsr>'.encode('ascii')
+        for pos in range(start, end, CHUNK_SIZE):
+            yield mm[pos:min(pos + CHUNK_SIZE, end)]
+        yield b'</ichicsr>'
+
+    def _iter_chunks(self) -> Iterator[Union[str, bytes]]:
+        """Yield xml_content in chunks; sources given to iter_reports() go through open_e2b_documents()"""
+        if self.xml_content is None:
+            raise ValueError("No XML source given and no xml_content set")
+        for start in range(0, len(self.xml_content), CHUNK_SIZE):
+            yield self.xml_content[start:start + CHUNK_SIZE]
+
+    @staticmethod
+    def _read_chunks(stream) -> Iterator[Union[str, bytes]]:
+        """Read a file object to exhaustion in CHUNK_SIZE pieces"""
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def _collect(elem, fields: Dict[str, tuple], values: Dict[str, Optional[str]]) -> None:
+        """Walk elem's children once, keeping the first text seen for each mapped tag"""
+        for child in elem:
+            spec = fields.get(child.tag)
+            if spec is not None and spec[0] not in values:
+                name, decode = spec
+                text = child.text or None
+                values[name] = decode(text, text) if decode and text else text
 
     def _parse_safety_report(self, sr_elem) -> SafetyReport:
-        """Parse a single safetyreport element"""
-        report = SafetyReport()
-        
-        report.safety_report_id = self._get_text(sr_elem, 'safetyreportid')
-        report.safety_report_version = self._get_text(sr_elem, 'safetyreportversion')
-        report.transmission_date = self._get_text(sr_elem, 'transmissiondate')
-        
-        report_type_code = self._get_text(sr_elem, 'reporttype')
-        report.report_type = self.REPORT_TYPE.get(report_type_code, report_type_code)
-        
-        report.serious = self._get_text(sr_elem, 'serious')
-        report.seriousness_death = self._get_text(sr_elem, 'seriousnessdeath')
-        report.seriousness_life_threatening = self._get_text(sr_elem, 'seriousnesslifethreatening')
-        report.seriousness_hospitalization = self._get_text(sr_elem, 'seriousnesshospitalization')
-        report.seriousness_disability = self._get_text(sr_elem, 'seriousnessdisabling')
-        report.seriousness_congenital = self._get_text(sr_elem, 'seriousnesscongenitalanomali')
-        report.seriousness_other = self._get_text(sr_elem, 'seriousnessother')
-        
-        report.receive_date = self._get_text(sr_elem, 'receivedate')
-        report.receipt_date = self._get_text(sr_elem, 'receiptdate')
-        
-        report.sender_type = self._get_text(sr_elem, './/sender/sendertype')
-        report.sender_organization = self._get_text(sr_elem, './/sender/senderorganization')
-        report.receiver_type = self._get_text(sr_elem, './/receiver/receivertype')
-        report.receiver_organization = self._get_text(sr_elem, './/receiver/receiverorganization')
-        
-        report.case_narrative = self._get_text(sr_elem, './/narrativeincludeclinical')
-        report.reporter_country = self._get_text(sr_elem, './/primarysource/reportercountry')
-        report.qualification = self._get_text(sr_elem, './/primarysource/qualification')
-        
-        patient_elem = sr_elem.find('.//patient')
+        """Parse a single safetyreport element in one pass over its children"""
+        if len(_VALUE_POOL) > VALUE_POOL_MAX:
+            _VALUE_POOL.clear()
+        values: Dict[str, Optional[str]] = {}
+        patient_elem = None
+
+        for child in sr_elem:
+            tag = child.tag
+            spec = self.REPORT_FIELDS.get(tag)
+            if spec is not None:
+                if spec[0] not in values:
+                    name, decode = spec
+                    text = child.text or None
+                    values[name] = decode(text, text) if decode and text else text
+            elif tag in self.REPORT_GROUP_FIELDS:
+                self._collect(child, self.REPORT_GROUP_FIELDS[tag], values)
+            elif tag == 'patient' and patient_elem is None:
+                patient_elem = child
+
+        report = SafetyReport(**values)
         if patient_elem is not None:
-            report.patient = self._parse_patient(patient_elem)
-            report.drugs = self._parse_drugs(patient_elem)
-            report.reactions = self._parse_reactions(patient_elem)
-        
+            self._parse_patient(patient_elem, report)
+        if self.hash_content or report.safety_report_id is None:
+            report.content_hash = element_content_hash(sr_elem)
+
         return report
 
-    def _parse_patient(self, patient_elem) -> Patient:
-        """Parse patient information"""
-        patient = Patient()
-        
-        patient.identifier = self._get_text(patient_elem, 'patientidentification') or self._get_text(patient_elem, 'patientonsetage')
-        patient.age = self._get_text(patient_elem, 'patientonsetage')
-        patient.age_unit = self._get_text(patient_elem, 'patientonsetageunit')
-        patient.birth_date = self._get_text(patient_elem, 'patientbirthdate')
-        
-        sex_code = self._get_text(patient_elem, 'patientsex')
-        patient.sex = self.SEX_MAP.get(sex_code, sex_code)
-        
-        patient.weight = self._get_text(patient_elem, 'patientweight')
-        patient.height = self._get_text(patient_elem, 'patientheight')
-        
+    def _parse_patient(self, patient_elem, report: SafetyReport) -> None:
+        """Parse patient information, drugs, reactions and narrative into report"""
+        values: Dict[str, Optional[str]] = {}
         medical_history_parts = []
-        for mh in patient_elem.findall('.//medicalhistoryepisode'):
-            mh_text = self._get_text(mh, 'patientmedicalhistorytext')
-            if mh_text:
-                medical_history_parts.append(mh_text)
+        drugs = []
+        reactions = []
+        narrative = None
+
+        for child in patient_elem:
+            tag = child.tag
+            spec = self.PATIENT_FIELDS.get(tag)
+            if spec is not None:
+                if spec[0] not in values:
+                    name, decode = spec
+                    text = child.text or None
+                    values[name] = decode(text, text) if decode and text else text
+            elif tag == 'drug':
+                drugs.append(self._parse_drug(child))
+            elif tag == 'reaction':
+                reactions.append(self._parse_reaction(child))
+            elif tag == 'medicalhistoryepisode':
+                mh = {}
+                self._collect(child, self.MEDICAL_HISTORY_FIELDS, mh)
+                if mh.get('text'):
+                    medical_history_parts.append(mh['text'])
+            elif tag == 'summary' and narrative is None:
+                summary = {}
+                self._collect(child, self.SUMMARY_FIELDS, summary)
+                narrative = summary.get('case_narrative')
+
+        patient = Patient(**values)
+        patient.identifier = patient.identifier or patient.age
         patient.medical_history = '; '.join(medical_history_parts) if medical_history_parts else None
-        
-        patient.death_date = self._get_text(patient_elem, 'patientdeathdate')
-        patient.autopsy = self._get_text(patient_elem, 'patientautopsyyesno')
-        
-        return patient
 
-    def _parse_drugs(self, patient_elem) -> List[Drug]:
-        """Parse drug information"""
-        drugs = []
-        
-        for drug_elem in patient_elem.findall('.//drug'):
-            drug = Drug()
-            
-            char_code = self._get_text(drug_elem, 'drugcharacterization')
-            drug.characterization = self.DRUG_CHARACTERIZATION.get(char_code, char_code)
-            
-            drug.medicinal_product = self._get_text(drug_elem, 'medicinalproduct')
-            drug.generic_name = self._get_text(drug_elem, 'activesubstancename')
-            drug.brand_name = self._get_text(drug_elem, 'obtaindrugcountry')
-            drug.batch_number = self._get_text(drug_elem, 'drugbatchnumb')
-            drug.authorization_number = self._get_text(drug_elem, 'drugauthorizationnumb')
-            drug.authorization_country = self._get_text(drug_elem, 'drugauthorizationcountry')
-            drug.authorization_holder = self._get_text(drug_elem, 'drugauthorizationholder')
-            drug.dosage_text = self._get_text(drug_elem, 'drugstructuredosagenumb')
-            drug.dosage_form = self._get_text(drug_elem, 'drugdosageform')
-            drug.route_of_admin = self._get_text(drug_elem, 'drugadministrationroute')
-            drug.indication = self._get_text(drug_elem, 'drugindication')
-            drug.start_date = self._get_text(drug_elem, 'drugstartdate')
-            drug.end_date = self._get_text(drug_elem, 'drugenddate')
-            drug.action_taken = self._get_text(drug_elem, 'actiondrug')
-            drug.recurrence = self._get_text(drug_elem, 'drugrecurreadministration')
-            
-            drugs.append(drug)
-        
-        return drugs
+        report.patient = patient
+        report.drugs = drugs
+        report.reactions = reactions
+        report.case_narrative = narrative
 
-    def _parse_reactions(self, patient_elem) -> List[Reaction]:
-        """Parse reaction/adverse event information"""
-        reactions = []
-        
-        for reaction_elem in patient_elem.findall('.//reaction'):
-            reaction = Reaction()
-            
-            reaction.meddra_pt = self._get_text(reaction_elem, 'primarysourcereaction') or self._get_text(reaction_elem, 'reactionmeddrapt')
-            reaction.meddra_pt_code = self._get_text(reaction_elem, 'reactionmeddraversionpt')
-            reaction.meddra_llt = self._get_text(reaction_elem, 'reactionmeddrallt')
-            reaction.meddra_llt_code = self._get_text(reaction_elem, 'reactionmeddraversionllt')
-            reaction.start_date = self._get_text(reaction_elem, 'reactionstartdate')
-            reaction.end_date = self._get_text(reaction_elem, 'reactionenddate')
-            reaction.duration = self._get_text(reaction_elem, 'reactionduration')
-            
-            outcome_code = self._get_text(reaction_elem, 'reactionoutcome')
-            reaction.outcome = self.REACTION_OUTCOME.get(outcome_code, outcome_code)
-            
-            reactions.append(reaction)
-        
-        return reactions
+    def _parse_drug(self, drug_elem) -> Drug:
+        """Parse a single drug element"""
+        values: Dict[str, Optional[str]] = {}
+        self._collect(drug_elem, self.DRUG_FIELDS, values)
+        return Drug(**values)
+
+    def _parse_reaction(self, reaction_elem) -> Reaction:
+        """Parse a single reaction/adverse event element"""
+        values: Dict[str, Optional[str]] = {}
+        self._collect(reaction_elem, self.REACTION_FIELDS, values)
+        return Reaction(**values)
 
     def to_snowflake_records(self) -> Dict[str, List[Dict]]:
         """Convert parsed reports to Snowflake-ready records"""
+        with self._timed('build'):
+            records = self._build_records()
+        self._count_rows(records)
+        return records
+
+    def _build_records(self) -> Dict[str, List[Dict]]:
         icsr_cases = []
         icsr_drugs = []
         icsr_reactions = []
         
         for report in self.reports:
-            case_id = report.safety_report_id or f"CASE_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            case_id = case_id_for(report)
             
-            icsr_cases.append({
-                'CASE_ID': case_id,
-                'SAFETY_REPORT_VERSION': report.safety_report_version,
-                'TRANSMISSION_DATE': report.transmission_date,
-                'REPORT_TYPE': report.report_type,
-                'SERIOUS': report.serious,
-                'SERIOUSNESS_DEATH': report.seriousness_death,
-                'SERIOUSNESS_LIFE_THREATENING': report.seriousness_life_threatening,
-                'SERIOUSNESS_HOSPITALIZATION': report.seriousness_hospitalization,
-                'SERIOUSNESS_DISABILITY': report.seriousness_disability,
-                'SERIOUSNESS_CONGENITAL': report.seriousness_congenital,
-                'SERIOUSNESS_OTHER': report.seriousness_other,
-                'RECEIVE_DATE': report.receive_date,
-                'RECEIPT_DATE': report.receipt_date,
-                'SENDER_TYPE': report.sender_type,
-                'SENDER_ORGANIZATION': report.sender_organization,
-                'RECEIVER_TYPE': report.receiver_type,
-                'RECEIVER_ORGANIZATION': report.receiver_organization,
-                'CASE_NARRATIVE': report.case_narrative,
-                'REPORTER_COUNTRY': report.reporter_country,
-                'QUALIFICATION': report.qualification,
-                'PATIENT_AGE': report.patient.age,
-                'PATIENT_AGE_UNIT': report.patient.age_unit,
-                'PATIENT_SEX': report.patient.sex,
-                'PATIENT_WEIGHT': report.patient.weight,
-                'PATIENT_HEIGHT': report.patient.height,
-                'PATIENT_MEDICAL_HISTORY': report.patient.medical_history,
-                'PATIENT_DEATH_DATE': report.patient.death_date,
-                'INGESTION_TIMESTAMP': datetime.now().isoformat()
-            })
+            case = {'CASE_ID': case_id}
+            for name, get in self.CASE_COLUMNS:
+                case[name] = get(report)
+            case['INGESTION_TIMESTAMP'] = datetime.now().isoformat()
+            icsr_cases.append(case)
             
             for idx, drug in enumerate(report.drugs, 1):
-                icsr_drugs.append({
-                    'CASE_ID': case_id,
-                    'DRUG_SEQ': idx,
-                    'DRUG_CHARACTERIZATION': drug.characterization,
-                    'MEDICINAL_PRODUCT': drug.medicinal_product,
-                    'GENERIC_NAME': drug.generic_name,
-                    'BATCH_NUMBER': drug.batch_number,
-                    'AUTHORIZATION_NUMBER': drug.authorization_number,
-                    'AUTHORIZATION_COUNTRY': drug.authorization_country,
-                    'AUTHORIZATION_HOLDER': drug.authorization_holder,
-                    'DOSAGE_TEXT': drug.dosage_text,
-                    'DOSAGE_FORM': drug.dosage_form,
-                    'ROUTE_OF_ADMIN': drug.route_of_admin,
-                    'INDICATION': drug.indication,
-                    'START_DATE': drug.start_date,
-                    'END_DATE': drug.end_date,
-                    'ACTION_TAKEN': drug.action_taken
-                })
+                row = {'CASE_ID': case_id, 'DRUG_SEQ': idx}
+                for name, get in self.DRUG_COLUMNS:
+                    row[name] = get(drug)
+                icsr_drugs.append(row)
             
             for idx, reaction in enumerate(report.reactions, 1):
-                icsr_reactions.append({
-                    'CASE_ID': case_id,
-                    'REACTION_SEQ': idx,
-                    'MEDDRA_PT': reaction.meddra_pt,
-                    'MEDDRA_PT_CODE': reaction.meddra_pt_code,
-                    'MEDDRA_LLT': reaction.meddra_llt,
-                    'MEDDRA_LLT_CODE': reaction.meddra_llt_code,
-                    'START_DATE': reaction.start_date,
-                    'END_DATE': reaction.end_date,
-                    'DURATION': reaction.duration,
-                    'OUTCOME': reaction.outcome
-                })
+                row = {'CASE_ID': case_id, 'REACTION_SEQ': idx}
+                for name, get in self.REACTION_COLUMNS:
+                    row[name] = get(reaction)
+                icsr_reactions.append(row)
+
+        if self.meddra is not None:
+            self.meddra.code_records(icsr_reactions)
+        else:
+            for row in icsr_reactions:
+                row.update(dict.fromkeys(self.CODED_REACTION_COLUMNS))
         
-        return {
+        records = {
             'ICSR_CASES': icsr_cases,
             'ICSR_DRUGS': icsr_drugs,
             'ICSR_REACTIONS': icsr_reactions
         }
+        return normalize_records(records) if self.normalize else records
+
+    def to_snowflake_columns(self) -> Dict[str, Dict[str, Any]]:
+        """Convert parsed reports to one column-oriented batch per table.
+
+        Returns ``{table: {column: values}}`` with the same tables and columns
+        as to_snowflake_records(). Sequence columns are ``array('q')``, the
+        rest are lists, so ``pandas.DataFrame(batch['ICSR_CASES'])`` or
+        ``pyarrow.table(batch['ICSR_CASES'])`` builds a frame column by column.
+        """
+        return self._build_columns(self.reports, datetime.now().isoformat())
+
+    def iter_column_batches(self, source: Optional[XMLSource] = None,
+                            batch_size: int = 10_000) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Stream column-oriented batches of batch_size cases while parsing.
+
+        Built on iter_reports(), so memory is bounded by one batch. Each batch
+        has the same layout as to_snowflake_columns().
+        """
+        batch: List[SafetyReport] = []
+        for report in self.iter_reports(source):
+            batch.append(report)
+            if len(batch) == batch_size:
+                yield self._build_columns(batch, datetime.now().isoformat())
+                batch = []
+        if batch:
+            yield self._build_columns(batch, datetime.now().isoformat())
+
+    def _build_columns(self, reports: List[SafetyReport], ingestion_timestamp: str) -> Dict[str, Dict[str, Any]]:
+        """Transpose reports into per-table column lists"""
+        with self._timed('build'):
+            batch = self._transpose(reports, ingestion_timestamp)
+        self._count_rows(batch)
+        return batch
+
+    def _transpose(self, reports: List[SafetyReport], ingestion_timestamp: str) -> Dict[str, Dict[str, Any]]:
+        cases = {name: [] for name in self.CASE_COLUMN_NAMES}
+        drugs = {name: [] for name in self.DRUG_COLUMN_NAMES}
+        reactions = {name: [] for name in self.REACTION_COLUMN_NAMES}
+        drugs['DRUG_SEQ'] = array('q')
+        reactions['REACTION_SEQ'] = array('q')
+
+        case_columns = [(cases[name], get) for name, get in self.CASE_COLUMNS]
+        drug_columns = [(drugs[name], get) for name, get in self.DRUG_COLUMNS]
+        reaction_columns = [(reactions[name], get) for name, get in self.REACTION_COLUMNS]
+
+        for report in reports:
+            case_id = case_id_for(report)
+            cases['CASE_ID'].append(case_id)
+            for column, get in case_columns:
+                column.append(get(report))
+
+            n_drugs = len(report.drugs)
+            drugs['CASE_ID'].extend([case_id] * n_drugs)
+            drugs['DRUG_SEQ'].extend(range(1, n_drugs + 1))
+            for column, get in drug_columns:
+                column.extend(map(get, report.drugs))
+
+            n_reactions = len(report.reactions)
+            reactions['CASE_ID'].extend([case_id] * n_reactions)
+            reactions['REACTION_SEQ'].extend(range(1, n_reactions + 1))
+            for column, get in reaction_columns:
+                column.extend(map(get, report.reactions))
+
+        cases['INGESTION_TIMESTAMP'] = [ingestion_timestamp] * len(reports)
+        if self.meddra is not None:
+            self.meddra.code_columns(reactions)
+        else:
+            for name in self.CODED_REACTION_COLUMNS:
+                reactions[name] = [None] * len(reactions['CASE_ID'])
+
+        batch = {
+            'ICSR_CASES': cases,
+            'ICSR_DRUGS': drugs,
+            'ICSR_REACTIONS': reactions
+        }
+        return normalize_columns(batch) if self.normalize else batch
 
 
 def parse_e2b_xml(xml_content: str) -> Dict[str, List[Dict]]:
@@ -337,3 +985,76 @@ def parse_e2b_xml(xml_content: str) -> Dict[str, List[Dict]]:
     parser = E2BR2Parser(xml_content)
     parser.parse()
     return parser.to_snowflake_records()
+
+
+def _parse_e2b_file(path: str, backend: Optional[str] = None) -> Tuple[Optional[Dict[str, List[Dict]]], Optional[str]]:
+    """Parse one E2B(R2) file, returning (records, None) or (None, error)"""
+    try:
+        parser = E2BR2Parser(backend=backend)
+        parser.reports = list(parser.iter_reports(path))
+        return parser.to_snowflake_records(), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def parse_e2b_upload(name: str, data: bytes, backend: Optional[str] = None
+                     ) -> Tuple[Optional[Dict[str, Dict[str, Any]]], Optional[str], float]:
+    """Parse one uploaded E2B(R2) file held in memory, returning (columns, error, seconds).
+
+    data is plain XML, gzip-compressed XML or a zip bundle; columns is laid
+    out as to_snowflake_columns(). Arguments and results are picklable and
+    the function lives in an importable module, so apps can map it over a
+    ProcessPoolExecutor under any start method; spawned workers cannot
+    import functions defined in a script's __main__.
+    """
+    start = time.perf_counter()
+    upload = io.BytesIO(data)
+    upload.name = name
+    try:
+        parser = E2BR2Parser(backend=backend)
+        parser.reports = list(parser.iter_reports(upload))
+        columns = parser.to_snowflake_columns()
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+    return columns, None, time.perf_counter() - start
+
+
+def parse_e2b_directory(path: str, workers: Optional[int] = None,
+                        pattern: Union[str, Tuple[str, ...]] = E2B_FILE_PATTERNS,
+                        backend: Optional[str] = None) -> Tuple[Dict[str, List[Dict]], List[Dict[str, str]]]:
+    """Parse every E2B(R2) file in a directory across a process pool.
+
+    Plain .xml, gzip-compressed .xml.gz and .zip bundles are picked up by
+    default. Files are processed and merged in sorted filename order, so
+    output is deterministic regardless of worker count. A file that fails to parse is
+    reported in the returned error list and does not abort the batch.
+
+    Returns (records, errors): records has the same tables as
+    parse_e2b_xml(); errors is a list of {'FILE': ..., 'ERROR': ...}.
+    """
+    patterns = (pattern,) if isinstance(pattern, str) else pattern
+    files = sorted({f for p in patterns for f in glob.glob(os.path.join(path, p))})
+    workers = workers or os.cpu_count() or 1
+    parse_file = partial(_parse_e2b_file, backend=backend)
+
+    if workers == 1 or len(files) <= 1:
+        results = map(parse_file, files)
+        return _merge_file_results(files, results)
+
+    chunksize = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(parse_file, files, chunksize=chunksize)
+        return _merge_file_results(files, results)
+
+
+def _merge_file_results(files, results) -> Tuple[Dict[str, List[Dict]], List[Dict[str, str]]]:
+    """Concatenate per-file records in file order and collect per-file errors"""
+    merged = {'ICSR_CASES': [], 'ICSR_DRUGS': [], 'ICSR_REACTIONS': []}
+    errors = []
+    for file_path, (records, error) in zip(files, results):
+        if error is not None:
+            errors.append({'FILE': file_path, 'ERROR': error})
+            continue
+        for table, rows in records.items():
+            merged[table].extend(rows)
+    return merged, errors
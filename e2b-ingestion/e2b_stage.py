@@ -0,0 +1,450 @@
+"""
+Staged bulk loading of E2B(R2) records for large backfills.
+Parsed column batches are written to compressed CSV (or Parquet) part files,
+uploaded to a stage in parallel, and loaded with one COPY INTO per table,
+either appended or upserted by safety report version through temporary
+staging tables. LocalStage stands in for a Snowflake stage so the whole
+path runs offline.
+"""
+
+import os
+import csv
+import gzip
+import shutil
+import sqlite3
+import tempfile
+from contextlib import nullcontext
+from datetime import datetime
+from typing import List, Optional, Dict, Tuple, Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from e2b_parser import E2BR2Parser, IngestionStats, XMLSource
+
+
+DEFAULT_STAGE = 'HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE'
+
+# Parser output table -> (Snowflake table, loaded columns), as created by sql/01_setup_tables.sql
+TARGET_TABLES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'ICSR_CASES': ('E2B_ICSR_CASES', (
+        'CASE_ID', 'SAFETY_REPORT_VERSION', 'TRANSMISSION_DATE', 'REPORT_TYPE', 'SERIOUS',
+        'SERIOUSNESS_DEATH', 'SERIOUSNESS_LIFE_THREATENING', 'SERIOUSNESS_HOSPITALIZATION',
+        'SERIOUSNESS_DISABILITY', 'SERIOUSNESS_CONGENITAL', 'SERIOUSNESS_OTHER', 'RECEIVE_DATE',
+        'RECEIPT_DATE', 'SENDER_ORGANIZATION', 'RECEIVER_ORGANIZATION', 'CASE_NARRATIVE',
+        'REPORTER_COUNTRY', 'QUALIFICATION', 'PATIENT_AGE', 'PATIENT_SEX', 'PATIENT_WEIGHT',
+        'PATIENT_MEDICAL_HISTORY', 'PATIENT_DEATH_DATE', 'INGESTION_TIMESTAMP',
+    )),
+    'ICSR_DRUGS': ('E2B_ICSR_DRUGS', (
+        'CASE_ID', 'DRUG_SEQ', 'DRUG_CHARACTERIZATION', 'MEDICINAL_PRODUCT', 'GENERIC_NAME',
+        'BATCH_NUMBER', 'AUTHORIZATION_HOLDER', 'DOSAGE_TEXT', 'DOSAGE_FORM', 'ROUTE_OF_ADMIN',
+        'INDICATION', 'START_DATE', 'END_DATE', 'ACTION_TAKEN',
+    )),
+    'ICSR_REACTIONS': ('E2B_ICSR_REACTIONS', (
+        'CASE_ID', 'REACTION_SEQ', 'VERBATIM_TERM', 'MEDDRA_PT', 'MEDDRA_PT_CODE', 'MEDDRA_LLT', 'START_DATE',
+        'END_DATE', 'OUTCOME', 'MEDDRA_CODED_PT', 'MEDDRA_SOC', 'CODING_MATCH', 'CODING_CONFIDENCE',
+    )),
+}
+
+# Primary key per parser output table
+KEY_COLUMNS = {
+    'ICSR_CASES': ('CASE_ID',),
+    'ICSR_DRUGS': ('CASE_ID', 'DRUG_SEQ'),
+    'ICSR_REACTIONS': ('CASE_ID', 'REACTION_SEQ'),
+}
+
+# Child rows are staged with their case's version so follow-ups replace them as a unit
+CHILD_TABLES = ('ICSR_DRUGS', 'ICSR_REACTIONS')
+VERSION_COLUMN = 'SAFETY_REPORT_VERSION'
+STAGING_SUFFIX = '_STAGE'
+
+# NULL marker in CSV part files, distinct from an empty string
+CSV_NULL = '\\N'
+
+PART_SUFFIXES = {'csv': '.csv.gz', 'parquet': '.parquet'}
+
+# Snowflake FILE_FORMAT options per part file format
+FILE_FORMATS = {
+    'csv': ("TYPE = CSV COMPRESSION = GZIP FIELD_OPTIONALLY_ENCLOSED_BY = '\"' "
+            "ESCAPE_UNENCLOSED_FIELD = NONE NULL_IF = ('\\\\N')"),
+    'parquet': "TYPE = PARQUET",
+}
+
+
+# ---------------------------------------------------------------------------
+# Part files
+# ---------------------------------------------------------------------------
+
+def _write_csv_part(path: str, columns: Dict[str, Sequence], names: Sequence[str]) -> None:
+    with gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=6) as f:
+        writer = csv.writer(f)
+        writer.writerows(
+            [CSV_NULL if value is None else value for value in row]
+            for row in zip(*(columns[name] for name in names))
+        )
+
+
+def _write_parquet_part(path: str, columns: Dict[str, Sequence], names: Sequence[str]) -> None:
+    table = pa.table({name: list(columns[name]) for name in names})
+    pq.write_table(table, path, compression='snappy')
+
+
+def staging_columns(table: str) -> Tuple[str, ...]:
+    """Columns of a table's upsert staging table: the target columns, plus the case version for child tables"""
+    columns = TARGET_TABLES[table][1]
+    return columns + (VERSION_COLUMN,) if table in CHILD_TABLES else columns
+
+
+def child_case_rows(case_ids: Sequence[str], children: Dict[str, Sequence], seq_column: str) -> List[int]:
+    """Index into case_ids of the owning case of each child row.
+
+    Child rows follow case order and each case's sequence restarts at 1, so
+    two versions of one case in the same batch keep their own rows apart.
+    """
+    result = []
+    j = -1
+    for case_id, seq in zip(children['CASE_ID'], children[seq_column]):
+        if seq == 1:
+            j += 1
+            while case_ids[j] != case_id:
+                j += 1
+        result.append(j)
+    return result
+
+
+def child_versions(cases: Dict[str, Sequence], children: Dict[str, Sequence], seq_column: str) -> List:
+    """The owning case's version for each child row"""
+    versions = cases[VERSION_COLUMN]
+    return [versions[j] for j in child_case_rows(cases['CASE_ID'], children, seq_column)]
+
+
+def write_part_files(source: XMLSource, out_dir: str, fmt: str = 'csv', batch_size: int = 50_000,
+                     backend: Optional[str] = None, staging: bool = False,
+                     stats: Optional[IngestionStats] = None, detector=None,
+                     meddra=None) -> Dict[str, List[str]]:
+    """Parse source and write one part file per table per batch of batch_size cases.
+
+    Parts go to out_dir/<table>/part-NNNNN.csv.gz (or .parquet). With
+    staging, parts have the upsert staging_columns(). Returns
+    {parser table: [part paths]}. Parquet needs pyarrow. stats, if given,
+    times parsing and counts writing the parts as 'write'. detector (an
+    e2b_dedup.DuplicateDetector) sees every batch. meddra (an
+    e2b_meddra.MedDRADictionary) codes the reactions.
+    """
+    if fmt not in PART_SUFFIXES:
+        raise ValueError(f"Unknown part file format {fmt!r}; choose from {sorted(PART_SUFFIXES)}")
+    if fmt == 'parquet' and pa is None:
+        raise ImportError("Parquet part files require pyarrow")
+    write_part = _write_csv_part if fmt == 'csv' else _write_parquet_part
+
+    parts: Dict[str, List[str]] = {table: [] for table in TARGET_TABLES}
+    for table in TARGET_TABLES:
+        os.makedirs(os.path.join(out_dir, table), exist_ok=True)
+
+    parser = E2BR2Parser(backend=backend, stats=stats, meddra=meddra)
+    for i, batch in enumerate(parser.iter_column_batches(source, batch_size)):
+        if detector is not None:
+            detector.add_batch(batch)
+        if staging:
+            for table, seq_column in zip(CHILD_TABLES, ('DRUG_SEQ', 'REACTION_SEQ')):
+                batch[table][VERSION_COLUMN] = child_versions(batch['ICSR_CASES'], batch[table], seq_column)
+        for table in TARGET_TABLES:
+            if not batch[table]['CASE_ID']:
+                continue
+            names = staging_columns(table) if staging else TARGET_TABLES[table][1]
+            path = os.path.join(out_dir, table, f"part-{i:05d}{PART_SUFFIXES[fmt]}")
+            with stats.timed('write') if stats is not None else nullcontext():
+                write_part(path, batch[table], names)
+            parts[table].append(path)
+    return parts
+
+
+# ---------------------------------------------------------------------------
+# Versioned upsert
+# ---------------------------------------------------------------------------
+
+def qualified_name(target_schema: Optional[str], table: str) -> str:
+    """table under target_schema (DB.SCHEMA), or unqualified when target_schema is None"""
+    return f"{target_schema}.{table}" if target_schema else table
+
+
+def _upsert_names(target_schema: Optional[str], quote=str,
+                  staging_suffix: str = STAGING_SUFFIX) -> Dict[str, Tuple[str, str]]:
+    """Parser table -> (target table, staging table), qualified and quoted"""
+    return {
+        table: (quote(qualified_name(target_schema, target)), quote(qualified_name(target_schema, target + staging_suffix)))
+        for table, (target, _) in TARGET_TABLES.items()
+    }
+
+
+def _child_replace_sql(names: Dict[str, Tuple[str, str]], same_version: str,
+                       insert: str = 'INSERT INTO', dedupe: str = '') -> List[str]:
+    """DELETE + INSERT per child table, replacing the rows of every case whose staged version was applied.
+
+    Runs after the case upsert: a case was applied iff its target row now
+    has the staged version. same_version is a null-safe equality template.
+    """
+    cases, staged_cases = names['ICSR_CASES']
+    applied = (f"SELECT s.CASE_ID FROM {staged_cases} s JOIN {cases} t ON t.CASE_ID = s.CASE_ID "
+               f"AND {same_version.format('t', 's')}")
+    statements = []
+    for table in CHILD_TABLES:
+        target, staged = names[table]
+        columns = TARGET_TABLES[table][1]
+        statements.append(f"DELETE FROM {target} WHERE CASE_ID IN ({applied})")
+        statements.append(
+            f"{insert} {target} ({', '.join(columns)}) "
+            f"SELECT {', '.join('d.' + c for c in columns)} FROM {staged} d "
+            f"JOIN {cases} t ON t.CASE_ID = d.CASE_ID AND {same_version.format('t', 'd')}"
+            + dedupe.format(', '.join('d.' + c for c in KEY_COLUMNS[table]))
+        )
+    return statements
+
+
+def snowflake_upsert_sql(target_schema: Optional[str] = None,
+                         staging_suffix: str = STAGING_SUFFIX) -> Tuple[List[str], List[str]]:
+    """(staging DDL, upsert transaction) statements for a versioned upsert in Snowflake.
+
+    The staging DDL creates empty temporary staging tables shaped like the
+    targets, named after them plus staging_suffix (give concurrent loads on
+    one session their own). The transaction applies one MERGE to the cases,
+    keeping the highest SAFETY_REPORT_VERSION (ties replace, older versions
+    are ignored), then replaces the drug and reaction rows of every applied
+    case.
+    """
+    names = _upsert_names(target_schema, staging_suffix=staging_suffix)
+    staging_ddl = []
+    for table, (target, staged) in names.items():
+        staging_ddl.append(f"CREATE OR REPLACE TEMPORARY TABLE {staged} LIKE {target}")
+        if table in CHILD_TABLES:
+            staging_ddl.append(f"ALTER TABLE {staged} ADD COLUMN {VERSION_COLUMN} VARCHAR(10)")
+
+    cases, staged_cases = names['ICSR_CASES']
+    columns = TARGET_TABLES['ICSR_CASES'][1]
+    version = f"COALESCE(TRY_TO_NUMBER({{}}.{VERSION_COLUMN}), 0)"
+    merge = (
+        f"MERGE INTO {cases} t USING ("
+        f"SELECT * FROM {staged_cases} QUALIFY ROW_NUMBER() OVER ("
+        f"PARTITION BY CASE_ID ORDER BY TRY_TO_NUMBER({VERSION_COLUMN}) DESC NULLS LAST) = 1"
+        f") s ON t.CASE_ID = s.CASE_ID "
+        f"WHEN MATCHED AND {version.format('s')} >= {version.format('t')} THEN UPDATE SET "
+        + ', '.join(f"{c} = s.{c}" for c in columns if c != 'CASE_ID')
+        + f" WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}) VALUES ({', '.join('s.' + c for c in columns)})"
+    )
+    children = _child_replace_sql(
+        names, f"EQUAL_NULL({{0}}.{VERSION_COLUMN}, {{1}}.{VERSION_COLUMN})",
+        dedupe=" QUALIFY ROW_NUMBER() OVER (PARTITION BY {0} ORDER BY {0}) = 1")
+    return staging_ddl, [merge] + children
+
+
+def sqlite_upsert_sql(target_schema: Optional[str] = None) -> List[str]:
+    """SQLite counterpart of snowflake_upsert_sql()'s transaction, for LocalStage"""
+    names = _upsert_names(target_schema, quote=lambda name: f'"{name}"')
+    cases, staged_cases = names['ICSR_CASES']
+    columns = TARGET_TABLES['ICSR_CASES'][1]
+    version = f"COALESCE(CAST({{}}.{VERSION_COLUMN} AS REAL), 0)"
+    upsert = (
+        f"INSERT INTO {cases} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM {staged_cases} "
+        f"WHERE true ORDER BY CAST({VERSION_COLUMN} AS REAL) "
+        f"ON CONFLICT (CASE_ID) DO UPDATE SET "
+        + ', '.join(f"{c} = excluded.{c}" for c in columns if c != 'CASE_ID')
+        + f" WHERE {version.format('excluded')} >= {version.format(cases)}"
+    )
+    children = _child_replace_sql(
+        names, f"{{0}}.{VERSION_COLUMN} IS {{1}}.{VERSION_COLUMN}", insert='INSERT OR REPLACE INTO')
+    return [upsert] + children
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+
+class SnowflakeStage:
+    """Internal Snowflake stage, driven through a Snowpark session"""
+
+    def __init__(self, session, name: str = DEFAULT_STAGE):
+        self.session = session
+        self.name = name
+
+    def put(self, local_path: str, prefix: str) -> None:
+        # Part files are already compressed
+        self.session.file.put(local_path, f"@{self.name}/{prefix}", auto_compress=False, overwrite=True)
+
+    def copy_into(self, table: str, columns: Sequence[str], prefix: str, fmt: str) -> int:
+        """Load every part file under prefix into table with one COPY INTO; returns rows loaded"""
+        if fmt == 'parquet':
+            target, match = table, " MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE"
+        else:
+            target, match = f"{table} ({', '.join(columns)})", ""
+        result = self.session.sql(
+            f"COPY INTO {target} FROM @{self.name}/{prefix}/ "
+            f"FILE_FORMAT = ({FILE_FORMATS[fmt]}){match} ON_ERROR = ABORT_STATEMENT"
+        ).collect()
+        return sum(row.as_dict().get('rows_loaded', 0) or 0 for row in result)
+
+    def create_staging(self, target_schema: Optional[str] = None) -> None:
+        for statement in snowflake_upsert_sql(target_schema)[0]:
+            self.session.sql(statement).collect()
+
+    def upsert(self, target_schema: Optional[str] = None) -> None:
+        """Apply the staging tables to the targets in one transaction"""
+        self.session.sql("BEGIN").collect()
+        try:
+            for statement in snowflake_upsert_sql(target_schema)[1]:
+                self.session.sql(statement).collect()
+        except Exception:
+            self.session.sql("ROLLBACK").collect()
+            raise
+        self.session.sql("COMMIT").collect()
+
+    def insert_rows(self, table: str, columns: Sequence[str], rows: List[Tuple], replace: bool = False) -> int:
+        """Append rows built client-side (e.g. review candidates) with one DataFrame write.
+
+        With replace, the table is truncated first, keeping its definition.
+        """
+        self.session.create_dataframe([list(row) for row in rows], schema=list(columns)) \
+            .write.mode('truncate' if replace else 'append').save_as_table(table, column_order='name')
+        return len(rows)
+
+    def remove(self, prefix: str) -> None:
+        self.session.sql(f"REMOVE @{self.name}/{prefix}/").collect()
+
+
+class LocalStage:
+    """Local-filesystem stand-in for a stage, loading into SQLite instead of Snowflake.
+
+    put() copies part files under root; copy_into() reads them back and
+    inserts the rows into a SQLite table of the same name (created on first
+    load), so staged ingestion can be exercised and checked offline.
+    """
+
+    def __init__(self, root: str, conn: Optional[sqlite3.Connection] = None):
+        self.root = root
+        self.conn = conn or sqlite3.connect(':memory:', check_same_thread=False)
+
+    def put(self, local_path: str, prefix: str) -> None:
+        dest = os.path.join(self.root, prefix)
+        os.makedirs(dest, exist_ok=True)
+        shutil.copy2(local_path, dest)
+
+    def _read_part(self, path: str, columns: Sequence[str], fmt: str):
+        if fmt == 'parquet':
+            return [tuple(row[name] for name in columns) for row in pq.read_table(path).to_pylist()]
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+            return [tuple(None if value == CSV_NULL else value for value in row) for row in csv.reader(f)]
+
+    def _create_table(self, table: str, columns: Sequence[str], key: Sequence[str] = ()) -> None:
+        primary_key = f", PRIMARY KEY ({', '.join(key)})" if key else ''
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({", ".join(columns)}{primary_key})')
+
+    def copy_into(self, table: str, columns: Sequence[str], prefix: str, fmt: str) -> int:
+        directory = os.path.join(self.root, prefix)
+        self._create_table(table, columns)
+        placeholders = ', '.join('?' * len(columns))
+        loaded = 0
+        with self.conn:
+            for name in sorted(os.listdir(directory)):
+                rows = self._read_part(os.path.join(directory, name), columns, fmt)
+                self.conn.executemany(
+                    f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({placeholders})', rows)
+                loaded += len(rows)
+        return loaded
+
+    def create_staging(self, target_schema: Optional[str] = None) -> None:
+        for table, (target, _) in TARGET_TABLES.items():
+            staged = qualified_name(target_schema, target + STAGING_SUFFIX)
+            self.conn.execute(f'DROP TABLE IF EXISTS "{staged}"')
+            self._create_table(staged, staging_columns(table))
+            self._create_table(qualified_name(target_schema, target), TARGET_TABLES[table][1], KEY_COLUMNS[table])
+
+    def upsert(self, target_schema: Optional[str] = None) -> None:
+        with self.conn:
+            for statement in sqlite_upsert_sql(target_schema):
+                self.conn.execute(statement)
+
+    def insert_rows(self, table: str, columns: Sequence[str], rows: List[Tuple], replace: bool = False) -> int:
+        self._create_table(table, columns)
+        with self.conn:
+            if replace:
+                self.conn.execute(f'DELETE FROM "{table}"')
+            self.conn.executemany(
+                f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})', rows)
+        return len(rows)
+
+    def remove(self, prefix: str) -> None:
+        shutil.rmtree(os.path.join(self.root, prefix), ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Staged ingestion
+# ---------------------------------------------------------------------------
+
+def load_staged(source: XMLSource, stage, target_schema: Optional[str] = None, fmt: str = 'csv',
+                workers: int = 8, batch_size: int = 50_000, backend: Optional[str] = None,
+                work_dir: Optional[str] = None, keep_staged: bool = False,
+                upsert: bool = False, stats: Optional[IngestionStats] = None,
+                detector=None, meddra=None) -> Dict[str, int]:
+    """Parse source into part files, PUT them in parallel, then COPY INTO each table.
+
+    stage is a SnowflakeStage or LocalStage. target_schema qualifies the
+    table names (e.g. 'HCLS_DEMO.PHARMACOVIGILANCE'). Part files are written
+    to a temporary directory unless work_dir is given, and removed from the
+    stage after loading unless keep_staged. Returns rows loaded per table.
+
+    With upsert, parts are copied into temporary staging tables and applied
+    by version (see snowflake_upsert_sql()) instead of appended, so follow-up
+    reports replace their case and its drug and reaction rows.
+
+    stats (an IngestionStats) receives per-stage timings; PUT, COPY and
+    upsert count as 'write'.
+
+    detector (an e2b_dedup.DuplicateDetector) scores each new case against
+    the cases it has seen; its suspected duplicates are appended to the
+    E2B_DUPLICATE_CANDIDATES review table after the load.
+
+    meddra (an e2b_meddra.MedDRADictionary, or an
+    e2b_autocoder.MedDRAAutocoder to also code verbatim text) fills each
+    reaction's MEDDRA_CODED_PT, MEDDRA_SOC, CODING_MATCH and
+    CODING_CONFIDENCE; without one they load as NULL.
+    """
+    prefix = f"e2b_load_{datetime.now():%Y%m%d_%H%M%S_%f}"
+    with tempfile.TemporaryDirectory() as tmp:
+        parts = write_part_files(source, work_dir or tmp, fmt, batch_size, backend, staging=upsert,
+                                 stats=stats, detector=detector, meddra=meddra)
+        with stats.timed('write') if stats is not None else nullcontext():
+            loaded = _put_and_copy(stage, parts, prefix, target_schema, fmt, workers, upsert)
+            if detector is not None:
+                loaded['E2B_DUPLICATE_CANDIDATES'] = detector.save(stage, target_schema)
+
+    if not keep_staged:
+        stage.remove(prefix)
+    return loaded
+
+
+def _put_and_copy(stage, parts: Dict[str, List[str]], prefix: str, target_schema: Optional[str],
+                  fmt: str, workers: int, upsert: bool) -> Dict[str, int]:
+    """PUT part files under prefix in parallel, then COPY (and optionally upsert) each table"""
+    uploads = [(path, f"{prefix}/{table}") for table, paths in parts.items() for path in paths]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(lambda upload: stage.put(*upload), uploads))
+
+    if upsert:
+        stage.create_staging(target_schema)
+    loaded = {}
+    for table, (target_table, columns) in TARGET_TABLES.items():
+        if not parts[table]:
+            loaded[target_table] = 0
+            continue
+        if upsert:
+            into, columns = target_table + STAGING_SUFFIX, staging_columns(table)
+        else:
+            into = target_table
+        loaded[target_table] = stage.copy_into(
+            qualified_name(target_schema, into), columns, f"{prefix}/{table}", fmt)
+    if upsert:
+        stage.upsert(target_schema)
+    return loaded
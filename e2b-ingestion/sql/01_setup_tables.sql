@@ -3,6 +3,10 @@
 -- ICH E2B(R2) compliant XML parser tables for Individual Case Safety Reports
 -- ============================================================================
 
+-- Before running, set the warehouse of the E2B_CASE_SUMMARY_REFRESH task
+-- (Step 3, COMPUTE_WH below). Its WHEN clause only starts that warehouse
+-- when a change stream has data, so the 1-minute schedule costs nothing idle.
+
 -- Step 1: Create Database and Schema
 CREATE DATABASE IF NOT EXISTS HCLS_DEMO;
 CREATE SCHEMA IF NOT EXISTS HCLS_DEMO.PHARMACOVIGILANCE;
@@ -19,7 +23,7 @@ USE SCHEMA PHARMACOVIGILANCE;
 CREATE TABLE IF NOT EXISTS E2B_ICSR_CASES (
     CASE_ID VARCHAR(100) PRIMARY KEY,
     SAFETY_REPORT_VERSION VARCHAR(10),
-    TRANSMISSION_DATE VARCHAR(20),
+    TRANSMISSION_DATE DATE,
     REPORT_TYPE VARCHAR(50),
     SERIOUS VARCHAR(5),
     SERIOUSNESS_DEATH VARCHAR(5),
@@ -28,18 +32,18 @@ CREATE TABLE IF NOT EXISTS E2B_ICSR_CASES (
     SERIOUSNESS_DISABILITY VARCHAR(5),
     SERIOUSNESS_CONGENITAL VARCHAR(5),
     SERIOUSNESS_OTHER VARCHAR(5),
-    RECEIVE_DATE VARCHAR(20),
-    RECEIPT_DATE VARCHAR(20),
+    RECEIVE_DATE DATE,
+    RECEIPT_DATE DATE,
     SENDER_ORGANIZATION VARCHAR(200),
     RECEIVER_ORGANIZATION VARCHAR(200),
     CASE_NARRATIVE TEXT,
     REPORTER_COUNTRY VARCHAR(10),
     QUALIFICATION VARCHAR(50),
-    PATIENT_AGE VARCHAR(20),
+    PATIENT_AGE NUMBER(6,2),       -- years (patientonsetage converted by its unit)
     PATIENT_SEX VARCHAR(20),
     PATIENT_WEIGHT VARCHAR(20),
     PATIENT_MEDICAL_HISTORY TEXT,
-    PATIENT_DEATH_DATE VARCHAR(20),
+    PATIENT_DEATH_DATE DATE,
     INGESTION_TIMESTAMP TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
 );
 
@@ -56,8 +60,8 @@ CREATE TABLE IF NOT EXISTS E2B_ICSR_DRUGS (
     DOSAGE_FORM VARCHAR(100),
     ROUTE_OF_ADMIN VARCHAR(100),
     INDICATION VARCHAR(500),
-    START_DATE VARCHAR(20),
-    END_DATE VARCHAR(20),
+    START_DATE DATE,
+    END_DATE DATE,
     ACTION_TAKEN VARCHAR(100),
     PRIMARY KEY (CASE_ID, DRUG_SEQ)
 );
@@ -66,39 +70,313 @@ CREATE TABLE IF NOT EXISTS E2B_ICSR_DRUGS (
 CREATE TABLE IF NOT EXISTS E2B_ICSR_REACTIONS (
     CASE_ID VARCHAR(100),
     REACTION_SEQ INT,
+    VERBATIM_TERM VARCHAR(500),         -- reporter's own wording (primarysourcereaction)
     MEDDRA_PT VARCHAR(500),
     MEDDRA_PT_CODE VARCHAR(20),
     MEDDRA_LLT VARCHAR(500),
-    START_DATE VARCHAR(20),
-    END_DATE VARCHAR(20),
+    START_DATE DATE,
+    END_DATE DATE,
     OUTCOME VARCHAR(100),
+    MEDDRA_CODED_PT NUMBER(8),          -- PT code from the MedDRA dictionary at ingest (e2b_meddra.py)
+    MEDDRA_SOC VARCHAR(500),            -- primary SOC of MEDDRA_CODED_PT
+    CODING_MATCH VARCHAR(20),           -- reported, exact, normalized, tokens or fuzzy (e2b_autocoder.py)
+    CODING_CONFIDENCE NUMBER(4,3),      -- 1 for reported codes; fuzzy matches score their n-gram similarity
     PRIMARY KEY (CASE_ID, REACTION_SEQ)
 );
+-- Tables created before MedDRA coding
+ALTER TABLE E2B_ICSR_REACTIONS ADD COLUMN IF NOT EXISTS MEDDRA_CODED_PT NUMBER(8);
+ALTER TABLE E2B_ICSR_REACTIONS ADD COLUMN IF NOT EXISTS MEDDRA_SOC VARCHAR(500);
+-- Tables created before verbatim autocoding
+ALTER TABLE E2B_ICSR_REACTIONS ADD COLUMN IF NOT EXISTS VERBATIM_TERM VARCHAR(500);
+ALTER TABLE E2B_ICSR_REACTIONS ADD COLUMN IF NOT EXISTS CODING_MATCH VARCHAR(20);
+ALTER TABLE E2B_ICSR_REACTIONS ADD COLUMN IF NOT EXISTS CODING_CONFIDENCE NUMBER(4,3);
+
+-- Tables created before dates and ages were typed hold the raw E2B strings
+-- in VARCHAR(20) columns. Snowflake cannot ALTER a VARCHAR column to DATE or
+-- NUMBER, so each such column is replaced by a converted copy: dates as
+-- e2b_parser.parse_e2b_date reads them (format by length, partial dates to
+-- the first day of their period), PATIENT_AGE as its number, taken as years
+-- since the unit was not stored (queue the source files again to recompute
+-- it). Columns already typed are left alone, so this is safe to rerun. The
+-- app's Database Setup tab runs the same conversion (typed_column_migration).
+CREATE OR REPLACE PROCEDURE MIGRATE_E2B_TYPED_COLUMNS()
+RETURNS NUMBER
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    migrated NUMBER DEFAULT 0;
+    untyped CURSOR FOR
+        SELECT TABLE_NAME, COLUMN_NAME
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = CURRENT_SCHEMA()
+          AND DATA_TYPE = 'TEXT'
+          AND TABLE_NAME || '.' || COLUMN_NAME IN (
+              'E2B_ICSR_CASES.TRANSMISSION_DATE', 'E2B_ICSR_CASES.RECEIVE_DATE',
+              'E2B_ICSR_CASES.RECEIPT_DATE', 'E2B_ICSR_CASES.PATIENT_DEATH_DATE',
+              'E2B_ICSR_CASES.PATIENT_AGE', 'E2B_ICSR_DRUGS.START_DATE', 'E2B_ICSR_DRUGS.END_DATE',
+              'E2B_ICSR_REACTIONS.START_DATE', 'E2B_ICSR_REACTIONS.END_DATE');
+BEGIN
+    FOR c IN untyped DO
+        LET tbl VARCHAR := c.TABLE_NAME;
+        LET col VARCHAR := c.COLUMN_NAME;
+        LET col_type VARCHAR := IFF(col = 'PATIENT_AGE', 'NUMBER(6,2)', 'DATE');
+        LET converted VARCHAR := IFF(col = 'PATIENT_AGE',
+            'TRY_TO_NUMBER(' || col || ', 6, 2)',
+            'IFF(LENGTH(' || col || ') IN (4, 6, 8, 12, 14), TRY_TO_DATE(RPAD(LEFT(' || col || ', 8), 8, ''01''), ''YYYYMMDD''), NULL)');
+        LET add_typed VARCHAR := 'ALTER TABLE ' || tbl || ' ADD COLUMN IF NOT EXISTS ' || col || '_TYPED ' || col_type;
+        LET fill_typed VARCHAR := 'UPDATE ' || tbl || ' SET ' || col || '_TYPED = ' || converted;
+        LET drop_raw VARCHAR := 'ALTER TABLE ' || tbl || ' DROP COLUMN ' || col;
+        LET rename_typed VARCHAR := 'ALTER TABLE ' || tbl || ' RENAME COLUMN ' || col || '_TYPED TO ' || col;
+        EXECUTE IMMEDIATE :add_typed;
+        EXECUTE IMMEDIATE :fill_typed;
+        EXECUTE IMMEDIATE :drop_raw;
+        EXECUTE IMMEDIATE :rename_typed;
+        migrated := migrated + 1;
+    END FOR;
+    RETURN migrated;
+END;
+$$;
+
+CALL MIGRATE_E2B_TYPED_COLUMNS();
+
+-- E2B MedDRA Closure: every MedDRA term paired with itself and each of its
+-- ancestors (LLT -> PT -> HLT -> HLGT -> SOC), replaced by
+-- e2b_meddra.MedDRADictionary.publish() for each MedDRA version
+CREATE TABLE IF NOT EXISTS E2B_MEDDRA_CLOSURE (
+    ANCESTOR_CODE NUMBER(8),
+    ANCESTOR_LEVEL VARCHAR(4),          -- LLT, PT, HLT, HLGT or SOC
+    ANCESTOR_NAME VARCHAR(500),
+    DESCENDANT_CODE NUMBER(8),
+    DESCENDANT_LEVEL VARCHAR(4),
+    DEPTH NUMBER(1),                    -- 0 for the term itself
+    PRIMARY_PATH BOOLEAN,               -- ancestor lies on the descendant's primary SOC path
+    MEDDRA_VERSION VARCHAR(10),
+    LOADED_AT TIMESTAMP_NTZ
+)
+CLUSTER BY (DESCENDANT_LEVEL, DESCENDANT_CODE);
+
+-- E2B Ingestion Checkpoints: resumable loads, one row per source file
+CREATE TABLE IF NOT EXISTS E2B_INGESTION_CHECKPOINTS (
+    FILE_HASH VARCHAR(32) PRIMARY KEY,  -- blake2b-128 of the uploaded file bytes
+    FILE_NAME VARCHAR(500),
+    REPORTS_COMMITTED NUMBER,           -- reports committed so far, in file order
+    COMPLETE BOOLEAN,
+    UPDATED_AT TIMESTAMP_NTZ
+);
+
+-- E2B Ingestion Runs: one row per ingestion run, with wall seconds per stage
+CREATE TABLE IF NOT EXISTS E2B_INGESTION_RUNS (
+    RUN_ID VARCHAR(64) PRIMARY KEY,
+    SOURCE VARCHAR(500),
+    STATUS VARCHAR(20),                 -- done, failed or cancelled
+    STARTED_AT TIMESTAMP_NTZ,
+    FINISHED_AT TIMESTAMP_NTZ,
+    REPORTS NUMBER,
+    ROW_COUNT NUMBER,                   -- case, drug and reaction rows loaded
+    BYTES_READ NUMBER,                  -- decompressed XML bytes read
+    DECODE_SECONDS FLOAT,               -- reading and decompressing input
+    PARSE_SECONDS FLOAT,                -- XML tokenizing
+    BUILD_SECONDS FLOAT,                -- building reports and records
+    WRITE_SECONDS FLOAT,                -- staging, PUT/COPY and MERGE
+    TOTAL_SECONDS FLOAT,
+    ROWS_PER_SECOND FLOAT,
+    ERROR TEXT
+);
+
+-- E2B Duplicate Candidates: suspected duplicate cases for review (e2b_dedup.py)
+CREATE TABLE IF NOT EXISTS E2B_DUPLICATE_CANDIDATES (
+    CASE_ID VARCHAR(100),               -- the later case
+    MATCHED_CASE_ID VARCHAR(100),       -- the earlier case it resembles
+    SCORE NUMBER(4,3),                  -- weighted field similarity, 0-1
+    BLOCK_KEY VARCHAR(500),             -- blocking key the pair shared
+    FIELD_SCORES VARCHAR(1000),         -- JSON similarity per field
+    REVIEW_STATUS VARCHAR(20) DEFAULT 'PENDING',  -- PENDING, DUPLICATE or DISTINCT
+    DETECTED_AT TIMESTAMP_NTZ
+);
 
 -- ============================================================================
--- Step 3: Create Summary View
+-- Step 3: Create Incrementally Maintained Case Summary
 -- ============================================================================
 
-CREATE OR REPLACE VIEW V_E2B_CASE_SUMMARY AS
+-- One row per case and suspect drug, with the case's adverse events. Kept
+-- up to date by REFRESH_E2B_CASE_SUMMARY(), which recomputes only the cases
+-- changed since its last run; dashboards should read this table.
+-- (CASE_ID, DRUG_SEQ) keys the rows; DRUG_SEQ is 0 for a case without a suspect drug.
+CREATE TABLE IF NOT EXISTS E2B_CASE_SUMMARY (
+    CASE_ID VARCHAR(100),
+    REPORT_TYPE VARCHAR(50),
+    PATIENT VARCHAR(100),
+    IS_SERIOUS VARCHAR(5),
+    SUSPECT_DRUG VARCHAR(500),
+    GENERIC_NAME VARCHAR(500),
+    INDICATION VARCHAR(500),
+    ADVERSE_EVENTS TEXT,
+    REPORTER_COUNTRY VARCHAR(10),
+    SENDER_ORGANIZATION VARCHAR(200),
+    INGESTION_TIMESTAMP TIMESTAMP_NTZ,
+    DRUG_SEQ INT
+)
+CLUSTER BY (CASE_ID);
+
+-- Summaries created before DRUG_SEQ are rebuilt by the full summary below
+ALTER TABLE E2B_CASE_SUMMARY ADD COLUMN IF NOT EXISTS DRUG_SEQ INT;
+DELETE FROM E2B_CASE_SUMMARY WHERE DRUG_SEQ IS NULL;
+
+-- Change streams: every insert, update (including follow-up upserts) and
+-- delete on the E2B tables records the affected CASE_ID
+CREATE STREAM IF NOT EXISTS E2B_ICSR_CASES_CHANGES ON TABLE E2B_ICSR_CASES;
+CREATE STREAM IF NOT EXISTS E2B_ICSR_DRUGS_CHANGES ON TABLE E2B_ICSR_DRUGS;
+CREATE STREAM IF NOT EXISTS E2B_ICSR_REACTIONS_CHANGES ON TABLE E2B_ICSR_REACTIONS;
+
+-- Replace the summary rows of every case touched since the last refresh.
+-- The INSERT consuming the streams and the summary rewrite commit together,
+-- so a failed refresh leaves the streams where they were.
+CREATE OR REPLACE PROCEDURE REFRESH_E2B_CASE_SUMMARY()
+RETURNS NUMBER
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    touched NUMBER DEFAULT 0;
+BEGIN
+    -- DDL commits implicitly, so the work table is created before the transaction
+    CREATE TEMPORARY TABLE IF NOT EXISTS E2B_CASE_SUMMARY_TOUCHED (CASE_ID VARCHAR(100));
+    BEGIN TRANSACTION;
+    DELETE FROM E2B_CASE_SUMMARY_TOUCHED;
+    INSERT INTO E2B_CASE_SUMMARY_TOUCHED
+        SELECT CASE_ID FROM E2B_ICSR_CASES_CHANGES
+        UNION SELECT CASE_ID FROM E2B_ICSR_DRUGS_CHANGES
+        UNION SELECT CASE_ID FROM E2B_ICSR_REACTIONS_CHANGES;
+    touched := SQLROWCOUNT;
+    DELETE FROM E2B_CASE_SUMMARY
+        WHERE CASE_ID IN (SELECT CASE_ID FROM E2B_CASE_SUMMARY_TOUCHED);
+    INSERT INTO E2B_CASE_SUMMARY
+    SELECT 
+        c.CASE_ID,
+        c.REPORT_TYPE,
+        -- TM9 drops trailing zeros of the NUMBER(6,2) age: '65 Male', not '65.00 Male'
+        TO_VARCHAR(c.PATIENT_AGE, 'TM9') || ' ' || c.PATIENT_SEX AS PATIENT,
+        c.SERIOUS AS IS_SERIOUS,
+        d.MEDICINAL_PRODUCT AS SUSPECT_DRUG,
+        d.GENERIC_NAME,
+        d.INDICATION,
+        -- Reactions reported only as verbatim text have no MEDDRA_PT
+        LISTAGG(DISTINCT COALESCE(r.MEDDRA_PT, r.VERBATIM_TERM), ', ') AS ADVERSE_EVENTS,
+        c.REPORTER_COUNTRY,
+        c.SENDER_ORGANIZATION,
+        c.INGESTION_TIMESTAMP,
+        COALESCE(d.DRUG_SEQ, 0) AS DRUG_SEQ
+    FROM E2B_ICSR_CASES c
+    LEFT JOIN E2B_ICSR_DRUGS d ON c.CASE_ID = d.CASE_ID AND d.DRUG_CHARACTERIZATION = 'Suspect'
+    LEFT JOIN E2B_ICSR_REACTIONS r ON c.CASE_ID = r.CASE_ID
+    WHERE c.CASE_ID IN (SELECT CASE_ID FROM E2B_CASE_SUMMARY_TOUCHED)
+    GROUP BY c.CASE_ID, c.REPORT_TYPE, c.PATIENT_AGE, c.PATIENT_SEX, c.SERIOUS, d.DRUG_SEQ,
+             d.MEDICINAL_PRODUCT, d.GENERIC_NAME, d.INDICATION, c.REPORTER_COUNTRY, 
+             c.SENDER_ORGANIZATION, c.INGESTION_TIMESTAMP;
+    COMMIT;
+    RETURN touched;
+EXCEPTION
+    WHEN OTHER THEN
+        ROLLBACK;
+        RAISE;
+END;
+$$;
+
+-- Cases loaded before the streams existed are summarized in full once
+INSERT INTO E2B_CASE_SUMMARY
 SELECT 
     c.CASE_ID,
     c.REPORT_TYPE,
-    c.PATIENT_AGE || ' ' || c.PATIENT_SEX AS PATIENT,
+    TO_VARCHAR(c.PATIENT_AGE, 'TM9') || ' ' || c.PATIENT_SEX AS PATIENT,
     c.SERIOUS AS IS_SERIOUS,
     d.MEDICINAL_PRODUCT AS SUSPECT_DRUG,
     d.GENERIC_NAME,
     d.INDICATION,
-    LISTAGG(DISTINCT r.MEDDRA_PT, ', ') AS ADVERSE_EVENTS,
+    LISTAGG(DISTINCT COALESCE(r.MEDDRA_PT, r.VERBATIM_TERM), ', ') AS ADVERSE_EVENTS,
     c.REPORTER_COUNTRY,
     c.SENDER_ORGANIZATION,
-    c.INGESTION_TIMESTAMP
+    c.INGESTION_TIMESTAMP,
+    COALESCE(d.DRUG_SEQ, 0) AS DRUG_SEQ
 FROM E2B_ICSR_CASES c
 LEFT JOIN E2B_ICSR_DRUGS d ON c.CASE_ID = d.CASE_ID AND d.DRUG_CHARACTERIZATION = 'Suspect'
 LEFT JOIN E2B_ICSR_REACTIONS r ON c.CASE_ID = r.CASE_ID
-GROUP BY c.CASE_ID, c.REPORT_TYPE, c.PATIENT_AGE, c.PATIENT_SEX, c.SERIOUS,
+WHERE NOT EXISTS (SELECT 1 FROM E2B_CASE_SUMMARY s WHERE s.CASE_ID = c.CASE_ID)
+GROUP BY c.CASE_ID, c.REPORT_TYPE, c.PATIENT_AGE, c.PATIENT_SEX, c.SERIOUS, d.DRUG_SEQ,
          d.MEDICINAL_PRODUCT, d.GENERIC_NAME, d.INDICATION, c.REPORTER_COUNTRY, 
          c.SENDER_ORGANIZATION, c.INGESTION_TIMESTAMP;
 
+-- Refresh every minute, but only start the warehouse when a stream has changes
+CREATE OR REPLACE TASK E2B_CASE_SUMMARY_REFRESH
+    WAREHOUSE = COMPUTE_WH  -- Change to your warehouse; later: ALTER TASK ... SUSPEND, SET WAREHOUSE = ..., RESUME
+    SCHEDULE = '1 MINUTE'
+    WHEN SYSTEM$STREAM_HAS_DATA('E2B_ICSR_CASES_CHANGES')
+      OR SYSTEM$STREAM_HAS_DATA('E2B_ICSR_DRUGS_CHANGES')
+      OR SYSTEM$STREAM_HAS_DATA('E2B_ICSR_REACTIONS_CHANGES')
+AS
+    CALL REFRESH_E2B_CASE_SUMMARY();
+
+ALTER TASK E2B_CASE_SUMMARY_REFRESH RESUME;
+
+-- Kept for existing readers; now a plain read of the maintained summary
+CREATE OR REPLACE VIEW V_E2B_CASE_SUMMARY AS
+SELECT * FROM E2B_CASE_SUMMARY;
+
+-- Reactions and cases per MedDRA term at every level (PT, HLT, HLGT, SOC),
+-- along primary paths: one join of the coded PT to the closure table
+CREATE OR REPLACE VIEW V_E2B_MEDDRA_ROLLUP AS
+SELECT
+    m.ANCESTOR_LEVEL AS MEDDRA_LEVEL,
+    m.ANCESTOR_CODE AS MEDDRA_CODE,
+    m.ANCESTOR_NAME AS MEDDRA_TERM,
+    COUNT(*) AS REACTIONS,
+    COUNT(DISTINCT r.CASE_ID) AS CASES
+FROM E2B_ICSR_REACTIONS r
+JOIN E2B_MEDDRA_CLOSURE m
+  ON m.DESCENDANT_LEVEL = 'PT' AND m.DESCENDANT_CODE = r.MEDDRA_CODED_PT AND m.PRIMARY_PATH
+GROUP BY m.ANCESTOR_LEVEL, m.ANCESTOR_CODE, m.ANCESTOR_NAME;
+
+-- Cases per suspect product, primary SOC and PT for the PBRER/PSUR tabulations
+-- (pbrer_app.py, psur_app.py): SOC and PT names come from the closure join on
+-- the coded PT, never from free-text SOC strings
+CREATE OR REPLACE VIEW V_E2B_CASES_BY_SOC AS
+SELECT
+    d.MEDICINAL_PRODUCT AS PRODUCT,
+    soc.ANCESTOR_NAME AS MEDDRA_SOC,
+    pt.ANCESTOR_NAME AS MEDDRA_PT,
+    COUNT(DISTINCT r.CASE_ID) AS CASE_COUNT,
+    COUNT(DISTINCT IFF(c.SERIOUS = '1', r.CASE_ID, NULL)) AS SERIOUS_COUNT,
+    COUNT(DISTINCT IFF(c.SERIOUS = '2', r.CASE_ID, NULL)) AS NON_SERIOUS_COUNT,
+    COUNT(DISTINCT IFF(r.OUTCOME = 'Recovered/Resolved', r.CASE_ID, NULL)) AS RECOVERED,
+    COUNT(DISTINCT IFF(r.OUTCOME = 'Recovering/Resolving', r.CASE_ID, NULL)) AS RECOVERING,
+    COUNT(DISTINCT IFF(r.OUTCOME = 'Not Recovered/Not Resolved', r.CASE_ID, NULL)) AS NOT_RECOVERED
+FROM E2B_ICSR_REACTIONS r
+JOIN E2B_ICSR_CASES c ON c.CASE_ID = r.CASE_ID
+JOIN E2B_ICSR_DRUGS d ON d.CASE_ID = r.CASE_ID AND d.DRUG_CHARACTERIZATION = 'Suspect'
+JOIN E2B_MEDDRA_CLOSURE pt
+  ON pt.DESCENDANT_LEVEL = 'PT' AND pt.DESCENDANT_CODE = r.MEDDRA_CODED_PT AND pt.ANCESTOR_LEVEL = 'PT'
+JOIN E2B_MEDDRA_CLOSURE soc
+  ON soc.DESCENDANT_LEVEL = 'PT' AND soc.DESCENDANT_CODE = r.MEDDRA_CODED_PT
+ AND soc.ANCESTOR_LEVEL = 'SOC' AND soc.PRIMARY_PATH
+GROUP BY d.MEDICINAL_PRODUCT, soc.ANCESTOR_NAME, pt.ANCESTOR_NAME;
+
+-- Manual coding queue: verbatim terms the autocoder left uncoded or coded
+-- below e2b_autocoder.REVIEW_CONFIDENCE, most frequent first
+-- (generated by e2b_autocoder.manual_coding_view_sql(); regenerate rather
+-- than edit, so the threshold stays defined only in Python)
+CREATE OR REPLACE VIEW V_E2B_MANUAL_CODING AS
+SELECT
+    r.VERBATIM_TERM,
+    MAX(r.MEDDRA_CODED_PT) AS SUGGESTED_PT,
+    MAX(r.CODING_CONFIDENCE) AS CODING_CONFIDENCE,
+    COUNT(*) AS REACTIONS,
+    COUNT(DISTINCT r.CASE_ID) AS CASES
+FROM E2B_ICSR_REACTIONS r
+WHERE r.VERBATIM_TERM IS NOT NULL
+  AND (r.MEDDRA_CODED_PT IS NULL OR r.CODING_CONFIDENCE < 0.85)
+GROUP BY r.VERBATIM_TERM
+ORDER BY REACTIONS DESC;
+
 -- ============================================================================
 -- Step 4: Create Stage
 -- ============================================================================
@@ -4,8 +4,14 @@
 
 USE DATABASE HCLS_DEMO;
 
--- Upload files to stage (run from SnowSQL CLI)
+-- Upload files to stage (run from SnowSQL CLI); the app imports e2b_parser.py, e2b_stage.py,
+-- e2b_manifest.py, e2b_meddra.py and e2b_autocoder.py
 -- PUT file:///path/to/e2b_ingestion_app.py @HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE OVERWRITE=TRUE AUTO_COMPRESS=FALSE;
+-- PUT file:///path/to/e2b_parser.py @HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE OVERWRITE=TRUE AUTO_COMPRESS=FALSE;
+-- PUT file:///path/to/e2b_stage.py @HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE OVERWRITE=TRUE AUTO_COMPRESS=FALSE;
+-- PUT file:///path/to/e2b_manifest.py @HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE OVERWRITE=TRUE AUTO_COMPRESS=FALSE;
+-- PUT file:///path/to/e2b_meddra.py @HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE OVERWRITE=TRUE AUTO_COMPRESS=FALSE;
+-- PUT file:///path/to/e2b_autocoder.py @HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE OVERWRITE=TRUE AUTO_COMPRESS=FALSE;
 -- PUT file:///path/to/environment.yml @HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE OVERWRITE=TRUE AUTO_COMPRESS=FALSE;
 
 -- Create Streamlit app
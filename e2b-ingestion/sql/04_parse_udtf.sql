@@ -0,0 +1,93 @@
+-- ============================================================================
+-- E2B(R2) ICSR Ingestion - In-warehouse Parsing UDTF
+-- Parses staged E2B files on the warehouse with the PARSE_E2B table function
+-- ============================================================================
+
+USE DATABASE HCLS_DEMO;
+USE SCHEMA PHARMACOVIGILANCE;
+
+-- Landing stage for E2B files (.xml, .xml.gz, .zip); the directory table lists them for parsing
+CREATE STAGE IF NOT EXISTS E2B_LANDING_STAGE
+    DIRECTORY = (ENABLE = TRUE)
+    ENCRYPTION = (TYPE = 'SNOWFLAKE_SSE');
+
+-- Upload the parser modules, and E2B files to parse (run from SnowSQL CLI)
+-- PUT file:///path/to/e2b_parser.py @HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE/udtf OVERWRITE=TRUE AUTO_COMPRESS=FALSE;
+-- PUT file:///path/to/e2b_stage.py @HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE/udtf OVERWRITE=TRUE AUTO_COMPRESS=FALSE;
+-- PUT file:///path/to/e2b_udtf.py @HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE/udtf OVERWRITE=TRUE AUTO_COMPRESS=FALSE;
+-- PUT file:///data/e2b/*.xml.gz @E2B_LANDING_STAGE AUTO_COMPRESS=FALSE;
+-- ALTER STAGE E2B_LANDING_STAGE REFRESH;
+
+-- One output row per case, drug and reaction of the file; RECORD holds the loaded columns
+CREATE OR REPLACE FUNCTION PARSE_E2B(FILE_URL VARCHAR)
+    RETURNS TABLE (RECORD_TABLE VARCHAR, CASE_ID VARCHAR, SEQ NUMBER, RECORD OBJECT)
+    LANGUAGE PYTHON
+    RUNTIME_VERSION = '3.11'
+    PACKAGES = ('snowflake-snowpark-python', 'lxml')
+    IMPORTS = (
+        '@HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE/udtf/e2b_parser.py',
+        '@HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE/udtf/e2b_stage.py',
+        '@HCLS_DEMO.STREAMLIT_APPS.E2B_INGESTION_STAGE/udtf/e2b_udtf.py'
+    )
+    HANDLER = 'e2b_udtf.ParseE2B';
+
+-- Parse every staged file into the E2B tables, one UDTF partition per file
+-- (generated by e2b_udtf.insert_from_stage_sql(None, 'E2B_LANDING_STAGE'))
+INSERT ALL
+  WHEN RECORD_TABLE = 'ICSR_CASES' THEN INTO E2B_ICSR_CASES (CASE_ID, SAFETY_REPORT_VERSION, TRANSMISSION_DATE, REPORT_TYPE, SERIOUS, SERIOUSNESS_DEATH, SERIOUSNESS_LIFE_THREATENING, SERIOUSNESS_HOSPITALIZATION, SERIOUSNESS_DISABILITY, SERIOUSNESS_CONGENITAL, SERIOUSNESS_OTHER, RECEIVE_DATE, RECEIPT_DATE, SENDER_ORGANIZATION, RECEIVER_ORGANIZATION, CASE_NARRATIVE, REPORTER_COUNTRY, QUALIFICATION, PATIENT_AGE, PATIENT_SEX, PATIENT_WEIGHT, PATIENT_MEDICAL_HISTORY, PATIENT_DEATH_DATE, INGESTION_TIMESTAMP) VALUES (CASE_ID, SAFETY_REPORT_VERSION, TRANSMISSION_DATE, REPORT_TYPE, SERIOUS, SERIOUSNESS_DEATH, SERIOUSNESS_LIFE_THREATENING, SERIOUSNESS_HOSPITALIZATION, SERIOUSNESS_DISABILITY, SERIOUSNESS_CONGENITAL, SERIOUSNESS_OTHER, RECEIVE_DATE, RECEIPT_DATE, SENDER_ORGANIZATION, RECEIVER_ORGANIZATION, CASE_NARRATIVE, REPORTER_COUNTRY, QUALIFICATION, PATIENT_AGE, PATIENT_SEX, PATIENT_WEIGHT, PATIENT_MEDICAL_HISTORY, PATIENT_DEATH_DATE, INGESTION_TIMESTAMP)
+  WHEN RECORD_TABLE = 'ICSR_DRUGS' THEN INTO E2B_ICSR_DRUGS (CASE_ID, DRUG_SEQ, DRUG_CHARACTERIZATION, MEDICINAL_PRODUCT, GENERIC_NAME, BATCH_NUMBER, AUTHORIZATION_HOLDER, DOSAGE_TEXT, DOSAGE_FORM, ROUTE_OF_ADMIN, INDICATION, START_DATE, END_DATE, ACTION_TAKEN) VALUES (CASE_ID, DRUG_SEQ, DRUG_CHARACTERIZATION, MEDICINAL_PRODUCT, GENERIC_NAME, BATCH_NUMBER, AUTHORIZATION_HOLDER, DOSAGE_TEXT, DOSAGE_FORM, ROUTE_OF_ADMIN, INDICATION, START_DATE, END_DATE, ACTION_TAKEN)
+  WHEN RECORD_TABLE = 'ICSR_REACTIONS' THEN INTO E2B_ICSR_REACTIONS (CASE_ID, REACTION_SEQ, VERBATIM_TERM, MEDDRA_PT, MEDDRA_PT_CODE, MEDDRA_LLT, START_DATE, END_DATE, OUTCOME, MEDDRA_CODED_PT, MEDDRA_SOC, CODING_MATCH, CODING_CONFIDENCE) VALUES (CASE_ID, REACTION_SEQ, VERBATIM_TERM, MEDDRA_PT, MEDDRA_PT_CODE, MEDDRA_LLT, START_DATE, END_DATE, OUTCOME, MEDDRA_CODED_PT, MEDDRA_SOC, CODING_MATCH, CODING_CONFIDENCE)
+SELECT p.RECORD_TABLE,
+       p.RECORD:CASE_ID::VARCHAR AS CASE_ID,
+       p.RECORD:SAFETY_REPORT_VERSION::VARCHAR AS SAFETY_REPORT_VERSION,
+       p.RECORD:TRANSMISSION_DATE::DATE AS TRANSMISSION_DATE,
+       p.RECORD:REPORT_TYPE::VARCHAR AS REPORT_TYPE,
+       p.RECORD:SERIOUS::VARCHAR AS SERIOUS,
+       p.RECORD:SERIOUSNESS_DEATH::VARCHAR AS SERIOUSNESS_DEATH,
+       p.RECORD:SERIOUSNESS_LIFE_THREATENING::VARCHAR AS SERIOUSNESS_LIFE_THREATENING,
+       p.RECORD:SERIOUSNESS_HOSPITALIZATION::VARCHAR AS SERIOUSNESS_HOSPITALIZATION,
+       p.RECORD:SERIOUSNESS_DISABILITY::VARCHAR AS SERIOUSNESS_DISABILITY,
+       p.RECORD:SERIOUSNESS_CONGENITAL::VARCHAR AS SERIOUSNESS_CONGENITAL,
+       p.RECORD:SERIOUSNESS_OTHER::VARCHAR AS SERIOUSNESS_OTHER,
+       p.RECORD:RECEIVE_DATE::DATE AS RECEIVE_DATE,
+       p.RECORD:RECEIPT_DATE::DATE AS RECEIPT_DATE,
+       p.RECORD:SENDER_ORGANIZATION::VARCHAR AS SENDER_ORGANIZATION,
+       p.RECORD:RECEIVER_ORGANIZATION::VARCHAR AS RECEIVER_ORGANIZATION,
+       p.RECORD:CASE_NARRATIVE::VARCHAR AS CASE_NARRATIVE,
+       p.RECORD:REPORTER_COUNTRY::VARCHAR AS REPORTER_COUNTRY,
+       p.RECORD:QUALIFICATION::VARCHAR AS QUALIFICATION,
+       p.RECORD:PATIENT_AGE::NUMBER(6,2) AS PATIENT_AGE,
+       p.RECORD:PATIENT_SEX::VARCHAR AS PATIENT_SEX,
+       p.RECORD:PATIENT_WEIGHT::VARCHAR AS PATIENT_WEIGHT,
+       p.RECORD:PATIENT_MEDICAL_HISTORY::VARCHAR AS PATIENT_MEDICAL_HISTORY,
+       p.RECORD:PATIENT_DEATH_DATE::DATE AS PATIENT_DEATH_DATE,
+       p.RECORD:INGESTION_TIMESTAMP::TIMESTAMP_NTZ AS INGESTION_TIMESTAMP,
+       p.RECORD:DRUG_SEQ::INT AS DRUG_SEQ,
+       p.RECORD:DRUG_CHARACTERIZATION::VARCHAR AS DRUG_CHARACTERIZATION,
+       p.RECORD:MEDICINAL_PRODUCT::VARCHAR AS MEDICINAL_PRODUCT,
+       p.RECORD:GENERIC_NAME::VARCHAR AS GENERIC_NAME,
+       p.RECORD:BATCH_NUMBER::VARCHAR AS BATCH_NUMBER,
+       p.RECORD:AUTHORIZATION_HOLDER::VARCHAR AS AUTHORIZATION_HOLDER,
+       p.RECORD:DOSAGE_TEXT::VARCHAR AS DOSAGE_TEXT,
+       p.RECORD:DOSAGE_FORM::VARCHAR AS DOSAGE_FORM,
+       p.RECORD:ROUTE_OF_ADMIN::VARCHAR AS ROUTE_OF_ADMIN,
+       p.RECORD:INDICATION::VARCHAR AS INDICATION,
+       p.RECORD:START_DATE::DATE AS START_DATE,
+       p.RECORD:END_DATE::DATE AS END_DATE,
+       p.RECORD:ACTION_TAKEN::VARCHAR AS ACTION_TAKEN,
+       p.RECORD:REACTION_SEQ::INT AS REACTION_SEQ,
+       p.RECORD:VERBATIM_TERM::VARCHAR AS VERBATIM_TERM,
+       p.RECORD:MEDDRA_PT::VARCHAR AS MEDDRA_PT,
+       p.RECORD:MEDDRA_PT_CODE::VARCHAR AS MEDDRA_PT_CODE,
+       p.RECORD:MEDDRA_LLT::VARCHAR AS MEDDRA_LLT,
+       p.RECORD:OUTCOME::VARCHAR AS OUTCOME,
+       p.RECORD:MEDDRA_CODED_PT::NUMBER(8) AS MEDDRA_CODED_PT,
+       p.RECORD:MEDDRA_SOC::VARCHAR AS MEDDRA_SOC,
+       p.RECORD:CODING_MATCH::VARCHAR AS CODING_MATCH,
+       p.RECORD:CODING_CONFIDENCE::NUMBER(4,3) AS CODING_CONFIDENCE
+FROM DIRECTORY(@E2B_LANDING_STAGE) d,
+     TABLE(PARSE_E2B(BUILD_SCOPED_FILE_URL(@E2B_LANDING_STAGE, d.RELATIVE_PATH)) OVER (PARTITION BY d.RELATIVE_PATH)) p
+WHERE d.RELATIVE_PATH ILIKE ANY ('%.xml', '%.xml.gz', '%.zip');
+
+-- Inspect one file's output
+-- SELECT * FROM TABLE(PARSE_E2B(BUILD_SCOPED_FILE_URL(@E2B_LANDING_STAGE, 'partner_batch.xml.gz'))) LIMIT 20;
@@ -27,8 +27,9 @@ def get_product_summary(product_name):
     return df[0].as_dict() if df else None
 
 def get_soc_summary(product_name):
+    # Coded E2B reactions rolled up to SOC through the MedDRA closure table (e2b-ingestion sql/01)
     df = session.sql(f"""
-        SELECT * FROM HCLS_DEMO.PHARMACOVIGILANCE.V_PSUR_CASES_BY_SOC
+        SELECT * FROM HCLS_DEMO.PHARMACOVIGILANCE.V_E2B_CASES_BY_SOC
         WHERE PRODUCT LIKE '%{product_name}%'
         ORDER BY CASE_COUNT DESC
     """).collect()